@@ -0,0 +1,217 @@
+"""Local HTTP server with pages modelled on WebVoyager sites.
+
+Every site has a landing page with a search form, a results page with
+cards and pagination, and item detail pages, so an agent goes through the
+same navigate/wait/screenshot cycle as on the live site without network
+variance. Pages are generated deterministically from the path.
+
+With `third_party_delay` set, every page also loads a web font and slow
+"third-party" ads, analytics and video from the `localhost` host name
+(pages themselves are on 127.0.0.1), like the trackers on the live sites.
+It also loads a first-party stylesheet and script that are cacheable and
+take `static_delay` seconds, the same on every page, so a browser that
+keeps its HTTP cache across navigations fetches them once.
+"""
+
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# site slug -> (title, item noun, accent colour)
+SITES: Dict[str, Tuple[str, str, str]] = {
+    "allrecipes": ("Allrecipes", "recipe", "#ce4620"),
+    "amazon": ("Amazon", "product", "#febd69"),
+    "arxiv": ("arXiv", "paper", "#b31b1b"),
+    "booking": ("Booking.com", "hotel", "#003580"),
+    "github": ("GitHub", "repository", "#24292f"),
+    "coursera": ("Coursera", "course", "#0056d2"),
+}
+
+RESULTS_PER_PAGE = 20
+
+# Third-party host name; blocking it filters the fixture's "trackers"
+THIRD_PARTY_HOST = "localhost"
+FONT_BYTES = 96 * 1024
+
+
+def _layout(site: str, body: str) -> str:
+    title, noun, accent = SITES[site]
+    nav = "".join(
+        f'<a href="/{site}/search?q={category}">{category.title()}</a>'
+        for category in ("popular", "new", "deals", "top rated", "help")
+    )
+    return f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+header {{ background: {accent}; color: white; padding: 12px 24px; position: sticky; top: 0; }}
+header a {{ color: white; margin-right: 16px; }}
+.card {{ display: inline-block; width: 280px; margin: 12px; padding: 12px; border: 1px solid #ddd; vertical-align: top; }}
+.thumb {{ width: 100%; height: 140px; background: linear-gradient(135deg, {accent}, #eee); }}
+footer {{ background: #222; color: #aaa; padding: 24px; margin-top: 48px; }}
+</style></head>
+<body>
+<header><strong>{title}</strong>
+<form action="/{site}/search" style="display:inline"><input name="q" placeholder="Search {noun}s"><button>Search</button></form>
+<nav>{nav}</nav></header>
+<main>{body}</main>
+<footer>{" ".join(f'<a href="/{site}/about/{i}">Footer link {i}</a>' for i in range(30))}</footer>
+</body></html>"""
+
+
+def _landing(site: str) -> str:
+    _, noun, _ = SITES[site]
+    cards = "".join(
+        f'<div class="card"><div class="thumb"></div><a href="/{site}/item/{i}">Featured {noun} {i}</a></div>'
+        for i in range(8)
+    )
+    return _layout(site, f"<h1>Find the best {noun}s</h1>{cards}")
+
+
+def _results(site: str, query: str, page: int) -> str:
+    _, noun, _ = SITES[site]
+    start = page * RESULTS_PER_PAGE
+    cards = "".join(
+        f'<div class="card"><div class="thumb"></div>'
+        f'<h3><a href="/{site}/item/{i}">{html.escape(query.title())} {noun} #{i}</a></h3>'
+        f"<p>Rating {(i * 7) % 5 + 1}.{i % 10} stars, {(i * 37) % 900 + 10} reviews</p>"
+        f"<p>{'Lorem ipsum dolor sit amet. ' * 4}</p></div>"
+        for i in range(start, start + RESULTS_PER_PAGE)
+    )
+    pager = "".join(
+        f'<a href="/{site}/search?q={html.escape(query)}&page={p}">{p + 1}</a> ' for p in range(10)
+    )
+    return _layout(site, f"<h1>Results for {html.escape(query)}</h1>{cards}<div>{pager}</div>")
+
+
+def _item(site: str, item: int) -> str:
+    _, noun, _ = SITES[site]
+    rows = "".join(
+        f"<tr><td>Attribute {i}</td><td>Value {(item * 31 + i) % 97}</td></tr>" for i in range(25)
+    )
+    reviews = "".join(f"<li>Review {i}: {'Great value. ' * 6}</li>" for i in range(15))
+    return _layout(
+        site,
+        f'<h1>{noun.title()} {item}</h1><div class="thumb" style="height:320px"></div>'
+        f"<table>{rows}</table><h2>Reviews</h2><ul>{reviews}</ul>",
+    )
+
+
+def _third_party_tags(third_party_url: str) -> str:
+    return f"""<link rel="stylesheet" href="/static/site.css">
+<script src="/static/app.js"></script>
+<style>@font-face {{ font-family: Brand; src: url(/static/brand.woff2); }}
+h1 {{ font-family: Brand, sans-serif; }}</style>
+<script async src="{third_party_url}/_3p/ads/tag.js"></script>
+<script async src="{third_party_url}/_3p/analytics/collect.js"></script>
+<img src="{third_party_url}/_3p/pixel/p.gif" width="1" height="1" alt="">
+<video src="{third_party_url}/_3p/media/promo.mp4" autoplay muted></video>"""
+
+
+# First-party static assets shared by every page
+_STATIC_ASSETS = {
+    "/static/site.css": ("text/css", b"main { line-height: 1.4; }\n" * 2048),
+    "/static/app.js": ("application/javascript", b"window.fixture = 1;\n" * 4096),
+}
+
+_THIRD_PARTY_TYPES = {
+    ".js": "application/javascript",
+    ".gif": "image/gif",
+    ".mp4": "video/mp4",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, content_type: str, payload: bytes, **headers: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        delay = self.server.third_party_delay
+        if delay is not None and url.path.startswith("/_3p/"):
+            time.sleep(delay)
+            suffix = url.path[url.path.rfind(".") :]
+            self._send(200, _THIRD_PARTY_TYPES.get(suffix, "text/plain"), b"\0" * 2048)
+            return
+        if url.path in _STATIC_ASSETS:
+            with self.server.static_lock:
+                self.server.static_fetches += 1
+            time.sleep(self.server.static_delay)
+            content_type, payload = _STATIC_ASSETS[url.path]
+            self._send(200, content_type, payload, Cache_Control="max-age=86400")
+            return
+        if url.path == "/static/brand.woff2":
+            self._send(200, "font/woff2", bytes(FONT_BYTES), Cache_Control="max-age=86400")
+            return
+        parts = [part for part in url.path.split("/") if part]
+        status, page = 200, None
+        if parts and parts[0] in SITES:
+            site = parts[0]
+            query = parse_qs(url.query)
+            if len(parts) == 1:
+                page = _landing(site)
+            elif parts[1] == "search":
+                page = _results(
+                    site, query.get("q", [""])[0], int(query.get("page", ["0"])[0])
+                )
+            elif parts[1] == "item" and len(parts) > 2 and parts[2].isdigit():
+                page = _item(site, int(parts[2]))
+        if page is None:
+            status, page = 404, "<h1>Not found</h1>"
+        elif delay is not None:
+            port = self.server.server_address[1]
+            tags = _third_party_tags(f"http://{THIRD_PARTY_HOST}:{port}")
+            page = page.replace("</body>", f"{tags}</body>")
+        self._send(status, "text/html; charset=utf-8", page.encode())
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class FixtureServer:
+    """Serves the fixture sites from a background thread on a free port."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        third_party_delay: Optional[float] = None,
+        static_delay: float = 0.0,
+    ) -> None:
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.third_party_delay = third_party_delay
+        self.httpd.static_delay = static_delay
+        self.httpd.static_lock = threading.Lock()
+        self.httpd.static_fetches = 0
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def static_fetches(self) -> int:
+        """First-party stylesheet and script requests served so far."""
+        return self.httpd.static_fetches
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def site_url(self, site: str) -> str:
+        return f"{self.base_url}/{site}/"
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
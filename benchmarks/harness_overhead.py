@@ -0,0 +1,254 @@
+"""Measure the runner's own overhead offline.
+
+Drives the real runner (browser pool, agent, judge, journal, result files and
+progress printing) against local fixture sites and a scripted fake model, so
+the only time spent is the harness and the browser. Reports throughput,
+per-task overhead, peak RSS of the whole process tree and event-loop lag at
+several concurrency levels.
+
+    python benchmarks/harness_overhead.py --concurrency 1 4 16 64 --tasks 64
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import run_browser_use as runner  # noqa: E402
+from fixture_sites import SITES, FixtureServer  # noqa: E402
+from harness.fake_llm import ScriptedAgentModel  # noqa: E402
+from harness.llm_dispatcher import Endpoint, LLMDispatcher  # noqa: E402
+
+try:
+    import psutil
+except ImportError:  # Falls back to getrusage peaks
+    psutil = None
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    tasks: int
+    completed: int
+    errors: int
+    wall_seconds: float
+    tasks_per_minute: float
+    overhead_ms_per_task: float
+    peak_rss_mb: float
+    loop_lag_p50_ms: float
+    loop_lag_p99_ms: float
+    loop_lag_max_ms: float
+
+
+def plan_for(base_url: str):
+    """Navigate search -> result page -> item -> scroll -> done."""
+    pattern = re.compile(re.escape(base_url) + r"/([a-z]+)/")
+
+    def plan(prompt_text: str) -> List[Dict[str, Any]]:
+        site = pattern.search(prompt_text).group(1)
+        root = f"{base_url}/{site}"
+        return [
+            {"go_to_url": {"url": f"{root}/"}},
+            {"go_to_url": {"url": f"{root}/search?q=benchmark"}},
+            {"go_to_url": {"url": f"{root}/search?q=benchmark&page=1"}},
+            {"go_to_url": {"url": f"{root}/item/7"}},
+            {"scroll_down": {}},
+            {"done": {"text": f"Found item 7 on {site}"}},
+        ]
+
+    return plan
+
+
+def fake_dispatcher(base_url: str, llm_latency: float) -> LLMDispatcher:
+    plan = plan_for(base_url)
+    return LLMDispatcher(
+        [
+            Endpoint(
+                name="scripted",
+                factory=lambda **kwargs: ScriptedAgentModel(plan, latency=llm_latency),
+                tokens_per_minute=10**9,
+                requests_per_minute=10**9,
+            )
+        ],
+        model_name="scripted-agent",
+    )
+
+
+def fixture_tasks(server: FixtureServer, count: int) -> List[runner.TaskData]:
+    sites = list(SITES)
+    return [
+        {
+            "id": f"{sites[i % len(sites)]}--{i}",
+            "web": server.site_url(sites[i % len(sites)]),
+            "ques": "Find item 7 in the benchmark search results",
+        }
+        for i in range(count)
+    ]
+
+
+class LoopLagMonitor:
+    """Samples how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.lags_ms: List[float] = []
+
+    async def run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append((time.perf_counter() - start - self.interval) * 1000)
+
+
+class RssMonitor:
+    """Peak RSS of this process and its children (Chromium), sampled."""
+
+    def __init__(self, interval: float = 0.2) -> None:
+        self.interval = interval
+        self.peak_bytes = 0
+
+    def sample(self) -> None:
+        if psutil is None:
+            return
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            with contextlib.suppress(psutil.Error):
+                total += child.memory_info().rss
+        self.peak_bytes = max(self.peak_bytes, total)
+
+    async def run(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def peak_mb(self) -> float:
+        if psutil is None:
+            # Largest single process rather than the sum over the tree
+            own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            return max(own, children) / 1024
+        return self.peak_bytes / 1024**2
+
+
+async def run_level(
+    server: FixtureServer, concurrency: int, task_count: int, llm_latency: float
+) -> LevelResult:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = runner.RunConfig(
+            max_concurrent_tasks=concurrency,
+            judge_cache_path=None,
+            results_dir=Path(tmp) / "run",
+        )
+        tasks = fixture_tasks(server, task_count)
+        runner.get_llm_dispatcher = lambda _: fake_dispatcher(server.base_url, llm_latency)
+        stats, experiment_results, journal, _ = runner.open_run(config, tasks)
+        durations: List[float] = []
+        steps: List[int] = []
+        errors = 0
+
+        async def on_result(task_result: runner.TaskResult) -> None:
+            runner.finish_task(task_result, config, stats, experiment_results, journal)
+            durations.append(task_result.duration_seconds)
+            steps.append(task_result.num_steps)
+
+        async def on_error(task: runner.TaskData, error: Exception) -> None:
+            nonlocal errors
+            errors += 1
+            runner.record_task_error(task, error, stats)
+
+        lag, rss = LoopLagMonitor(), RssMonitor()
+        monitors = [asyncio.create_task(lag.run()), asyncio.create_task(rss.run())]
+        start = time.perf_counter()
+        try:
+            # Progress output is part of the overhead, but not worth reading
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                await runner.run_tasks(
+                    config, tasks, on_result, on_error, agent_queue_size=config.lookahead
+                )
+                runner.save_experiment_results(experiment_results, config.results_dir)
+        finally:
+            wall = time.perf_counter() - start
+            for monitor in monitors:
+                monitor.cancel()
+            journal.close()
+
+    # Scripted LLM latency (agent steps, output validation and the judge) is
+    # not overhead; everything else in a task's duration is
+    llm_seconds = [(n + 2) * llm_latency for n in steps]
+    overhead = [d - llm for d, llm in zip(durations, llm_seconds)]
+    lags = sorted(lag.lags_ms) or [0.0]
+    return LevelResult(
+        concurrency=concurrency,
+        tasks=task_count,
+        completed=len(durations),
+        errors=errors,
+        wall_seconds=wall,
+        tasks_per_minute=len(durations) / wall * 60,
+        overhead_ms_per_task=statistics.mean(overhead) * 1000 if overhead else 0.0,
+        peak_rss_mb=rss.peak_mb(),
+        loop_lag_p50_ms=lags[len(lags) // 2],
+        loop_lag_p99_ms=lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+        loop_lag_max_ms=lags[-1],
+    )
+
+
+async def benchmark(args: argparse.Namespace) -> List[LevelResult]:
+    results = []
+    with FixtureServer() as server:
+        for concurrency in args.concurrency:
+            task_count = max(args.tasks, concurrency)
+            result = await run_level(server, concurrency, task_count, args.llm_latency)
+            results.append(result)
+            print(
+                f"{result.concurrency:>5}{result.completed:>7}/{result.tasks:<5}"
+                f"{result.tasks_per_minute:>10.1f}{result.overhead_ms_per_task:>13.0f}"
+                f"{result.peak_rss_mb:>11.0f}{result.loop_lag_p50_ms:>9.1f}"
+                f"{result.loop_lag_p99_ms:>9.1f}{result.loop_lag_max_ms:>9.1f}",
+                flush=True,
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Levels to run"
+    )
+    parser.add_argument(
+        "--tasks", type=int, default=64, help="Tasks per level, at least the concurrency"
+    )
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the fake model waits per call, to mimic a real LLM",
+    )
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    print(
+        f"{'conc':>5}{'done':>13}{'tasks/min':>10}{'overhead ms':>13}{'peak RSS MB':>11}"
+        f"{'lag p50':>9}{'lag p99':>9}{'lag max':>9}"
+    )
+    results = asyncio.run(benchmark(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Per-task memory of agent histories, kept in memory versus streamed to disk.
+
+Replays agent runs of several lengths with a stand-in agent whose history
+items look like browser_use's (step metadata plus a base64 full-page
+screenshot) and measures Python heap usage with tracemalloc. "in-memory"
+keeps the whole history until the run ends, as `agent.run` does;
+"streamed" attaches the runner's StreamingHistory, which writes every step
+out as it happens and keeps only the screenshots the judge needs.
+
+    python benchmarks/history_memory.py --steps 10 30 60
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from harness.history_store import (  # noqa: E402
+    SCREENSHOTS_DIR,
+    ScreenshotStore,
+    StreamingHistory,
+)
+
+
+class _HistoryItem:
+    def __init__(self, step: int, screenshot: str) -> None:
+        self.step = step
+        self.state = SimpleNamespace(url=f"https://example.com/{step}", screenshot=screenshot)
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {
+            "model_output": {
+                "current_state": {"memory": f"Scrolled {self.step} times", "next_goal": "scroll"},
+                "action": [{"scroll_down": {}}],
+            },
+            "result": [{"is_done": False, "extracted_content": None}],
+            "state": {"url": self.state.url, "screenshot": self.state.screenshot},
+        }
+
+
+class _ReplayAgent:
+    """Appends one history item with a fresh screenshot per step."""
+
+    def __init__(self, screenshot_bytes: int) -> None:
+        self.history = SimpleNamespace(history=[])
+        self.screenshot_bytes = screenshot_bytes
+
+    async def step(self) -> None:
+        screenshot = base64.b64encode(os.urandom(self.screenshot_bytes)).decode()
+        self.history.history.append(_HistoryItem(len(self.history.history), screenshot))
+
+    async def run(self, max_steps: int) -> Any:
+        for _ in range(max_steps):
+            await self.step()
+        return self.history
+
+
+async def measure(steps: int, streamed: bool, screenshot_bytes: int) -> Tuple[float, float]:
+    """Peak and end-of-run heap in MB for one replayed task."""
+    with tempfile.TemporaryDirectory() as tmp:
+        task_dir = Path(tmp) / "task"
+        task_dir.mkdir()
+        tracemalloc.start()
+        agent = _ReplayAgent(screenshot_bytes)
+        stream = None
+        if streamed:
+            stream = StreamingHistory(task_dir, ScreenshotStore(Path(tmp) / SCREENSHOTS_DIR))
+            stream.attach(agent)
+        history = await agent.run(max_steps=steps)
+        if stream is not None:
+            history = stream.finish(history)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del history, agent, stream
+    return peak / 1024**2, current / 1024**2
+
+
+async def benchmark(args: argparse.Namespace) -> List[Tuple[int, float, float, float, float]]:
+    rows = []
+    for steps in args.steps:
+        memory_peak, memory_end = await measure(steps, False, args.screenshot_kb * 1024)
+        streamed_peak, streamed_end = await measure(steps, True, args.screenshot_kb * 1024)
+        rows.append((steps, memory_peak, memory_end, streamed_peak, streamed_end))
+        print(
+            f"{steps:>6}{memory_peak:>16.1f}{memory_end:>15.1f}"
+            f"{streamed_peak:>16.1f}{streamed_end:>15.1f}",
+            flush=True,
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 30, 60])
+    parser.add_argument(
+        "--screenshot-kb",
+        type=int,
+        default=300,
+        help="PNG size of a full-page screenshot, before base64",
+    )
+    args = parser.parse_args()
+    print(
+        f"{'steps':>6}{'in-memory peak':>16}{'in-memory end':>15}"
+        f"{'streamed peak':>16}{'streamed end':>15}   (MB)"
+    )
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
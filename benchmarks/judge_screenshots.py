@@ -0,0 +1,79 @@
+"""Measure judge screenshot preprocessing on stored runs.
+
+Reads the last four screenshots of every saved history under a results
+directory, runs them through each preprocessing setting and reports size,
+estimated image tokens, preprocessing latency, upload time and judge cost.
+
+    python benchmarks/judge_screenshots.py results/examples-browser-use
+"""
+
+import argparse
+import base64
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from evaluation.image_preprocess import (  # noqa: E402
+    ImagePreprocessConfig,
+    PreprocessStats,
+    preprocess_screenshots,
+)
+from harness.history_store import CompactHistory, has_history  # noqa: E402
+
+# gpt-4o input price in USD per million tokens
+INPUT_PRICE_PER_MILLION = 2.50
+
+CONFIGS: Dict[str, ImagePreprocessConfig] = {
+    "original": ImagePreprocessConfig(),
+    "jpeg-1024-q75": ImagePreprocessConfig(enabled=True),
+    "jpeg-1024-q75-nocrop": ImagePreprocessConfig(enabled=True, crop_static_bands=False),
+    "jpeg-768-q60": ImagePreprocessConfig(enabled=True, max_edge=768, quality=60),
+    # GPT-4o bills 512px tiles, so tokens only drop once an edge fits in one
+    "jpeg-512-q75": ImagePreprocessConfig(enabled=True, max_edge=512),
+    "webp-1024-q75": ImagePreprocessConfig(enabled=True, format="webp"),
+}
+
+
+def load_screenshots(task_dir: Path, last: int = 4) -> List[bytes]:
+    screenshots = CompactHistory.load(task_dir).screenshots()[-last:]
+    return [base64.b64decode(screenshot) for screenshot in screenshots]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results_dir", type=Path)
+    parser.add_argument("--limit", type=int, default=100, help="Max histories to load")
+    parser.add_argument(
+        "--upload-mbps", type=float, default=50, help="Uplink bandwidth for upload estimate"
+    )
+    args = parser.parse_args()
+
+    task_dirs = sorted(p for p in args.results_dir.iterdir() if p.is_dir() and has_history(p))
+    histories = task_dirs[: args.limit]
+    tasks = [shots for shots in (load_screenshots(h) for h in histories) if shots]
+    if not tasks:
+        print(f"No screenshots found under {args.results_dir}")
+        return
+    print(f"{len(tasks)} tasks from {args.results_dir}\n")
+
+    header = f"{'config':<22}{'KB/task':>10}{'tokens/task':>13}{'prep ms/task':>14}{'upload ms':>11}{'$/1k tasks':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, config in CONFIGS.items():
+        stats = PreprocessStats()
+        start = time.perf_counter()
+        for screenshots in tasks:
+            stats.add(preprocess_screenshots(screenshots, config)[2])
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(tasks)
+        kb = stats.bytes_out / 1024 / len(tasks)
+        # Base64 inflates the request body by a third
+        upload_ms = stats.bytes_out * 4 / 3 * 8 / (args.upload_mbps * 1e6) * 1000 / len(tasks)
+        tokens = stats.tokens_out / len(tasks)
+        cost = tokens * 1000 * INPUT_PRICE_PER_MILLION / 1e6
+        print(f"{name:<22}{kb:>10.0f}{tokens:>13.0f}{elapsed_ms:>14.1f}{upload_ms:>11.0f}{cost:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
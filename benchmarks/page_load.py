@@ -0,0 +1,186 @@
+"""Compare page-load waits with and without the network filter.
+
+Opens the fixture pages in a browser_use context configured like the runner's
+and times each navigation plus browser_use's wait for the page to settle,
+which is what an agent pays after every navigating action. The fixture pages
+load slow "third-party" ads, analytics and video from another host name and a
+web font, so the filter has something to block and cache. Every
+`--pages-per-task` pages get a fresh context, as tasks do, which is where the
+asset cache pays off: a fresh context starts with an empty HTTP cache.
+
+Each page also loads the same cacheable first-party stylesheet and script,
+which take `--static-delay` seconds. Without the filter the browser fetches
+them once per context; with it Playwright's routing turns the HTTP cache
+off, so the script is fetched on every navigation (the stylesheet only
+until the asset cache has it). The "static" column counts those fetches.
+
+    python benchmarks/page_load.py --pages 30 --third-party-delay 1.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from browser_use import Browser, BrowserConfig  # noqa: E402
+from browser_use.browser.context import BrowserContextConfig  # noqa: E402
+from fixture_sites import SITES, THIRD_PARTY_HOST, FixtureServer  # noqa: E402
+from harness.browser_context import HarnessBrowserContext  # noqa: E402
+from harness.network_filter import (  # noqa: E402
+    DEFAULT_BLOCKED_DOMAINS,
+    NetworkFilter,
+    NetworkFilterConfig,
+    NetworkStats,
+)
+
+
+@dataclass
+class ProfileResult:
+    profile: str
+    pages: int
+    mean_seconds: float
+    p50_seconds: float
+    p90_seconds: float
+    requests: int
+    blocked: int
+    cache_hits: int
+    cache_bytes: int
+    static_fetches: int
+
+
+def page_urls(server: FixtureServer, count: int) -> List[str]:
+    sites = list(SITES)
+    urls = []
+    for i in range(count):
+        root = server.site_url(sites[i % len(sites)])
+        urls.append([root, f"{root}search?q=benchmark&page={i % 3}", f"{root}item/{i}"][i % 3])
+    return urls
+
+
+async def run_profile(
+    name: str,
+    server: FixtureServer,
+    urls: List[str],
+    network_filter: Optional[NetworkFilter],
+    pages_per_task: int,
+) -> ProfileResult:
+    browser = Browser(config=BrowserConfig(headless=True, disable_security=True))
+    # Same waits as the runner's contexts
+    context_config = BrowserContextConfig(
+        disable_security=True,
+        wait_for_network_idle_page_load_time=5,
+        maximum_wait_page_load_time=20,
+        browser_window_size={"width": 1280, "height": 1100},
+    )
+    stats = NetworkStats()
+    static_before = server.static_fetches
+    seconds = []
+    try:
+        for first in range(0, len(urls), pages_per_task):
+            context = HarnessBrowserContext(
+                browser=browser, config=context_config, network_filter=network_filter
+            )
+            try:
+                page = await context.get_current_page()
+                for url in urls[first : first + pages_per_task]:
+                    start = time.perf_counter()
+                    await page.goto(url, wait_until="domcontentloaded")
+                    await context._wait_for_page_and_frames_load()
+                    seconds.append(time.perf_counter() - start)
+            finally:
+                await context.close()
+            if context.network_stats is not None:
+                stats.add(context.network_stats)
+    finally:
+        await browser.close()
+
+    ordered = sorted(seconds)
+    return ProfileResult(
+        profile=name,
+        pages=len(seconds),
+        mean_seconds=statistics.mean(seconds),
+        p50_seconds=ordered[len(ordered) // 2],
+        p90_seconds=ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        requests=stats.requests,
+        blocked=stats.blocked_requests(),
+        cache_hits=stats.cache_hits,
+        cache_bytes=stats.cache_bytes,
+        static_fetches=server.static_fetches - static_before,
+    )
+
+
+async def benchmark(args: argparse.Namespace) -> List[ProfileResult]:
+    blocked_domains = DEFAULT_BLOCKED_DOMAINS | {THIRD_PARTY_HOST}
+    results = []
+    server = FixtureServer(
+        third_party_delay=args.third_party_delay, static_delay=args.static_delay
+    )
+    with server, tempfile.TemporaryDirectory() as cache_dir:
+        urls = page_urls(server, args.pages)
+        profiles = [
+            ("off", None),
+            ("block", NetworkFilter(NetworkFilterConfig(blocked_domains=blocked_domains))),
+            (
+                "block+cache",
+                NetworkFilter(
+                    NetworkFilterConfig(
+                        blocked_domains=blocked_domains, asset_cache_dir=Path(cache_dir)
+                    )
+                ),
+            ),
+        ]
+        for name, network_filter in profiles:
+            result = await run_profile(name, server, urls, network_filter, args.pages_per_task)
+            results.append(result)
+            print(
+                f"{result.profile:<12}{result.pages:>6}{result.mean_seconds:>9.2f}"
+                f"{result.p50_seconds:>9.2f}{result.p90_seconds:>9.2f}{result.requests:>10}"
+                f"{result.blocked:>9}{result.cache_hits:>12}{result.static_fetches:>8}",
+                flush=True,
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=30, help="Pages loaded per profile")
+    parser.add_argument(
+        "--pages-per-task", type=int, default=5, help="Pages loaded per fresh context"
+    )
+    parser.add_argument(
+        "--third-party-delay",
+        type=float,
+        default=1.5,
+        help="Seconds each third-party fixture request takes",
+    )
+    parser.add_argument(
+        "--static-delay",
+        type=float,
+        default=0.3,
+        help="Seconds each first-party stylesheet and script request takes",
+    )
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    print(
+        f"{'profile':<12}{'pages':>6}{'mean s':>9}{'p50 s':>9}{'p90 s':>9}"
+        f"{'requests':>10}{'blocked':>9}{'cache hits':>12}{'static':>8}"
+    )
+    results = asyncio.run(benchmark(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
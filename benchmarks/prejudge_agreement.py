@@ -0,0 +1,94 @@
+"""Agreement of the reference-answer pre-judge with stored judge verdicts.
+
+Runs the pre-judge over the final answers of every task of one or more
+stored runs, without any API call, and compares its verdicts with the
+judge model's: `task_result.json` and any `rejudge_*.json` next to it.
+Verdicts that were themselves made by the pre-judge are left out. Reports
+the share of judge calls the pre-judge would have avoided and how often
+it agrees with the judge when it decides.
+
+    python benchmarks/prejudge_agreement.py results/examples-browser-use
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterator, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from evaluation.reference_match import (  # noqa: E402
+    PREJUDGE_PREFIX,
+    REFERENCE_ANSWERS,
+    PreJudge,
+)
+
+NO_ANSWER = "<NO FINAL ANSWER>"
+
+
+def iter_verdicts(results_dir: Path) -> Iterator[Tuple[str, str, str, str]]:
+    """(task id, final answer, judge name, judge verdict) of every stored verdict."""
+    for entry in sorted(os.scandir(results_dir), key=lambda entry: entry.name):
+        result_file = Path(entry.path) / "task_result.json"
+        if not entry.is_dir() or not result_file.exists():
+            continue
+        with open(result_file) as f:
+            task_result = json.load(f)
+        answer = task_result["final_answer"]
+        verdicts = [("run", task_result)]
+        for rejudge_file in sorted(Path(entry.path).glob("rejudge_*.json")):
+            with open(rejudge_file) as f:
+                verdicts.append((rejudge_file.stem[len("rejudge_"):], json.load(f)))
+        for judge, verdict in verdicts:
+            if verdict["gpt_4v_res"].startswith(PREJUDGE_PREFIX):
+                continue
+            yield task_result["task_id"], answer, judge, verdict["success"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results_dirs", type=Path, nargs="+")
+    parser.add_argument("--references", type=Path, default=REFERENCE_ANSWERS)
+    parser.add_argument(
+        "--show-disagreements", action="store_true", help="Print every disagreement"
+    )
+    args = parser.parse_args()
+
+    prejudge = PreJudge.load(args.references)
+    judged = 0
+    agreement: Counter = Counter()
+    disagreements = []
+    for results_dir in args.results_dirs:
+        for task_id, answer, judge, verdict in iter_verdicts(results_dir):
+            if answer == NO_ANSWER:
+                # The judge is never called for these either
+                continue
+            judged += 1
+            decided = prejudge.judge(task_id, answer)
+            if decided is None:
+                continue
+            agreement[(decided[0], verdict)] += 1
+            if decided[0] != verdict:
+                disagreements.append((results_dir.name, task_id, judge, verdict, decided[1]))
+
+    decided_count = sum(agreement.values())
+    agreed = sum(count for (ours, theirs), count in agreement.items() if ours == theirs)
+    print(
+        f"{judged} judge verdicts; the pre-judge decides {decided_count} "
+        f"({decided_count / max(judged, 1):.1%} of judge calls avoided)"
+    )
+    print(
+        f"Agreement with the judge: {agreed}/{decided_count} "
+        f"({agreed / max(decided_count, 1):.1%})"
+    )
+    for (ours, theirs), count in sorted(agreement.items()):
+        print(f"  pre-judge {ours:<8} judge {theirs:<8} {count}")
+    if args.show_disagreements:
+        for run, task_id, judge, verdict, reason in disagreements:
+            print(f"{run}/{task_id} [{judge}: {verdict}] {reason}")
+
+
+if __name__ == "__main__":
+    main()
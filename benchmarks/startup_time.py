@@ -0,0 +1,142 @@
+"""Import time of the entry points, measured with `python -X importtime`.
+
+Imports each entry point's module in a fresh interpreter several times and
+reports the median total import time, the packages that take longest, and
+which heavy stacks (browser_use, playwright, the chat providers) it loads.
+With `--compare REV` the same is measured on a git worktree of REV, e.g.
+the commit before the provider registry, to show the difference.
+
+    python benchmarks/startup_time.py --compare HEAD~1
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    "run_browser_use.py": "run_browser_use",
+    "rejudge.py": "rejudge",
+    "judge": "evaluation.auto_eval_browser_use",
+    "score_answers.py": "score_answers",
+    "export_results.py": "export_results",
+    "calculate_current_score.py": "calculate_current_score",
+}
+HEAVY_PACKAGES = [
+    "browser_use",
+    "playwright",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_google_genai",
+]
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+def import_profile(module: str, cwd: Path) -> Tuple[Optional[Dict[str, int]], str]:
+    """Import time per top-level package in microseconds, or None and the error.
+
+    Each module's own time (without its imports) goes to its top-level
+    package, so the packages add up to the total and every package that was
+    loaded at all is listed.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+        return None, error
+    packages: Dict[str, int] = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match is not None:
+            packages[match.group(2).split(".")[0]] += int(match.group(1))
+    return dict(packages), ""
+
+
+def measure(module: str, cwd: Path, repeat: int) -> Tuple[Optional[float], Dict[str, int], str]:
+    """Median total import time in ms, the last run's packages, and any error."""
+    totals: List[float] = []
+    packages: Dict[str, int] = {}
+    for _ in range(repeat):
+        profile, error = import_profile(module, cwd)
+        if profile is None:
+            return None, {}, error
+        packages = profile
+        totals.append(sum(profile.values()) / 1000)
+    return statistics.median(totals), packages, ""
+
+
+def report(label: str, cwd: Path, repeat: int, top: int) -> Dict[str, Optional[float]]:
+    print(f"== {label}")
+    medians = {}
+    for name, module in ENTRY_POINTS.items():
+        median, packages, error = measure(module, cwd, repeat)
+        medians[name] = median
+        if median is None:
+            print(f"{name:<28} import failed: {error}")
+            continue
+        heavy = [package for package in HEAVY_PACKAGES if package in packages]
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        loads = ", ".join(heavy) or "none of the heavy stacks"
+        print(f"{name:<28}{median:>9.0f}ms  loads: {loads}")
+        print(
+            "    heaviest: "
+            + ", ".join(f"{package} {micros / 1000:.0f}ms" for package, micros in heaviest)
+        )
+    return medians
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Imports per entry point")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages to show")
+    parser.add_argument("--compare", metavar="REV", help="Also measure this git revision")
+    args = parser.parse_args()
+
+    current = report("working tree", REPO_ROOT, args.repeat, args.top)
+    if args.compare is None:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        worktree = Path(tmp) / "baseline"
+        subprocess.run(
+            ["git", "worktree", "add", "--detach", str(worktree), args.compare],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+        )
+        try:
+            # Uncommitted settings such as .env are not in the worktree
+            for name in (".env",):
+                if (REPO_ROOT / name).exists():
+                    (worktree / name).write_bytes((REPO_ROOT / name).read_bytes())
+            baseline = report(args.compare, worktree, args.repeat, args.top)
+        finally:
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", str(worktree)],
+                cwd=REPO_ROOT,
+                capture_output=True,
+            )
+    print(f"== speedup over {args.compare}")
+    for name in ENTRY_POINTS:
+        before, after = baseline.get(name), current.get(name)
+        if before is None or after is None:
+            print(f"{name:<28} n/a")
+        else:
+            speedup = before / max(after, 1e-3)
+            print(f"{name:<28}{before:>9.0f}ms -> {after:.0f}ms ({speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,179 @@
+import argparse
 import json
 import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
+INDEX_VERSION = 1
+INDEX_FILE = ".score_index.json"
+JOURNAL_FILE = "results.jsonl"
 
-def get_score(folder):
-    success_count = 0
-    total_count = 1
-    print(f"Processing {folder}")
-    print(f"Total tasks: {len(os.listdir(folder))}")
-    for subfolder in os.listdir(folder):
-        # if not folder, skip
-        if not os.path.isdir(os.path.join(folder, subfolder)):
-            continue
-        for file in os.listdir(os.path.join(folder, subfolder)):
-            if file.endswith("task_result.json"):
-                with open(os.path.join(folder, subfolder, file), "r") as f:
-                    data = json.load(f)
-                if data["success"] == "success":
-                    success_count += 1
-                total_count += 1
-
-    print(
-        f"Success rate : {success_count / total_count:.2f}={success_count}/{total_count}"
-    )
-    print()
-
-
-main_folder = "results"
-print("Success rate for each folder:")
-for folder in os.listdir(main_folder):
-    if not os.path.isdir(os.path.join(main_folder, folder)):
-        continue
-    get_score(os.path.join(main_folder, folder))
+# task_id -> [mtime_ns, size, success]
+TaskEntries = Dict[str, list]
+
+
+def load_index(path: Path) -> dict:
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": INDEX_VERSION, "runs": {}}
+    if index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "runs": {}}
+    return index
+
+
+def save_index(path: Path, index: dict) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_success(result_file: str) -> Optional[str]:
+    try:
+        with open(result_file) as f:
+            return json.load(f)["success"]
+    except (OSError, json.JSONDecodeError, KeyError):
+        return None
+
+
+def update_from_journal(journal: Path, run: dict) -> int:
+    """Read only the journal bytes appended since the last scan."""
+    size = journal.stat().st_size
+    offset = run.get("journal_offset", 0)
+    if size < offset:
+        # Journal was replaced or truncated; start over
+        run["tasks"], offset = {}, 0
+    if size == offset:
+        return 0
+    read = 0
+    with open(journal, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Record still being written
+            offset += len(line)
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            run["tasks"][record["task_id"]] = [0, 0, record["success"]]
+            read += 1
+    run["journal_offset"] = offset
+    return read
+
+
+def update_from_directories(
+    run_dir: Path, run: dict, pool: ThreadPoolExecutor
+) -> int:
+    """Stat every task_result.json and parse only new or changed ones."""
+    tasks: TaskEntries = run["tasks"]
+    seen = set()
+    changed: List[Tuple[str, str, int, int]] = []
+    with os.scandir(run_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            result_file = os.path.join(entry.path, "task_result.json")
+            try:
+                stat = os.stat(result_file)
+            except FileNotFoundError:
+                continue
+            seen.add(entry.name)
+            cached = tasks.get(entry.name)
+            if cached is None or cached[0] != stat.st_mtime_ns or cached[1] != stat.st_size:
+                changed.append((entry.name, result_file, stat.st_mtime_ns, stat.st_size))
+    removed = set(tasks) - seen
+    for task_id in removed:
+        del tasks[task_id]
+    for (task_id, _, mtime_ns, size), success in zip(
+        changed, pool.map(read_success, [item[1] for item in changed])
+    ):
+        if success is not None:
+            tasks[task_id] = [mtime_ns, size, success]
+    return len(changed) + len(removed)
+
+
+def update_index(results_root: Path, index: dict, workers: int) -> int:
+    """Bring the index up to date, returning how many entries changed."""
+    read = 0
+    runs = index["runs"]
+    present = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for run_dir in sorted(p for p in results_root.iterdir() if p.is_dir()):
+            run = runs.setdefault(run_dir.name, {"tasks": {}})
+            journal = run_dir / JOURNAL_FILE
+            if journal.exists():
+                if "journal_offset" not in run:
+                    run["tasks"] = {}
+                read += update_from_journal(journal, run)
+            else:
+                run.pop("journal_offset", None)
+                read += update_from_directories(run_dir, run, pool)
+                # Not a run, e.g. results/store or results/site_profiles
+                if not run["tasks"]:
+                    del runs[run_dir.name]
+                    continue
+            present.add(run_dir.name)
+    for name in set(runs) - present:
+        del runs[name]
+        read += 1
+    return read
+
+
+def site_of(task_id: str) -> str:
+    return task_id.split("--")[0]
+
+
+def format_rate(success: int, total: int) -> str:
+    rate = success / total if total else 0.0
+    return f"{rate:.2f}={success}/{total}"
+
+
+def print_scores(index: dict, by_site: bool) -> None:
+    print("Success rate for each folder:")
+    for name, run in sorted(index["runs"].items()):
+        outcomes = [entry[2] for entry in run["tasks"].values()]
+        counts = Counter(outcomes)
+        print(f"Processing {name}")
+        print(f"Total tasks: {len(outcomes)}")
+        print(f"Success rate : {format_rate(counts['success'], len(outcomes))}")
+        if by_site:
+            sites: Dict[str, Counter] = defaultdict(Counter)
+            for task_id, entry in run["tasks"].items():
+                sites[site_of(task_id)][entry[2]] += 1
+            for site, site_counts in sorted(sites.items()):
+                total = sum(site_counts.values())
+                print(
+                    f"  {site:<24} {format_rate(site_counts['success'], total):>14}"
+                    f"  failed {site_counts['failed']:>3}  timeout {site_counts['timeout']:>3}"
+                    f"  unknown {site_counts['unknown']:>3}"
+                )
+        print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score every run under a results folder")
+    parser.add_argument("results_root", nargs="?", default="results", type=Path)
+    parser.add_argument("--by-site", action="store_true", help="Per-site breakdown")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the saved index")
+    parser.add_argument("--workers", type=int, default=16, help="Parallel file readers")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index_path = args.results_root / INDEX_FILE
+    index = {"version": INDEX_VERSION, "runs": {}} if args.rebuild else load_index(index_path)
+    read = update_index(args.results_root, index, args.workers)
+    if read:
+        save_index(index_path, index)
+    print_scores(index, args.by_site)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"({read} new or changed results in {elapsed_ms:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
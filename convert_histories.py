@@ -0,0 +1,117 @@
+"""Convert saved `history.json` files to the compact history format.
+
+Each task's steps go to `history.jsonl.gz` and its screenshots to the run's
+content-addressed `screenshots/` store, shared by all tasks of the run. A
+conversion is checked by reading it back; only then is `history.json`
+removed, and only with `--delete`. Reports the disk saved and how much faster
+a history loads for judging (step metadata plus the last four screenshots).
+
+    python convert_histories.py results/examples-browser-use --delete
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+from harness.history_store import (
+    COMPACT_HISTORY,
+    HISTORY_JSON,
+    SCREENSHOTS_DIR,
+    CompactHistory,
+    CompactHistoryWriter,
+    ScreenshotStore,
+)
+
+
+def iter_history_files(run_dir: Path) -> Iterator[Path]:
+    with os.scandir(run_dir) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            path = Path(entry.path) / HISTORY_JSON
+            if entry.is_dir() and path.exists():
+                yield path
+
+
+def convert(history_file: Path, store: ScreenshotStore) -> bool:
+    """Write the compact history next to `history_file`; True if it reads back equal."""
+    with open(history_file) as f:
+        original = json.load(f)
+    compact_path = history_file.parent / COMPACT_HISTORY
+    tmp_path = compact_path.with_name(f".{compact_path.name}.tmp")
+    writer = CompactHistoryWriter(tmp_path, store)
+    try:
+        for step in original["history"]:
+            writer.append(step)
+    finally:
+        writer.close()
+    os.replace(tmp_path, compact_path)
+    return CompactHistory.load(history_file.parent, store).to_dict() == original
+
+
+def time_judge_load(load, task_dirs: List[Path]) -> float:
+    """Seconds to load every history and read its last four screenshots."""
+    start = time.perf_counter()
+    for task_dir in task_dirs:
+        history = load(task_dir)
+        history.screenshots()[-4:]
+        history.final_result()
+    return time.perf_counter() - start
+
+
+def load_json(task_dir: Path) -> CompactHistory:
+    with open(task_dir / HISTORY_JSON) as f:
+        return CompactHistory(json.load(f)["history"], None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("run_dirs", nargs="+", type=Path, help="Run directories to convert")
+    parser.add_argument(
+        "--delete",
+        action="store_true",
+        help="Remove each history.json once its compact copy reads back identical",
+    )
+    args = parser.parse_args()
+
+    for run_dir in args.run_dirs:
+        store = ScreenshotStore(run_dir / SCREENSHOTS_DIR)
+        json_bytes = compact_bytes = converted = mismatched = 0
+        task_dirs = []
+        for history_file in iter_history_files(run_dir):
+            json_bytes += history_file.stat().st_size
+            if not convert(history_file, store):
+                mismatched += 1
+                print(f"{history_file}: compact copy differs, keeping history.json")
+                continue
+            converted += 1
+            compact_bytes += (history_file.parent / COMPACT_HISTORY).stat().st_size
+            task_dirs.append(history_file.parent)
+        if not converted:
+            print(f"{run_dir}: no history.json to convert")
+            continue
+
+        json_seconds = time_judge_load(load_json, task_dirs)
+        compact_seconds = time_judge_load(
+            lambda task_dir: CompactHistory.load(task_dir, store), task_dirs
+        )
+        if args.delete:
+            for task_dir in task_dirs:
+                (task_dir / HISTORY_JSON).unlink()
+
+        total = compact_bytes + store.bytes_written
+        print(
+            f"{run_dir}: {converted} histories converted, {mismatched} kept as JSON\n"
+            f"  disk: {json_bytes / 1024**2:.1f}MB -> {total / 1024**2:.1f}MB "
+            f"({json_bytes / max(total, 1):.1f}x smaller; steps {compact_bytes / 1024**2:.1f}MB, "
+            f"{store.written} screenshots {store.bytes_written / 1024**2:.1f}MB, "
+            f"{store.deduplicated} duplicates stored once)\n"
+            f"  judge load: {json_seconds * 1000 / converted:.1f}ms -> "
+            f"{compact_seconds * 1000 / converted:.1f}ms per task "
+            f"({json_seconds / max(compact_seconds, 1e-9):.1f}x faster)"
+        )
+
+
+if __name__ == "__main__":
+    main()
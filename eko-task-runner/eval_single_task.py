@@ -4,9 +4,21 @@ import json
 import logging
 from base64 import b64encode
 import os
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from openai import OpenAI
-from typing import Literal
+from openai import AsyncOpenAI, OpenAI
+from typing import Iterator, Literal, Optional
+
+# Share the judge verdict cache with the browser-use runner
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from evaluation.image_preprocess import ImagePreprocessConfig, preprocess_screenshots
+from evaluation.retry import CircuitBreaker, call_with_retry
+from evaluation.verdict_cache import VerdictCache, judge_cache_key
+from harness.pipeline import Pipeline, Stage
+from harness.results_journal import write_json_atomic
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +26,8 @@ logger = logging.getLogger(__name__)
 
 EvalResult = Literal["success", "failed", "unknown"]
 
+JUDGE_MODEL = "gpt-4o"
+
 SYSTEM_PROMPT = """As an evaluator, you will be presented with three primary components to assist you in your role:
 
 1. Web Task Instruction: This is a clear and specific directive provided in natural language, detailing the online activity to be carried out. These requirements may include conducting searches, verifying information, comparing prices, checking availability, or any other action relevant to the specified web service (such as Amazon, Apple, ArXiv, BBC News, Booking etc).
@@ -36,93 +50,284 @@ USER_PROMPT = """TASK: <task>
 Result Response: <answer>
 <num> screenshot at the end: """
 
-def evaluate_task(task_dir: Path) -> None:
-    """Evaluate a single task result directory"""
-    try:
-        # Load task result
-        with open(task_dir / "task_result.json") as f:
-            task_result = json.load(f)
-
-        # Prepare screenshots
-        screenshots = []
-        screenshots_dir = task_dir / "screenshots"
-        for screenshot_file in sorted(screenshots_dir.glob("*.jpeg")):
-            with open(screenshot_file, "rb") as f:
-                screenshot_data = f.read()
-                screenshots.append(b64encode(screenshot_data).decode())
-
-        logger.info(f"Found {len(screenshots)} screenshots")
-
-        # Format prompt
-        user_prompt_tmp = USER_PROMPT.replace("<task>", task_result["task_prompt"])
-        user_prompt_tmp = user_prompt_tmp.replace("<answer>", str(task_result["result"]))
-        user_prompt_tmp = user_prompt_tmp.replace("<num>", str(len(screenshots)))
-
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-        # Get evaluation
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": SYSTEM_PROMPT
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": user_prompt_tmp
-                        },
-                        *[{
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{screenshot}"
-                            }
-                        } for screenshot in screenshots],
-                        {
-                            "type": "text",
-                            "text": "Your verdict:\n"
-                        }
-                    ]
-                }
-            ],
-            max_tokens=1000
+@dataclass
+class PendingEvaluation:
+    task_dir: Path
+    user_prompt: str
+    screenshots: list[bytes]
+    cache_key: Optional[str]
+
+
+def prepare_evaluation(
+    task_dir: Path, cache: Optional[VerdictCache], image_config: ImagePreprocessConfig
+) -> PendingEvaluation:
+    """Load a task result and its screenshots and format the judge prompt"""
+    # Load task result
+    with open(task_dir / "task_result.json") as f:
+        task_result = json.load(f)
+
+    # Prepare screenshots
+    screenshots = []
+    screenshots_dir = task_dir / "screenshots"
+    for screenshot_file in sorted(screenshots_dir.glob("*.jpeg")):
+        with open(screenshot_file, "rb") as f:
+            screenshots.append(f.read())
+
+    logger.info(f"Found {len(screenshots)} screenshots in {task_dir}")
+
+    # Format prompt
+    user_prompt_tmp = USER_PROMPT.replace("<task>", task_result["task_prompt"])
+    user_prompt_tmp = user_prompt_tmp.replace("<answer>", str(task_result["result"]))
+    user_prompt_tmp = user_prompt_tmp.replace("<num>", str(len(screenshots)))
+
+    cache_key = None
+    if cache is not None:
+        cache_key = judge_cache_key(
+            model=JUDGE_MODEL,
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=USER_PROMPT,
+            task=task_result["task_prompt"],
+            answer=str(task_result["result"]),
+            screenshots=screenshots,
+            extra=image_config.cache_tag(),
         )
+    return PendingEvaluation(task_dir, user_prompt_tmp, screenshots, cache_key)
 
-        gpt_4v_res = response.choices[0].message.content
 
-        # Parse result
-        if "NOT SUCCESS" in gpt_4v_res:
-            eval_result = "failed"
-        elif "SUCCESS" in gpt_4v_res:
-            eval_result = "success"
-        else:
-            eval_result = "unknown"
-
-        # Save evaluation
-        eval_data = {
-            "eval_result": eval_result,
-            "gpt_4v_response": gpt_4v_res
-        }
+def parse_verdict(gpt_4v_res: str) -> EvalResult:
+    if "NOT SUCCESS" in gpt_4v_res:
+        return "failed"
+    elif "SUCCESS" in gpt_4v_res:
+        return "success"
+    return "unknown"
 
-        with open(task_dir / "eval_result.json", "w") as f:
-            json.dump(eval_data, f, indent=2)
 
+def save_evaluation(task_dir: Path, gpt_4v_res: str) -> EvalResult:
+    """Parse the verdict and atomically write eval_result.json"""
+    eval_result = parse_verdict(gpt_4v_res)
+    eval_data = {
+        "eval_result": eval_result,
+        "gpt_4v_response": gpt_4v_res
+    }
+    write_json_atomic(task_dir / "eval_result.json", eval_data)
+    return eval_result
+
+
+def evaluate_task(
+    task_dir: Path,
+    cache: Optional[VerdictCache] = None,
+    image_config: ImagePreprocessConfig = ImagePreprocessConfig(),
+) -> None:
+    """Evaluate a single task result directory"""
+    try:
+        pending = prepare_evaluation(task_dir, cache, image_config)
+
+        gpt_4v_res = None
+        if pending.cache_key is not None:
+            gpt_4v_res = cache.get(pending.cache_key)
+            if gpt_4v_res is not None:
+                logger.info("Using cached evaluation")
+
+        if gpt_4v_res is None:
+            images, mime, image_stats = preprocess_screenshots(pending.screenshots, image_config)
+            logger.info(image_stats.summary())
+            gpt_4v_res = request_evaluation(
+                pending.user_prompt, [b64encode(image).decode() for image in images], mime
+            )
+            if pending.cache_key is not None:
+                cache.put(pending.cache_key, gpt_4v_res)
+
+        eval_result = save_evaluation(task_dir, gpt_4v_res)
         logger.info(f"Evaluation result: {eval_result}")
         logger.info("Full evaluation response saved to eval_result.json")
     except Exception as e:
         logger.error(f"Error evaluating task: {e}")
         raise
 
+def build_messages(user_prompt_tmp: str, screenshots: list[str], mime: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": user_prompt_tmp
+                },
+                *[{
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{mime};base64,{screenshot}"
+                    }
+                } for screenshot in screenshots],
+                {
+                    "type": "text",
+                    "text": "Your verdict:\n"
+                }
+            ]
+        }
+    ]
+
+def request_evaluation(user_prompt_tmp: str, screenshots: list[str], mime: str) -> str:
+    """Ask the judge model for a verdict on one task"""
+    # Initialize OpenAI client
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    # Get evaluation
+    response = client.chat.completions.create(
+        model=JUDGE_MODEL,
+        messages=build_messages(user_prompt_tmp, screenshots, mime),
+        max_tokens=1000
+    )
+
+    return response.choices[0].message.content
+
+class RequestPacer:
+    """Spaces request starts evenly to stay under a requests-per-minute limit"""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self.next_start = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+def find_pending_task_dirs(results_root: Path) -> Iterator[Path]:
+    """Task directories under results_root that have no eval_result.json yet"""
+    for task_result_file in results_root.rglob("task_result.json"):
+        task_dir = task_result_file.parent
+        if not (task_dir / "eval_result.json").exists():
+            yield task_dir
+
+async def evaluate_batch(
+    results_root: Path,
+    cache: Optional[VerdictCache] = None,
+    image_config: ImagePreprocessConfig = ImagePreprocessConfig(),
+    concurrency: int = 16,
+    requests_per_minute: float = 300,
+) -> None:
+    """Evaluate every pending task under results_root with one shared client"""
+    # Retries are left to call_with_retry so they share backoff and the breaker
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    breaker = CircuitBreaker()
+    pacer = RequestPacer(requests_per_minute)
+    counts = Counter()
+
+    async def prepare_stage(task_dir: Path) -> Optional[PendingEvaluation]:
+        try:
+            return await asyncio.to_thread(prepare_evaluation, task_dir, cache, image_config)
+        except Exception as e:
+            logger.error(f"Error loading {task_dir}: {e}")
+            counts["errors"] += 1
+            return None
+
+    async def judge_stage(pending: PendingEvaluation) -> Optional[tuple[Path, str]]:
+        if pending.cache_key is not None:
+            gpt_4v_res = cache.get(pending.cache_key)
+            if gpt_4v_res is not None:
+                counts["cached"] += 1
+                return pending.task_dir, gpt_4v_res
+        try:
+            images, mime, _ = await asyncio.to_thread(
+                preprocess_screenshots, pending.screenshots, image_config
+            )
+            messages = build_messages(
+                pending.user_prompt, [b64encode(image).decode() for image in images], mime
+            )
+
+            async def call():
+                await pacer.wait()
+                return await client.chat.completions.create(
+                    model=JUDGE_MODEL, messages=messages, max_tokens=1000
+                )
+
+            response = await call_with_retry(call, breaker=breaker, deadline_seconds=600)
+        except Exception as e:
+            logger.error(f"Error evaluating {pending.task_dir}: {type(e).__name__}: {e}")
+            counts["errors"] += 1
+            return None
+        gpt_4v_res = response.choices[0].message.content
+        if pending.cache_key is not None:
+            cache.put(pending.cache_key, gpt_4v_res)
+        return pending.task_dir, gpt_4v_res
+
+    async def save_stage(verdict: tuple[Path, str]) -> None:
+        task_dir, gpt_4v_res = verdict
+        counts[save_evaluation(task_dir, gpt_4v_res)] += 1
+        counts["evaluated"] += 1
+
+    pipeline = Pipeline([
+        Stage("prepare", prepare_stage, concurrency=4, queue_size=concurrency),
+        Stage("judge", judge_stage, concurrency=concurrency, queue_size=concurrency),
+        Stage("save", save_stage, concurrency=1),
+    ])
+    start = time.perf_counter()
+    try:
+        await pipeline.run(find_pending_task_dirs(results_root))
+    finally:
+        await client.close()
+        elapsed = time.perf_counter() - start
+        print(
+            f"Evaluated {counts['evaluated']} tasks in {elapsed:.0f}s "
+            f"({counts['evaluated'] / max(elapsed, 1e-9) * 60:.1f} tasks/min), "
+            f"{counts['errors']} failures, {counts['cached']} cached, "
+            f"verdicts {counts['success']} success / {counts['failed']} failed / {counts['unknown']} unknown"
+        )
+
 def main():
     parser = argparse.ArgumentParser(description="Evaluate single Eko task result")
     parser.add_argument(
         "task_dir",
         type=str,
-        help="Directory containing task result"
+        help="Directory containing task result, or the results root with --batch"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Evaluate every task under task_dir that has no eval_result.json yet"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Concurrent judge requests in batch mode (default: 16)"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=300,
+        help="Judge requests per minute in batch mode, 0 for no limit (default: 300)"
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default="results/judge_cache.sqlite",
+        help="Judge verdict cache file (default: results/judge_cache.sqlite)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the judge, bypassing the verdict cache"
+    )
+    parser.add_argument(
+        "--max-edge",
+        type=int,
+        default=1024,
+        help="Downscale screenshots to this longest edge (default: 1024)"
+    )
+    parser.add_argument(
+        "--preprocess",
+        action="store_true",
+        help="Downscale and re-encode screenshots instead of sending the originals"
     )
     args = parser.parse_args()
 
@@ -130,7 +335,16 @@ def main():
     if not task_dir.exists():
         raise ValueError(f"Task directory {task_dir} does not exist")
 
-    evaluate_task(task_dir)
+    cache = None if args.no_cache else VerdictCache(Path(args.cache))
+    image_config = ImagePreprocessConfig(
+        enabled=args.preprocess, max_edge=args.max_edge
+    )
+    if args.batch:
+        asyncio.run(
+            evaluate_batch(task_dir, cache, image_config, args.concurrency, args.rpm)
+        )
+    else:
+        evaluate_task(task_dir, cache, image_config)
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,34 @@
-import time
-from typing import TYPE_CHECKING
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-from browser_use import AgentHistoryList
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import AzureChatOpenAI
+
+from evaluation.exact_match import score_answer
+from evaluation.image_preprocess import (
+    ImagePreprocessConfig,
+    preprocess_screenshots_b64,
+)
+from evaluation.retry import CircuitBreaker, call_with_retry
+from evaluation.verdict_cache import VerdictCache, judge_cache_key
 
 if TYPE_CHECKING:
+    # Only for annotations: the judge must not pull in the browser stack
+    # or every chat provider
+    from browser_use import AgentHistoryList
+    from langchain_anthropic import ChatAnthropic
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain_openai import AzureChatOpenAI
+
+    from evaluation.reference_match import PreJudge
+    from harness.datasets import Dataset
+    from harness.history_store import CompactHistory
+    from harness.llm_dispatcher import LLMDispatcher
     from run_browser_use import EvalResult
 
+logger = logging.getLogger(__name__)
+
+# Shared by all concurrent judge calls in this process
+judge_breaker = CircuitBreaker()
 
 SYSTEM_PROMPT = """As an evaluator, you will be presented with three primary components to assist you in your role:
 
@@ -34,10 +53,23 @@ Result Response: <answer>
 <num> screenshot at the end: """
 
 
+def judge_model_name(client: object) -> str:
+    """Model identifier used to key cached verdicts."""
+    for attr in ("model_name", "model"):
+        name = getattr(client, attr, None)
+        if isinstance(name, str):
+            return name
+    return type(client).__name__
+
+
 async def auto_eval_by_gpt4o(
-    history: AgentHistoryList,
+    history: "AgentHistoryList | CompactHistory",
     task: str,
-    openai_client: AzureChatOpenAI | ChatAnthropic | ChatGoogleGenerativeAI,
+    openai_client: "AzureChatOpenAI | ChatAnthropic | ChatGoogleGenerativeAI | LLMDispatcher",
+    breaker: Optional[CircuitBreaker] = None,
+    deadline_seconds: Optional[float] = 600,
+    cache: Optional[VerdictCache] = None,
+    image_config: Optional[ImagePreprocessConfig] = None,
 ) -> tuple["EvalResult", str]:
     # print(f"--------------------- {process_dir} ---------------------")
 
@@ -49,48 +81,65 @@ async def auto_eval_by_gpt4o(
         return "failed", ""
 
     screenshots = history.screenshots()[-4:]
-    screenshot_content = [
-        {
-            "type": "image_url",
-            "image_url": {"url": f"data:image/png;base64,{screenshot}"},
-        }
-        for screenshot in screenshots
-    ]
-
-    # Prepare GPT-4V messages
-    user_prompt_tmp = USER_PROMPT.replace("<task>", task)
-    user_prompt_tmp = user_prompt_tmp.replace("<answer>", answer)
-    user_prompt_tmp = user_prompt_tmp.replace("<num>", str(len(screenshots)))
-
-    messages = [
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(
-            content=[
-                {"type": "text", "text": user_prompt_tmp},
-                *screenshot_content,
-                {"type": "text", "text": "Your verdict:\n"},
-            ]
-        ),
-    ]
-
-    while True:
+    image_config = image_config or ImagePreprocessConfig()
+
+    cache_key = None
+    gpt_4v_res = None
+    if cache is not None:
+        cache_key = judge_cache_key(
+            model=judge_model_name(openai_client),
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=USER_PROMPT,
+            task=task,
+            answer=answer,
+            screenshots=screenshots,
+            extra=image_config.cache_tag(),
+        )
+        gpt_4v_res = cache.get(cache_key)
+
+    if gpt_4v_res is None:
+        images, mime, image_stats = await preprocess_screenshots_b64(
+            screenshots, image_config
+        )
+        logger.info(image_stats.summary())
+        screenshot_content = [
+            {
+                "type": "image_url",
+                "image_url": {"url": f"data:{mime};base64,{image}"},
+            }
+            for image in images
+        ]
+
+        # Prepare GPT-4V messages
+        user_prompt_tmp = USER_PROMPT.replace("<task>", task)
+        user_prompt_tmp = user_prompt_tmp.replace("<answer>", answer)
+        user_prompt_tmp = user_prompt_tmp.replace("<num>", str(len(screenshots)))
+
+        messages = [
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(
+                content=[
+                    {"type": "text", "text": user_prompt_tmp},
+                    *screenshot_content,
+                    {"type": "text", "text": "Your verdict:\n"},
+                ]
+            ),
+        ]
+
         try:
-            # print("Calling gpt4v API to get the auto evaluation......")
-            response = await openai_client.ainvoke(messages)
-            # print("API call complete...")
-            break
+            response = await call_with_retry(
+                lambda: openai_client.ainvoke(messages),
+                breaker=breaker or judge_breaker,
+                deadline_seconds=deadline_seconds,
+            )
         except Exception as e:
-            print(e)
-            if type(e).__name__ == "RateLimitError":
-                time.sleep(10)
-            elif type(e).__name__ == "APIError":
-                time.sleep(15)
-            elif type(e).__name__ == "InvalidRequestError":
-                exit(0)
-            else:
-                time.sleep(10)
-
-    gpt_4v_res = str(response.content)
+            # Keep the agent run; the verdict can be redone from its saved history
+            logger.error(f"Judge call failed: {type(e).__name__}: {e}")
+            return "unknown", f"JUDGE ERROR: {type(e).__name__}: {e}"
+
+        gpt_4v_res = str(response.content)
+        if cache_key is not None:
+            cache.put(cache_key, gpt_4v_res)
 
     if gpt_4v_res is None:
         return "unknown", ""
@@ -104,3 +153,40 @@ async def auto_eval_by_gpt4o(
         auto_eval_res = "failed"
 
     return auto_eval_res, gpt_4v_res
+
+
+async def evaluate_run(
+    task: Dict[str, Any],
+    history: "AgentHistoryList | CompactHistory",
+    dataset: "Dataset",
+    dispatcher: "LLMDispatcher",
+    cache: Optional[VerdictCache] = None,
+    image_config: Optional[ImagePreprocessConfig] = None,
+    prejudge: Optional["PreJudge"] = None,
+    wait_for_capacity: bool = False,
+) -> tuple["EvalResult", str]:
+    """Verdict for a finished run, as the runner and rejudge.py both reach it.
+
+    Datasets with exact-match scoring compare the final answer with the
+    expected one and never call the judge. Otherwise a clear-cut answer is
+    decided by `prejudge` and the rest by the judge model, after waiting for
+    an endpoint with budget left if `wait_for_capacity`.
+    """
+    answer = history.final_result() if history.is_done() else None
+    if dataset.scorer == "exact-match":
+        expected = dataset.expected_answer(task)
+        matched = expected is not None and score_answer(answer, expected)
+        return "success" if matched else "failed", f"EXACT MATCH: expected {expected!r}"
+    if prejudge is not None and answer is not None:
+        verdict = prejudge.judge(task["id"], answer)
+        if verdict is not None:
+            return verdict
+    if wait_for_capacity:
+        await dispatcher.wait_for_capacity()
+    return await auto_eval_by_gpt4o(
+        history=history,
+        task=f"{task['ques']} on {task['web']}",
+        openai_client=dispatcher,
+        cache=cache,
+        image_config=image_config,
+    )
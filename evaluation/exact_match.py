@@ -0,0 +1,89 @@
+import re
+import string
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+
+# Agents often end with "FINAL ANSWER: ..." after some reasoning
+_FINAL_ANSWER = re.compile(r"final answer\s*:\s*", re.IGNORECASE)
+_LIST_SEPARATORS = re.compile(r"[,;]")
+_PUNCTUATION = str.maketrans("", "", string.punctuation)
+
+# A normalized expected answer: a number, a list of numbers and strings, or a string
+Normalized = Union[float, Tuple[Union[float, str], ...], str]
+
+
+def extract_final_answer(text: str) -> str:
+    """The part of an agent's answer after its last "FINAL ANSWER:", if any."""
+    parts = _FINAL_ANSWER.split(text)
+    return parts[-1].strip()
+
+
+def _parse_float(text: str) -> Optional[float]:
+    try:
+        return float(text.strip())
+    except ValueError:
+        return None
+
+
+def normalize_number(text: str) -> Optional[float]:
+    """A predicted `text` as a number, ignoring $, % and thousands separators."""
+    for char in "$%,":
+        text = text.replace(char, "")
+    return _parse_float(text)
+
+
+def normalize_text(text: str, remove_punctuation: bool = True) -> str:
+    """Lowercase without whitespace and, by default, without punctuation."""
+    text = "".join(text.split()).lower()
+    return text.translate(_PUNCTUATION) if remove_punctuation else text
+
+
+def _normalize_element(text: str) -> Union[float, str]:
+    number = normalize_number(text)
+    return number if number is not None else normalize_text(text, remove_punctuation=False)
+
+
+def _normalize_expected_element(text: str) -> Union[float, str]:
+    number = _parse_float(text)
+    return number if number is not None else normalize_text(text, remove_punctuation=False)
+
+
+@lru_cache(maxsize=None)
+def normalize_expected(answer: str) -> Normalized:
+    """Parse an expected answer once, however many predictions are scored against it.
+
+    Expected numbers are parsed as they are, so "1,2" is a list of two
+    numbers rather than 12; only predictions have $, % and commas stripped.
+    """
+    number = _parse_float(answer)
+    if number is not None:
+        return number
+    if _LIST_SEPARATORS.search(answer):
+        return tuple(
+            _normalize_expected_element(part) for part in _LIST_SEPARATORS.split(answer)
+        )
+    return normalize_text(answer)
+
+
+def score_answer(prediction: Optional[str], expected: str) -> bool:
+    """GAIA's quasi-exact match: numeric, element-wise for lists, else normalized text."""
+    if prediction is None:
+        return False
+    prediction = extract_final_answer(prediction)
+    target = normalize_expected(expected)
+    if isinstance(target, float):
+        # A trailing period is common in free-text answers ("17.")
+        return normalize_number(prediction.rstrip(".")) == target
+    if isinstance(target, tuple):
+        parts = _LIST_SEPARATORS.split(prediction.rstrip("."))
+        return len(parts) == len(target) and all(
+            _normalize_element(part) == element for part, element in zip(parts, target)
+        )
+    return normalize_text(prediction) == target
+
+
+def score_answers(predictions: Sequence[Optional[str]], expected: Sequence[str]) -> List[bool]:
+    """Score many answers in one pass; every expected answer is parsed once."""
+    if len(predictions) != len(expected):
+        raise ValueError("predictions and expected answers differ in length")
+    return [score_answer(prediction, answer) for prediction, answer in zip(predictions, expected)]
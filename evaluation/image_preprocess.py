@@ -0,0 +1,195 @@
+import asyncio
+import base64
+import io
+import math
+import struct
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Literal, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops
+
+ImageFormat = Literal["jpeg", "webp", "png"]
+
+MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Base64 characters that cover a PNG's signature and IHDR dimensions
+_B64_HEADER_CHARS = 32
+
+# Pillow releases the GIL while decoding/encoding, so threads are enough
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="judge-images")
+
+
+@dataclass(frozen=True)
+class ImagePreprocessConfig:
+    # Off by default: the judge's verdict is based on these images, so
+    # lossy settings are opted into once their verdicts have been checked
+    enabled: bool = False
+    max_edge: int = 1024
+    format: ImageFormat = "jpeg"
+    quality: int = 75
+    # Crop top/bottom bands identical in every frame from all but the first
+    crop_static_bands: bool = True
+
+    def cache_tag(self) -> str:
+        """Stable description for keying cached verdicts."""
+        if not self.enabled:
+            return "raw"
+        return (
+            f"{self.format}:{self.max_edge}:{self.quality}:"
+            f"{int(self.crop_static_bands)}"
+        )
+
+
+@dataclass
+class PreprocessStats:
+    images: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    def add(self, other: "PreprocessStats") -> None:
+        self.images += other.images
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.tokens_in += other.tokens_in
+        self.tokens_out += other.tokens_out
+
+    def summary(self) -> str:
+        return (
+            f"Judge screenshots: {self.images} images, "
+            f"{self.bytes_in / 1024:.0f}KB -> {self.bytes_out / 1024:.0f}KB, "
+            f"~{self.tokens_in} -> {self.tokens_out} image tokens"
+        )
+
+
+# Totals over every judge call in this process
+totals = PreprocessStats()
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """GPT-4o high-detail image token estimate (85 base + 170 per 512px tile)."""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def image_mime(data: bytes) -> str:
+    """MIME type sniffed from the image's magic bytes."""
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
+def _png_size(header: bytes) -> Optional[Tuple[int, int]]:
+    """Width and height from a PNG's IHDR chunk, without decoding the image."""
+    if not header.startswith(_PNG_SIGNATURE) or len(header) < 24:
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def _unprocessed(headers: Sequence[bytes], sizes: Sequence[int]) -> Tuple[str, PreprocessStats]:
+    """MIME type and stats of screenshots sent as they are, from their headers only."""
+    stats = PreprocessStats(images=len(headers), bytes_in=sum(sizes), bytes_out=sum(sizes))
+    for header in headers:
+        dimensions = _png_size(header)
+        if dimensions is not None:
+            stats.tokens_in += estimate_image_tokens(*dimensions)
+    stats.tokens_out = stats.tokens_in
+    mime = image_mime(headers[0]) if headers else MIME_TYPES["png"]
+    return mime, stats
+
+
+def _static_bands(frames: Sequence[Image.Image]) -> Tuple[int, int]:
+    """Heights of the top and bottom bands that are identical in all frames."""
+    first = frames[0]
+    if len(frames) < 2 or any(frame.size != first.size for frame in frames):
+        return 0, 0
+    top, bottom = first.height, 0
+    for frame in frames[1:]:
+        bbox = ImageChops.difference(first.convert("RGB"), frame.convert("RGB")).getbbox()
+        if bbox is None:
+            continue
+        top = min(top, bbox[1])
+        bottom = max(bottom, bbox[3])
+    if top >= bottom:
+        # All frames identical; nothing worth cropping around
+        return 0, 0
+    return top, first.height - bottom
+
+
+def _encode(image: Image.Image, config: ImagePreprocessConfig) -> bytes:
+    image.thumbnail((config.max_edge, config.max_edge), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if config.format == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(
+            buffer, format=config.format.upper(), quality=config.quality
+        )
+    return buffer.getvalue()
+
+
+def preprocess_screenshots(
+    screenshots: Sequence[bytes], config: ImagePreprocessConfig
+) -> Tuple[List[bytes], str, PreprocessStats]:
+    """Downscale, crop and recompress screenshots for the judge.
+
+    Returns the new images, their MIME type and before/after sizes. When
+    preprocessing is off the screenshots are returned without being decoded.
+    """
+    if not config.enabled:
+        mime, stats = _unprocessed(screenshots, [len(data) for data in screenshots])
+        return list(screenshots), mime, stats
+
+    stats = PreprocessStats(images=len(screenshots))
+    frames = [Image.open(io.BytesIO(data)) for data in screenshots]
+    for data, frame in zip(screenshots, frames):
+        stats.bytes_in += len(data)
+        stats.tokens_in += estimate_image_tokens(*frame.size)
+
+    top, bottom = _static_bands(frames) if config.crop_static_bands else (0, 0)
+    output = []
+    for index, frame in enumerate(frames):
+        if index > 0 and (top or bottom):
+            frame = frame.crop((0, top, frame.width, frame.height - bottom))
+        else:
+            frame = frame.copy()
+        encoded = _encode(frame, config)
+        output.append(encoded)
+        stats.bytes_out += len(encoded)
+        stats.tokens_out += estimate_image_tokens(*frame.size)
+    return output, MIME_TYPES[config.format], stats
+
+
+async def preprocess_screenshots_b64(
+    screenshots: Sequence[str],
+    config: ImagePreprocessConfig,
+    executor: Optional[Executor] = None,
+) -> Tuple[List[str], str, PreprocessStats]:
+    """Base64 in and out variant of `preprocess_screenshots`, off the event loop."""
+    if not config.enabled:
+        # Only the headers are decoded, for the MIME type and the stats
+        mime, stats = _unprocessed(
+            [base64.b64decode(screenshot[:_B64_HEADER_CHARS]) for screenshot in screenshots],
+            [len(screenshot) * 3 // 4 - screenshot.count("=", -2) for screenshot in screenshots],
+        )
+        totals.add(stats)
+        return list(screenshots), mime, stats
+
+    def work() -> Tuple[List[str], str, PreprocessStats]:
+        images, mime, stats = preprocess_screenshots(
+            [base64.b64decode(screenshot) for screenshot in screenshots], config
+        )
+        return [base64.b64encode(image).decode() for image in images], mime, stats
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(executor or _executor, work)
+    totals.add(result[2])
+    return result
@@ -0,0 +1,206 @@
+import json
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from run_browser_use import EvalResult
+
+REFERENCE_ANSWERS = Path("data/reference_answer.json")
+
+# Prefix of the judge response recorded for verdicts made without the judge
+PREJUDGE_PREFIX = "PRE-JUDGE"
+
+# Words that carry no content when comparing an answer to the reference
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "there this to was were with".split()
+)
+# References that only describe what an answer should look like ("any 2 of",
+# "e.g.") cannot be matched word for word
+_OPEN_ENDED = re.compile(r"\b(any|e\.g|such as|etc|or|at least|more than|less than)\b|[<>]")
+# An answer that negates or hedges where the reference does not ("there are
+# no trade-in offers") can hold all of its words and still be wrong
+NEGATIONS = frozenset("no not never none cannot cant couldnt unable without".split())
+# Numbers spelled out in an answer ("three papers") that `numbers` misses
+NUMBER_WORDS = frozenset(
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+    "fourteen fifteen sixteen seventeen eighteen nineteen twenty thirty forty fifty "
+    "sixty seventy eighty ninety hundred thousand million billion trillion dozen "
+    "half quarter".split()
+)
+_NUMBER = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?(?:e[-+]?\d+)?")
+# "1/4", but not a piece of a date such as "10/12/2023"
+_FRACTION = re.compile(r"(?<![\d/.])(\d+)\s*/\s*(\d+)(?![\d/.])")
+_WORD = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_NUMERIC_TOKEN = re.compile(r"[0-9.]+")
+
+# A golden answer is accepted when all of its numbers and this share of its
+# content words are in the agent's answer...
+ACCEPT_RECALL = 0.8
+# ...and rejected when it states other numbers, none of the golden ones, no
+# spelled-out number, and at most this share of the words
+REJECT_RECALL = 0.2
+# A golden answer with fewer words and numbers than this ("3") turns up
+# inside many wrong answers, so it is only accepted when the answer states no
+# other number
+MIN_DISTINCTIVE_TOKENS = 2
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold unicode and quotes, and collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"[\"'`‘’“”]", "", text)
+    return " ".join(text.split())
+
+
+def content_tokens(text: str) -> FrozenSet[str]:
+    return frozenset(_WORD.findall(normalize(text))) - STOPWORDS
+
+
+def numbers(text: str) -> List[float]:
+    """Values of the numbers in `text`, including fractions and 1.5e-3 notation."""
+    values = []
+
+    def fraction(match: "re.Match[str]") -> str:
+        if int(match.group(2)):
+            values.append(int(match.group(1)) / int(match.group(2)))
+        return " "
+
+    for match in _NUMBER.findall(_FRACTION.sub(fraction, normalize(text))):
+        try:
+            values.append(float(match.replace(",", "")))
+        except ValueError:
+            continue
+    return values
+
+
+def number_in(value: float, candidates: List[float], tolerance: float = 0.01) -> bool:
+    """Whether `value` is among `candidates` within a relative tolerance."""
+    return any(
+        abs(value - other) <= tolerance * max(abs(value), abs(other)) for other in candidates
+    )
+
+
+def words(tokens: FrozenSet[str]) -> FrozenSet[str]:
+    """Content tokens that are not numbers, which are compared by value instead."""
+    return frozenset(token for token in tokens if not _NUMERIC_TOKEN.fullmatch(token))
+
+
+@dataclass(frozen=True)
+class ReferenceAnswer:
+    task_id: str
+    type: str
+    text: str
+    tokens: FrozenSet[str]
+    numbers: Tuple[float, ...]
+
+    @property
+    def matchable(self) -> bool:
+        """Golden answers that are stated exactly, not described."""
+        return (
+            self.type == "golden"
+            and bool(self.tokens)
+            and not _OPEN_ENDED.search(normalize(self.text))
+        )
+
+
+def load_reference_answers(path: Path = REFERENCE_ANSWERS) -> Dict[str, ReferenceAnswer]:
+    """Reference answers keyed by task id (`Site--N`), normalized once."""
+    with open(path) as f:
+        data = json.load(f)
+    index = {}
+    for site, entry in data.items():
+        for answer in entry["answers"]:
+            task_id = f"{site}--{answer['id']}"
+            index[task_id] = ReferenceAnswer(
+                task_id=task_id,
+                type=answer["type"],
+                text=answer["ans"],
+                tokens=content_tokens(answer["ans"]),
+                numbers=tuple(numbers(answer["ans"])),
+            )
+    return index
+
+
+class PreJudge:
+    """Judges clear-cut answers against the golden reference answers.
+
+    Only tasks with a golden reference are decided here. Numbers are
+    compared by value, so "5.37e-18" matches "1/186313420339200000". An
+    answer that has every number of the reference and most of its words is a
+    success (for a one-word reference, only if it states no other number).
+    One that states other numbers, none of the reference's, no spelled-out
+    number and hardly any of its words is a failure. Anything in between,
+    and every task with only a "possible" answer, goes to the judge model.
+    """
+
+    def __init__(self, references: Dict[str, ReferenceAnswer]) -> None:
+        self.references = references
+        self.verdicts: Counter = Counter()
+
+    @classmethod
+    def load(cls, path: Path = REFERENCE_ANSWERS) -> "PreJudge":
+        return cls(load_reference_answers(path))
+
+    def judge(self, task_id: str, answer: str) -> Optional[Tuple["EvalResult", str]]:
+        """(verdict, reason) for a clear-cut answer, or None to ask the judge."""
+        reference = self.references.get(task_id)
+        if reference is None or not reference.matchable:
+            self.verdicts["deferred"] += 1
+            return None
+        answer_tokens = content_tokens(answer)
+        answer_numbers = numbers(answer)
+        reference_words = words(reference.tokens)
+        # A reference that is only numbers is decided by its numbers alone
+        recall = (
+            len(reference_words & answer_tokens) / len(reference_words)
+            if reference_words
+            else None
+        )
+        found = [number_in(value, answer_numbers) for value in reference.numbers]
+        negated = bool((answer_tokens & NEGATIONS) - reference.tokens)
+        distinctive = len(reference_words) + len(reference.numbers)
+        unambiguous = distinctive >= MIN_DISTINCTIVE_TOKENS or all(
+            number_in(value, list(reference.numbers)) for value in answer_numbers
+        )
+        # "There are three such papers" may be right where the reference says 3
+        conflicting = bool(answer_numbers) and not answer_tokens & NUMBER_WORDS
+
+        if (
+            all(found)
+            and (recall is None or recall >= ACCEPT_RECALL)
+            and not negated
+            and unambiguous
+        ):
+            verdict: "EvalResult" = "success"
+        elif (
+            reference.numbers
+            and conflicting
+            and not any(found)
+            and (recall is None or recall <= REJECT_RECALL)
+        ):
+            verdict = "failed"
+        else:
+            self.verdicts["deferred"] += 1
+            return None
+        self.verdicts[verdict] += 1
+        words_found = (
+            f"{recall:.0%} of the golden answer's words and " if recall is not None else ""
+        )
+        return verdict, (
+            f"{PREJUDGE_PREFIX}: {'SUCCESS' if verdict == 'success' else 'NOT SUCCESS'}, "
+            f"{words_found}{sum(found)}/{len(found)} of its numbers found. "
+            f"Golden answer: {reference.text}"
+        )
+
+    def summary(self) -> str:
+        total = sum(self.verdicts.values())
+        decided = total - self.verdicts["deferred"]
+        return (
+            f"Pre-judge: {decided}/{total} judge calls avoided "
+            f"({self.verdicts['success']} success, {self.verdicts['failed']} failed)"
+        )
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, if it carries one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None and type(error).__name__ == "RateLimitError":
+        status = 429
+    return status
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After hint from a provider error response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    # Whether failures under this policy count towards opening the breaker
+    trips_breaker: bool = True
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 1-based attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+NO_RETRY = RetryPolicy(max_attempts=1, trips_breaker=False)
+
+# Keyed by exception class name so provider SDKs need not be imported here
+DEFAULT_POLICIES: Dict[str, RetryPolicy] = {
+    "RateLimitError": RetryPolicy(max_attempts=8, base_delay=5, max_delay=60),
+    "APITimeoutError": RetryPolicy(max_attempts=4, base_delay=5, max_delay=30),
+    "APIConnectionError": RetryPolicy(max_attempts=4, base_delay=5, max_delay=30),
+    "TimeoutError": RetryPolicy(max_attempts=4, base_delay=5, max_delay=30),
+    "APIError": RetryPolicy(max_attempts=4, base_delay=15, max_delay=60),
+    "InternalServerError": RetryPolicy(max_attempts=4, base_delay=15, max_delay=60),
+    "BadRequestError": NO_RETRY,
+    "InvalidRequestError": NO_RETRY,
+    "AuthenticationError": NO_RETRY,
+    "PermissionDeniedError": NO_RETRY,
+}
+STATUS_POLICIES: Dict[int, RetryPolicy] = {
+    429: DEFAULT_POLICIES["RateLimitError"],
+    500: DEFAULT_POLICIES["APIError"],
+    502: DEFAULT_POLICIES["APIError"],
+    503: DEFAULT_POLICIES["APIError"],
+    504: DEFAULT_POLICIES["APIError"],
+}
+FALLBACK_POLICY = RetryPolicy(max_attempts=3, base_delay=10, max_delay=30)
+
+
+def policy_for(
+    error: BaseException, policies: Optional[Dict[str, RetryPolicy]] = None
+) -> RetryPolicy:
+    policies = DEFAULT_POLICIES if policies is None else policies
+    name = type(error).__name__
+    if name in policies:
+        return policies[name]
+    status = error_status(error)
+    if status in STATUS_POLICIES:
+        return STATUS_POLICIES[status]
+    if status is not None and 400 <= status < 500:
+        return NO_RETRY
+    return FALLBACK_POLICY
+
+
+class CircuitOpenError(Exception):
+    """Raised when the breaker stays open past the caller's deadline."""
+
+
+class CircuitBreaker:
+    """Shared breaker that stops all callers hammering a failing API.
+
+    Opens after `failure_threshold` consecutive failures. While open, callers
+    wait (without blocking the event loop) until `reset_timeout` has passed,
+    then a single probe call is let through; its outcome closes or re-opens
+    the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def wait_time(self) -> float:
+        """Seconds a caller must wait before it may call, 0 if it may call now."""
+        state = self.state
+        if state == "closed":
+            return 0.0
+        if state == "half-open" and not self._probe_in_flight:
+            return 0.0
+        if state == "half-open":
+            return min(self.reset_timeout, 1.0)
+        return self.opened_at + self.reset_timeout - self.clock()
+
+    def on_call(self) -> None:
+        if self.state == "half-open":
+            self._probe_in_flight = True
+
+    def on_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def on_ignored(self) -> None:
+        """An error that says nothing about the API's health (400, 401, 403).
+
+        Leaves the failure count and state alone; only frees the probe slot
+        so another caller may probe a half-open breaker.
+        """
+        self._probe_in_flight = False
+
+    def on_failure(self) -> None:
+        self.consecutive_failures += 1
+        half_open = self.state == "half-open"
+        self._probe_in_flight = False
+        if half_open or self.consecutive_failures >= self.failure_threshold:
+            if self.state == "closed":
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit opened after {self.consecutive_failures} consecutive failures"
+                )
+            self.opened_at = self.clock()
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[T]],
+    breaker: Optional[CircuitBreaker] = None,
+    policies: Optional[Dict[str, RetryPolicy]] = None,
+    deadline_seconds: Optional[float] = None,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> T:
+    """Await `call()` with per-error-class backoff, honoring Retry-After.
+
+    All waiting is done with `sleep` (asyncio.sleep by default), so other
+    tasks keep running while one call backs off. Gives up with the last error
+    once its policy's attempts or the overall deadline are exhausted.
+    """
+    deadline = clock() + deadline_seconds if deadline_seconds is not None else None
+    attempt = 0
+    while True:
+        if breaker is not None:
+            wait = breaker.wait_time()
+            while wait > 0:
+                if deadline is not None and clock() + wait > deadline:
+                    raise CircuitOpenError(f"Circuit open, retry in {wait:.0f}s")
+                await sleep(wait)
+                wait = breaker.wait_time()
+            breaker.on_call()
+
+        attempt += 1
+        try:
+            result = await call()
+        except Exception as e:
+            policy = policy_for(e, policies)
+            if breaker is not None:
+                if policy.trips_breaker:
+                    breaker.on_failure()
+                else:
+                    breaker.on_ignored()
+            if attempt >= policy.max_attempts:
+                raise
+            delay = max(retry_after_seconds(e) or 0.0, policy.delay(attempt))
+            if deadline is not None and clock() + delay > deadline:
+                raise
+            logger.warning(
+                f"{type(e).__name__} on attempt {attempt}/{policy.max_attempts}, "
+                f"retrying in {delay:.1f}s"
+            )
+            await sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.on_success()
+        return result
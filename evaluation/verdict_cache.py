@@ -0,0 +1,108 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+DEFAULT_CACHE_PATH = Path("results/judge_cache.sqlite")
+
+
+def judge_cache_key(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    task: str,
+    answer: str,
+    screenshots: Iterable[Union[str, bytes]],
+    extra: str = "",
+) -> str:
+    """Content hash of everything that determines a judge verdict.
+
+    `extra` covers anything else that changes what the judge sees, such as
+    the screenshot preprocessing settings.
+    """
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, user_prompt, task, answer, extra):
+        encoded = part.encode()
+        # Length-prefix every field so adjacent fields cannot run together
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    for screenshot in screenshots:
+        encoded = screenshot.encode() if isinstance(screenshot, str) else screenshot
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class VerdictCache:
+    """Persistent judge response cache with LRU eviction.
+
+    Stores the raw judge response so each caller keeps its own verdict
+    parsing. Uses only the standard library so both the browser-use runner
+    and the Eko evaluator can share it.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_entries: int = 100_000) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts (last_used)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT response FROM verdicts WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE verdicts SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO verdicts (key, response, created, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (key, response, now, now),
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM verdicts WHERE key IN "
+                "(SELECT key FROM verdicts ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"Judge cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+            f"{self.evictions} evictions, {len(self)} entries"
+        )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,58 @@
+import argparse
+import time
+from pathlib import Path
+
+from harness.results_store import (
+    DEFAULT_STORE,
+    ResultsStore,
+    format_per_site,
+    ingest_run,
+    load_impossible_tasks,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Consolidate the task results of runs into a Parquet store and "
+        "compare them per site"
+    )
+    parser.add_argument(
+        "run_dirs",
+        nargs="*",
+        type=Path,
+        help="Run directories to (re)ingest, e.g. results/examples-browser-use",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=DEFAULT_STORE,
+        help=f"Parquet store directory (default: {DEFAULT_STORE})",
+    )
+    parser.add_argument("--runs", nargs="+", help="Only compare these runs")
+    parser.add_argument("--site", nargs="+", help="Only compare these sites")
+    parser.add_argument(
+        "--include-impossible",
+        action="store_true",
+        help="Count the tasks in data/WebVoyagerImpossibleTasks.json",
+    )
+    args = parser.parse_args()
+
+    impossible = load_impossible_tasks()
+    for run_dir in args.run_dirs:
+        start = time.perf_counter()
+        count = ingest_run(run_dir, args.store, impossible=impossible)
+        print(f"Ingested {count} tasks of {run_dir.name} in {time.perf_counter() - start:.2f}s")
+    if not args.store.exists():
+        print(f"No store at {args.store}; pass run directories to ingest first")
+        return
+
+    start = time.perf_counter()
+    store = ResultsStore(args.store)
+    table = store.per_site(args.runs, args.site, include_impossible=args.include_impossible)
+    elapsed = time.perf_counter() - start
+    print(format_per_site(table))
+    print(f"{len(store.runs())} runs in the store, queried in {elapsed * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, Tuple
+
+from harness.results_journal import ResultsJournal
+
+if TYPE_CHECKING:
+    from harness.llm_dispatcher import LLMDispatcher
+
+try:
+    import psutil
+except ImportError:  # Memory and CPU signals are skipped without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """Semaphore whose number of permits can change while it is in use.
+
+    Lowering the limit never interrupts holders; new acquirers just wait
+    until enough permits have been released.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_use < self.limit)
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    async def release(self) -> None:
+        async with self._changed:
+            self.in_use -= 1
+            self._changed.notify_all()
+
+    async def set_limit(self, limit: int) -> None:
+        async with self._changed:
+            self.limit = limit
+            self._changed.notify_all()
+
+
+@dataclass
+class HealthSample:
+    limit: int
+    peak_in_use: int
+    completed: int
+    errors: int
+    throttles: int
+    llm_p90_seconds: Optional[float]
+    memory_percent: Optional[float]
+    cpu_percent: Optional[float]
+
+
+class AIMDController:
+    """Tunes a ConcurrencyLimiter between `floor` and `ceiling`.
+
+    Every `interval` seconds it looks at what happened since the last look.
+    Rate limits, memory pressure or a high task error rate cut the limit by
+    `decrease`; rising LLM latency or a busy CPU hold it; otherwise, if the
+    limit was actually reached, it grows by `increase`. Each decision is
+    appended to `log_path`.
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        floor: int,
+        ceiling: int,
+        dispatcher: Optional["LLMDispatcher"] = None,
+        log_path: Optional[Path] = None,
+        interval: float = 30.0,
+        increase: int = 1,
+        decrease: float = 0.5,
+        max_error_rate: float = 0.2,
+        max_memory_percent: float = 85.0,
+        max_cpu_percent: float = 90.0,
+        latency_factor: float = 2.0,
+        on_decrease: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> None:
+        if not 1 <= floor <= ceiling:
+            raise ValueError(f"Need 1 <= floor <= ceiling, got {floor} and {ceiling}")
+        self.limiter = limiter
+        self.floor = floor
+        self.ceiling = ceiling
+        self.dispatcher = dispatcher
+        self.interval = interval
+        self.increase = increase
+        self.decrease = decrease
+        self.max_error_rate = max_error_rate
+        self.max_memory_percent = max_memory_percent
+        self.max_cpu_percent = max_cpu_percent
+        self.latency_factor = latency_factor
+        self.on_decrease = on_decrease
+        self.baseline_latency: Optional[float] = None
+        self.decreases = 0
+        self.lowest = self.highest = limiter.limit
+        self._completed = 0
+        self._errors = 0
+        self._throttles_seen = self._throttles()
+        self._log = ResultsJournal(log_path) if log_path is not None else None
+        if psutil is not None:
+            psutil.cpu_percent()  # Prime the CPU counter
+
+    def record_outcome(self, ok: bool) -> None:
+        if ok:
+            self._completed += 1
+        else:
+            self._errors += 1
+
+    def _throttles(self) -> int:
+        if self.dispatcher is None:
+            return 0
+        return sum(endpoint.failures for endpoint in self.dispatcher.endpoints)
+
+    def sample(self) -> HealthSample:
+        """Signals since the previous sample; resets the interval counters."""
+        throttles = self._throttles()
+        sample = HealthSample(
+            limit=self.limiter.limit,
+            peak_in_use=self.limiter.peak_in_use,
+            completed=self._completed,
+            errors=self._errors,
+            throttles=throttles - self._throttles_seen,
+            llm_p90_seconds=(
+                self.dispatcher.latency_percentile(90) if self.dispatcher is not None else None
+            ),
+            memory_percent=psutil.virtual_memory().percent if psutil is not None else None,
+            cpu_percent=psutil.cpu_percent() if psutil is not None else None,
+        )
+        self._throttles_seen = throttles
+        self._completed = self._errors = 0
+        self.limiter.peak_in_use = self.limiter.in_use
+        return sample
+
+    def decide(self, sample: HealthSample) -> Tuple[int, str]:
+        """New limit and the reason for it."""
+        limit = sample.limit
+        decreased = max(self.floor, int(limit * self.decrease))
+        finished = sample.completed + sample.errors
+        if sample.throttles:
+            return decreased, f"{sample.throttles} rate limits"
+        if sample.memory_percent is not None and sample.memory_percent > self.max_memory_percent:
+            return decreased, f"memory at {sample.memory_percent:.0f}%"
+        if finished and sample.errors / finished > self.max_error_rate:
+            return decreased, f"{sample.errors}/{finished} tasks errored"
+        if sample.llm_p90_seconds is not None:
+            baseline = self.baseline_latency or sample.llm_p90_seconds
+            # The baseline follows drops at once and rises 5% per interval,
+            # so one lucky sample does not pin it down forever
+            self.baseline_latency = min(sample.llm_p90_seconds, baseline * 1.05)
+            if sample.llm_p90_seconds > baseline * self.latency_factor:
+                return limit, (
+                    f"LLM p90 {sample.llm_p90_seconds:.1f}s vs baseline {baseline:.1f}s"
+                )
+        if sample.cpu_percent is not None and sample.cpu_percent > self.max_cpu_percent:
+            return limit, f"CPU at {sample.cpu_percent:.0f}%"
+        if sample.peak_in_use < limit:
+            return limit, "limit not reached"
+        return min(self.ceiling, limit + self.increase), "healthy"
+
+    async def step(self) -> int:
+        sample = self.sample()
+        limit, reason = self.decide(sample)
+        if limit != sample.limit:
+            logger.info(f"Concurrency {sample.limit} -> {limit}: {reason}")
+            await self.limiter.set_limit(limit)
+            self.lowest = min(self.lowest, limit)
+            self.highest = max(self.highest, limit)
+            if limit < sample.limit:
+                self.decreases += 1
+                if self.on_decrease is not None:
+                    await self.on_decrease(limit)
+        if self._log is not None:
+            self._log.append(
+                {"time": time.time(), **asdict(sample), "new_limit": limit, "reason": reason}
+            )
+        return limit
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.step()
+                except Exception as e:
+                    logger.error(f"Concurrency controller error: {e}")
+        finally:
+            if self._log is not None:
+                self._log.close()
+
+    def summary(self) -> str:
+        return (
+            f"Concurrency: {self.limiter.limit} now, ranged {self.lowest}-{self.highest} "
+            f"within [{self.floor}, {self.ceiling}], {self.decreases} decreases"
+        )
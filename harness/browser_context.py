@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from browser_use.browser.context import BrowserContext
+
+from harness.network_filter import NetworkFilter, NetworkStats
+
+logger = logging.getLogger(__name__)
+
+_RESTORE_LOCAL_STORAGE = """(() => {
+  const origins = %s;
+  const items = origins[location.origin];
+  if (!items) return;
+  try {
+    for (const [name, value] of items) {
+      if (localStorage.getItem(name) === null) localStorage.setItem(name, value);
+    }
+  } catch (e) {}
+})();"""
+
+
+class HarnessBrowserContext(BrowserContext):
+    """browser_use context that can start from and capture a storage state.
+
+    `storage_state` (a Playwright storage state file: cookies and
+    localStorage per origin) is applied to the fresh context before the
+    first page loads. `capture_state_to` receives the context's storage
+    state when it is closed. `network_filter` routes the context's requests;
+    its counts for this context end up in `network_stats`.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        storage_state: Optional[Path] = None,
+        capture_state_to: Optional[Path] = None,
+        network_filter: Optional[NetworkFilter] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.storage_state = storage_state
+        self.capture_state_to = capture_state_to
+        self.network_filter = network_filter
+        self.network_stats: Optional[NetworkStats] = None
+
+    async def _create_context(self, browser: Any) -> Any:
+        context = await super()._create_context(browser)
+        if self.network_filter is not None:
+            self.network_stats = await self.network_filter.install(context)
+        if self.storage_state is not None:
+            try:
+                with open(self.storage_state) as f:
+                    state = json.load(f)
+                if state.get("cookies"):
+                    await context.add_cookies(state["cookies"])
+                origins = {
+                    origin["origin"]: [
+                        (item["name"], item["value"]) for item in origin.get("localStorage", [])
+                    ]
+                    for origin in state.get("origins", [])
+                }
+                if origins:
+                    await context.add_init_script(_RESTORE_LOCAL_STORAGE % json.dumps(origins))
+            except Exception as e:
+                logger.warning(f"Could not apply storage state {self.storage_state}: {e}")
+        return context
+
+    async def close(self) -> None:
+        session = getattr(self, "session", None)
+        if self.capture_state_to is not None and session is not None:
+            try:
+                state = await session.context.storage_state()
+                tmp_path = self.capture_state_to.with_name(f".{self.capture_state_to.name}.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.capture_state_to)
+            except Exception as e:
+                logger.warning(f"Could not capture storage state: {e}")
+        await super().close()
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from browser_use import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+from harness.browser_context import HarnessBrowserContext
+from harness.network_filter import NetworkFilter
+
+try:
+    import psutil
+except ImportError:  # RSS-based recycling is skipped without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    launches: int = 0
+    contexts_served: int = 0
+    recycles: int = 0
+    health_failures: int = 0
+    launch_seconds: List[float] = field(default_factory=list)
+
+    def avg_launch_seconds(self) -> float:
+        if not self.launch_seconds:
+            return 0.0
+        return sum(self.launch_seconds) / len(self.launch_seconds)
+
+    def launch_seconds_saved(self) -> float:
+        """Launch time saved versus launching one browser per task."""
+        return max(self.contexts_served - self.launches, 0) * self.avg_launch_seconds()
+
+    def summary(self) -> str:
+        return (
+            f"Browser pool: {self.launches} launches for {self.contexts_served} tasks, "
+            f"{self.recycles} recycles, {self.health_failures} health failures, "
+            f"avg launch {self.avg_launch_seconds():.2f}s, "
+            f"~{self.launch_seconds_saved():.0f}s of launch time saved"
+        )
+
+
+@dataclass
+class PooledBrowser:
+    slot: int
+    browser: Optional[Browser] = None
+    tasks_served: int = 0
+
+
+class BrowserPool:
+    """Long-lived headless browsers handing out a fresh context per task.
+
+    Each browser serves one task at a time. A browser is relaunched when it
+    fails its health check, after `max_tasks_per_browser` tasks, or when its
+    Chromium processes exceed `max_rss_mb`. With a `network_filter` every
+    context routes its requests through it.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        browser_config: BrowserConfig,
+        context_config: BrowserContextConfig,
+        max_tasks_per_browser: int = 50,
+        max_rss_mb: Optional[int] = None,
+        network_filter: Optional[NetworkFilter] = None,
+    ) -> None:
+        self.size = size
+        self.browser_config = browser_config
+        self.context_config = context_config
+        self.max_tasks_per_browser = max_tasks_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.network_filter = network_filter
+        self.stats = PoolStats()
+        self._slots = [PooledBrowser(slot=slot) for slot in range(size)]
+        # Most recently used first, so a pool larger than the load keeps
+        # reusing the same warm browsers instead of launching the rest
+        self._idle: asyncio.LifoQueue[PooledBrowser] = asyncio.LifoQueue()
+        for pooled in self._slots:
+            self._idle.put_nowait(pooled)
+
+    async def _launch(self, pooled: PooledBrowser) -> None:
+        start = time.perf_counter()
+        browser = Browser(config=self.browser_config)
+        await browser.get_playwright_browser()
+        self.stats.launch_seconds.append(time.perf_counter() - start)
+        self.stats.launches += 1
+        pooled.browser = browser
+        pooled.tasks_served = 0
+        logger.info(f"Launched browser in slot {pooled.slot}")
+
+    async def _close_browser(self, pooled: PooledBrowser) -> None:
+        if pooled.browser is None:
+            return
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.error(f"Error closing browser in slot {pooled.slot}: {e}")
+        pooled.browser = None
+
+    def _is_healthy(self, pooled: PooledBrowser) -> bool:
+        playwright_browser = pooled.browser.playwright_browser if pooled.browser else None
+        return playwright_browser is not None and playwright_browser.is_connected()
+
+    async def _rss_mb(self, pooled: PooledBrowser) -> Optional[float]:
+        """Resident memory of all Chromium processes belonging to this browser."""
+        if psutil is None or pooled.browser is None:
+            return None
+        try:
+            cdp = await pooled.browser.playwright_browser.new_browser_cdp_session()
+            info = await cdp.send("SystemInfo.getProcessInfo")
+            await cdp.detach()
+        except Exception as e:
+            logger.debug(f"Could not read process info for slot {pooled.slot}: {e}")
+            return None
+        rss = 0
+        for process in info.get("processInfo", []):
+            try:
+                rss += psutil.Process(process["id"]).memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return rss / (1024 * 1024)
+
+    async def _needs_recycle(self, pooled: PooledBrowser) -> bool:
+        if pooled.tasks_served >= self.max_tasks_per_browser:
+            return True
+        if self.max_rss_mb:
+            rss_mb = await self._rss_mb(pooled)
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                logger.info(f"Browser in slot {pooled.slot} at {rss_mb:.0f}MB RSS")
+                return True
+        return False
+
+    async def _ensure_ready(self, pooled: PooledBrowser) -> None:
+        if pooled.browser is not None and not self._is_healthy(pooled):
+            self.stats.health_failures += 1
+            await self._close_browser(pooled)
+        elif pooled.browser is not None and await self._needs_recycle(pooled):
+            self.stats.recycles += 1
+            await self._close_browser(pooled)
+        if pooled.browser is None:
+            await self._launch(pooled)
+
+    @asynccontextmanager
+    async def context(
+        self,
+        storage_state: Optional[Path] = None,
+        capture_state_to: Optional[Path] = None,
+    ) -> AsyncIterator[BrowserContext]:
+        """Borrow a browser and yield a fresh isolated context on it.
+
+        The context is closed exactly once on exit and the browser goes back
+        to the pool. See HarnessBrowserContext for the storage state options.
+        """
+        pooled = await self._idle.get()
+        try:
+            await self._ensure_ready(pooled)
+            browser_context = HarnessBrowserContext(
+                browser=pooled.browser,
+                config=self.context_config,
+                storage_state=storage_state,
+                capture_state_to=capture_state_to,
+                network_filter=self.network_filter,
+            )
+            self.stats.contexts_served += 1
+            pooled.tasks_served += 1
+            try:
+                yield browser_context
+            finally:
+                try:
+                    await browser_context.close()
+                except Exception as e:
+                    logger.error(f"Error closing context in slot {pooled.slot}: {e}")
+        finally:
+            self._idle.put_nowait(pooled)
+
+    def running(self) -> int:
+        return sum(1 for pooled in self._slots if pooled.browser is not None)
+
+    async def close_idle(self, keep: int) -> int:
+        """Close least recently used idle browsers until at most `keep` run."""
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+        closed = 0
+        try:
+            for pooled in reversed(idle):
+                if self.running() <= keep:
+                    break
+                if pooled.browser is not None:
+                    await self._close_browser(pooled)
+                    closed += 1
+        finally:
+            for pooled in reversed(idle):
+                self._idle.put_nowait(pooled)
+        if closed:
+            logger.info(f"Closed {closed} idle browsers, {self.running()} running")
+        return closed
+
+    async def close(self) -> None:
+        for pooled in self._slots:
+            await self._close_browser(pooled)
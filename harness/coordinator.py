@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from harness.task_queue import TaskQueue
+
+logger = logging.getLogger(__name__)
+
+
+class CoordinatorServer(ThreadingHTTPServer):
+    """HTTP front of a TaskQueue that workers on any host pull from.
+
+    `on_result(task_id, result)` and `on_error(task_id, error)` are called at
+    most once per task, under a lock, so the caller can do its accounting
+    there without further synchronisation.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple,
+        queue: TaskQueue,
+        on_result: Callable[[str, Dict[str, Any]], None],
+        on_error: Callable[[str, str], None],
+        lease_seconds: float = 300,
+        max_attempts: int = 3,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.queue = queue
+        self.on_result = on_result
+        self.on_error = on_error
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.accounting_lock = threading.Lock()
+        self.finished = threading.Event()
+        if queue.remaining() == 0:
+            self.finished.set()
+
+    def handle_call(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        if path == "/lease":
+            leased = self.queue.lease(body["worker"], self.lease_seconds)
+            if leased is None:
+                return {"task": None, "finished": self.queue.remaining() == 0}
+            task_id, task, token = leased
+            logger.info(f"Leased {task_id} to {body['worker']}")
+            return {"task": task, "token": token, "lease_seconds": self.lease_seconds}
+        if path == "/heartbeat":
+            renewed = self.queue.heartbeat(body["task_id"], body["token"], self.lease_seconds)
+            return {"renewed": renewed}
+        if path == "/complete":
+            with self.accounting_lock:
+                accepted = self.queue.can_complete(body["task_id"], body["token"])
+                if accepted:
+                    # Record first, then close the task: a crash in between
+                    # leaves the result recorded and the task re-leasable
+                    self.on_result(body["task_id"], body["result"])
+                    self.queue.mark_done([body["task_id"]])
+                else:
+                    logger.info(f"Ignoring duplicate result for {body['task_id']}")
+            self._check_finished()
+            return {"accepted": accepted}
+        if path == "/fail":
+            with self.accounting_lock:
+                state = self.queue.fail(
+                    body["task_id"], body["token"], body["error"], self.max_attempts
+                )
+                if state == "errored":
+                    self.on_error(body["task_id"], body["error"])
+            self._check_finished()
+            return {"state": state}
+        raise KeyError(path)
+
+    def _check_finished(self) -> None:
+        if self.queue.remaining() == 0:
+            self.finished.set()
+
+    def serve_until_finished(self, linger_seconds: float = 30.0) -> None:
+        """Serve requests until every task is done or has given up.
+
+        Keeps answering for `linger_seconds` afterwards so workers still
+        finishing stolen tasks or polling learn that the run is over.
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self.finished.wait()
+            time.sleep(linger_seconds)
+        finally:
+            self.shutdown()
+            thread.join()
+            self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: CoordinatorServer
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            response, status = self.server.handle_call(self.path, body), 200
+        except KeyError as e:
+            response, status = {"error": f"Bad request: {e}"}, 400
+        except Exception as e:
+            logger.exception(f"Coordinator error on {self.path}")
+            response, status = {"error": str(e)}, 500
+        payload = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+
+@dataclass
+class Lease:
+    task: Dict[str, Any]
+    token: str
+    lease_seconds: float
+
+
+class CoordinatorClient:
+    """Async worker-side client; HTTP calls run in a thread."""
+
+    def __init__(self, url: str, worker: str, timeout: float = 30) -> None:
+        self.url = url.rstrip("/")
+        self.worker = worker
+        self.timeout = timeout
+        self.finished = False
+        self._leases: Dict[str, Lease] = {}
+
+    def _post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    async def _call(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._post, path, body)
+
+    async def lease(self) -> Optional[Lease]:
+        response = await self._call("/lease", {"worker": self.worker})
+        if response["task"] is None:
+            self.finished = response["finished"]
+            return None
+        lease = Lease(response["task"], response["token"], response["lease_seconds"])
+        self._leases[lease.task["id"]] = lease
+        return lease
+
+    async def complete(self, task_id: str, result: Dict[str, Any]) -> bool:
+        lease = self._leases.pop(task_id)
+        response = await self._call(
+            "/complete", {"task_id": task_id, "token": lease.token, "result": result}
+        )
+        return response["accepted"]
+
+    async def fail(self, task_id: str, error: str) -> str:
+        lease = self._leases.pop(task_id)
+        response = await self._call(
+            "/fail", {"task_id": task_id, "token": lease.token, "error": error}
+        )
+        return response["state"]
+
+    async def heartbeat_forever(self, interval: float) -> None:
+        """Renew every lease this worker holds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            for task_id, lease in list(self._leases.items()):
+                try:
+                    response = await self._call(
+                        "/heartbeat", {"task_id": task_id, "token": lease.token}
+                    )
+                    if not response["renewed"]:
+                        logger.warning(f"Lease on {task_id} expired; finishing it anyway")
+                except Exception as e:
+                    logger.warning(f"Heartbeat for {task_id} failed: {e}")
@@ -0,0 +1,93 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Literal, Optional, Set
+
+# "judge" asks the judge model about the final answer and screenshots;
+# "exact-match" compares the final answer with the dataset's own answer
+Scorer = Literal["judge", "exact-match"]
+
+GAIA_ANSWER_FIELD = "Final answer"
+
+# GAIA answers are scored by exact match, so the agent is told what shape
+# the answer must have, as in the GAIA paper's prompt
+GAIA_ANSWER_FORMAT = (
+    "Finish with only the final answer: a number, as few words as possible, "
+    "or a comma-separated list of numbers and/or strings. Write numbers in "
+    "digits, without units or thousands separators unless asked for."
+)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A task file, the tasks to leave out, and how answers are scored."""
+
+    name: str
+    path: Path
+    scorer: Scorer = "judge"
+    exclude_file: Optional[Path] = None
+    # Task field holding the expected answer, for exact-match scoring
+    answer_field: Optional[str] = None
+    answer_format: str = ""
+
+    @property
+    def results_dir(self) -> Path:
+        if self.name == "webvoyager":
+            return Path("results/examples-browser-use")
+        return Path(f"results/{self.name}-browser-use")
+
+    def exclude_ids(self) -> Set[str]:
+        if self.exclude_file is None:
+            return set()
+        with open(self.exclude_file) as f:
+            return set(json.load(f))
+
+    def prompt(self, task: Dict[str, Any]) -> str:
+        """The task as given to the agent."""
+        prompt = f"{task['ques']} on {task['web']}"
+        return f"{prompt}\n\n{self.answer_format}" if self.answer_format else prompt
+
+    def expected_answer(self, task: Dict[str, Any]) -> Optional[str]:
+        if self.answer_field is None or task.get(self.answer_field) is None:
+            return None
+        return str(task[self.answer_field])
+
+
+DATASETS: Dict[str, Dataset] = {
+    "webvoyager": Dataset(
+        name="webvoyager",
+        path=Path("data/WebVoyager_data.jsonl"),
+        exclude_file=Path("data/WebVoyagerImpossibleTasks.json"),
+    ),
+    "gaia": Dataset(
+        name="gaia",
+        path=Path("data/GAIA_web.jsonl"),
+        scorer="exact-match",
+        answer_field=GAIA_ANSWER_FIELD,
+        answer_format=GAIA_ANSWER_FORMAT,
+    ),
+}
+
+
+def resolve_dataset(spec: str) -> Dataset:
+    """A built-in dataset by name, or a JSONL task file.
+
+    Task files whose records carry a GAIA-style "Final answer" are scored by
+    exact match, others by the judge.
+    """
+    if spec in DATASETS:
+        return DATASETS[spec]
+    path = Path(spec)
+    if not path.is_file():
+        raise ValueError(f"Unknown dataset {spec!r}: not one of {sorted(DATASETS)} or a file")
+    with open(path) as f:
+        first = next((json.loads(line) for line in f if line.strip()), {})
+    if GAIA_ANSWER_FIELD in first:
+        return Dataset(
+            name=path.stem,
+            path=path,
+            scorer="exact-match",
+            answer_field=GAIA_ANSWER_FIELD,
+            answer_format=GAIA_ANSWER_FORMAT,
+        )
+    return Dataset(name=path.stem, path=path)
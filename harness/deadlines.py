@@ -0,0 +1,39 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class TaskTimeout(Exception):
+    """A task ran past its wall-clock deadline or one of its steps did."""
+
+
+async def with_deadline(awaitable: Awaitable[T], seconds: Optional[float], what: str) -> T:
+    """Await with a time limit, cancelling it and raising TaskTimeout when it runs out."""
+    if not seconds:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, seconds)
+    except asyncio.TimeoutError:
+        raise TaskTimeout(f"{what} exceeded {seconds:.0f}s") from None
+
+
+def limit_step_time(agent: Any, seconds: Optional[float]) -> None:
+    """Cancel a browser_use agent step that runs longer than `seconds`.
+
+    The TaskTimeout escapes `agent.run`, which ends the task; a step stuck on
+    a hanging page or an unresponsive LLM region does not recover by itself.
+    """
+    if not seconds:
+        return
+    step = agent.step
+    steps_started = 0
+
+    @functools.wraps(step)
+    async def limited_step(*args: Any, **kwargs: Any) -> Any:
+        nonlocal steps_started
+        steps_started += 1
+        return await with_deadline(step(*args, **kwargs), seconds, f"step {steps_started}")
+
+    agent.step = limited_step
@@ -0,0 +1,136 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from langchain_core.messages import AIMessage
+
+
+@dataclass
+class FakeResponse:
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class FakeStatusError(Exception):
+    """Provider-style error carrying an HTTP status and response headers."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"Fake HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = FakeResponse(status_code=status_code, headers=headers)
+
+
+class FakeRateLimitError(FakeStatusError):
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__(429, retry_after)
+
+
+ScriptItem = Union[str, BaseException]
+
+
+class ScriptedChatModel:
+    """Local stand-in for a chat model: plays back a script of replies.
+
+    Each `ainvoke` pops the next item; strings are returned as AIMessages and
+    exceptions are raised, e.g. `[FakeRateLimitError(2), "SUCCESS"]`. The
+    last item repeats once the script is exhausted.
+    """
+
+    def __init__(self, script: List[ScriptItem], latency: float = 0.0) -> None:
+        if not script:
+            raise ValueError("ScriptedChatModel needs a non-empty script")
+        self.script = list(script)
+        self.latency = latency
+        self.calls = 0
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        self.calls += 1
+        item = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if isinstance(item, BaseException):
+            raise item
+        return AIMessage(content=item)
+
+
+def _message_text(messages: Any) -> str:
+    parts = []
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(
+                item.get("text", "") for item in content if isinstance(item, dict)
+            )
+    return "\n".join(parts)
+
+
+class _StructuredScript:
+    def __init__(self, model: "ScriptedAgentModel", schema: Any, include_raw: bool) -> None:
+        self.model = model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def _parse(self, messages: Any) -> Any:
+        fields = self.schema.model_fields
+        if "is_valid" in fields:
+            # The agent's output validation
+            return self.schema(is_valid=True, reason="")
+        if self.model.actions is None:
+            self.model.actions = self.model.plan(_message_text(messages))
+        step = min(self.model.steps, len(self.model.actions) - 1)
+        self.model.steps += 1
+        brain = fields["current_state"].annotation
+        return self.schema.model_validate(
+            {
+                "current_state": {name: "scripted" for name in brain.model_fields},
+                "action": [self.model.actions[step]],
+            }
+        )
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        self.model.calls += 1
+        if self.model.latency:
+            await asyncio.sleep(self.model.latency)
+        parsed = self._parse(messages)
+        if self.include_raw:
+            return {"raw": AIMessage(content=""), "parsed": parsed, "parsing_error": None}
+        return parsed
+
+
+class ScriptedAgentModel:
+    """Local stand-in that drives a browser_use agent without an LLM.
+
+    `plan(prompt_text)` is called on the first step with the text of the
+    agent's messages and returns its actions, one per step, e.g.
+    `[{"go_to_url": {"url": ...}}, {"done": {"text": "..."}}]`. Plain
+    `ainvoke` calls, as made by the judge, answer `verdict`.
+    """
+
+    model_name = "scripted-agent"
+
+    def __init__(
+        self,
+        plan: Callable[[str], List[Dict[str, Any]]],
+        verdict: str = "SUCCESS",
+        latency: float = 0.0,
+    ) -> None:
+        self.plan = plan
+        self.verdict = verdict
+        self.latency = latency
+        self.actions: Optional[List[Dict[str, Any]]] = None
+        self.steps = 0
+        self.calls = 0
+
+    def with_structured_output(
+        self, schema: Any, include_raw: bool = False, **kwargs: Any
+    ) -> _StructuredScript:
+        return _StructuredScript(self, schema, include_raw)
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return AIMessage(content=f"The screenshots show the answer. Verdict: {self.verdict}")
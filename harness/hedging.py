@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+
+from harness.tracing import percentile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Race(Generic[T]):
+    key: str
+    attempt: Callable[[int], Awaitable[T]]
+    started: float
+    result: "asyncio.Future[T]"
+    attempts: List["asyncio.Task[T]"] = field(default_factory=list)
+    # A result that only counts if no other attempt finishes properly
+    fallback: Optional[T] = None
+    has_fallback: bool = False
+    error: Optional[BaseException] = None
+
+    def running(self) -> int:
+        return sum(1 for attempt in self.attempts if not attempt.done())
+
+
+class Hedger:
+    """Races a duplicate attempt against stragglers at the tail of a run.
+
+    Every task runs through `run`. Once the run is in its tail (`is_tail`)
+    and fewer attempts are running than `capacity`, a task running longer
+    than the `quantile` of the finished tasks' durations gets one duplicate
+    attempt. Whichever attempt finishes first wins and the other one is
+    cancelled. A result for which `is_final` is False (a timeout) only wins
+    if no attempt does better.
+    """
+
+    def __init__(
+        self,
+        capacity: Callable[[], int],
+        is_tail: Callable[[], bool],
+        is_final: Callable[[Any], bool] = lambda result: True,
+        quantile: float = 95,
+        min_samples: int = 20,
+        interval: float = 10.0,
+    ) -> None:
+        self.capacity = capacity
+        self.is_tail = is_tail
+        self.is_final = is_final
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.interval = interval
+        self.durations: List[float] = []
+        self.hedged = 0
+        self.hedges_won = 0
+        self._races: Dict[str, _Race] = {}
+
+    def _launch(self, race: _Race) -> None:
+        index = len(race.attempts)
+        attempt = asyncio.create_task(race.attempt(index))
+        attempt.add_done_callback(lambda done: self._settle(race, index, done))
+        race.attempts.append(attempt)
+
+    def _settle(self, race: _Race, index: int, attempt: "asyncio.Task") -> None:
+        if race.result.done() or attempt.cancelled():
+            return
+        error = attempt.exception()
+        if error is None:
+            result = attempt.result()
+            if self.is_final(result) or race.running() == 0:
+                race.result.set_result(result)
+                if index > 0:
+                    self.hedges_won += 1
+                return
+            if not race.has_fallback:
+                race.fallback, race.has_fallback = result, True
+        elif race.error is None:
+            race.error = error
+        if race.running() == 0:
+            if race.has_fallback:
+                race.result.set_result(race.fallback)
+            else:
+                race.result.set_exception(race.error)
+
+    async def run(self, key: str, attempt: Callable[[int], Awaitable[T]]) -> T:
+        """Run `attempt(0)`, and `attempt(1)` too if the task is hedged."""
+        race = _Race(
+            key=key,
+            attempt=attempt,
+            started=time.monotonic(),
+            result=asyncio.get_running_loop().create_future(),
+        )
+        self._races[key] = race
+        self._launch(race)
+        try:
+            result = await race.result
+            self.durations.append(time.monotonic() - race.started)
+            return result
+        finally:
+            del self._races[key]
+            for pending in race.attempts:
+                pending.cancel()
+            # Wait for the losers to unwind so their browsers are released
+            await asyncio.gather(*race.attempts, return_exceptions=True)
+
+    def threshold(self) -> Optional[float]:
+        if len(self.durations) < self.min_samples:
+            return None
+        return percentile(self.durations, self.quantile)
+
+    def check(self) -> int:
+        """Hedge stragglers if there is room; returns how many were hedged."""
+        threshold = self.threshold()
+        if threshold is None or not self.is_tail():
+            return 0
+        free = self.capacity() - sum(race.running() for race in self._races.values())
+        now = time.monotonic()
+        stragglers = sorted(
+            (
+                race
+                for race in self._races.values()
+                if len(race.attempts) == 1
+                and not race.result.done()
+                and now - race.started > threshold
+            ),
+            key=lambda race: race.started,
+        )
+        for race in stragglers[: max(free, 0)]:
+            logger.info(
+                f"Hedging {race.key}: running {now - race.started:.0f}s, "
+                f"p{self.quantile:.0f} is {threshold:.0f}s"
+            )
+            self._launch(race)
+            self.hedged += 1
+        return min(len(stragglers), max(free, 0))
+
+    async def monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+
+    def summary(self) -> str:
+        threshold = self.threshold()
+        return (
+            f"Hedging: {self.hedged} stragglers hedged, {self.hedges_won} won by the duplicate, "
+            f"p{self.quantile:.0f} "
+            f"{'n/a' if threshold is None else f'{threshold:.0f}s'} "
+            f"over {len(self.durations)} tasks"
+        )
@@ -0,0 +1,261 @@
+import base64
+import copy
+import functools
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Literal, Optional, Sequence, Type
+
+if TYPE_CHECKING:
+    from browser_use import AgentHistoryList
+    from browser_use.agent.views import AgentOutput
+
+HISTORY_JSON = "history.json"
+COMPACT_HISTORY = "history.jsonl.gz"
+# Screenshot store of a run, shared by all of its tasks
+SCREENSHOTS_DIR = "screenshots"
+
+HistoryFormat = Literal["compact", "json"]
+
+
+class ScreenshotStore:
+    """Screenshots stored once each, as files named by the SHA-256 of their bytes.
+
+    Files keep the PNG bytes the browser produced, so a screenshot read back
+    is identical to the original and judge cache keys stay the same.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.written = 0
+        self.deduplicated = 0
+        self.bytes_written = 0
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.png"
+
+    def put(self, screenshot_b64: str) -> str:
+        data = base64.b64decode(screenshot_b64)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            self.deduplicated += 1
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        self.written += 1
+        self.bytes_written += len(data)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return self.path(digest).read_bytes()
+
+    def get_b64(self, digest: str) -> str:
+        return base64.b64encode(self.get(digest)).decode()
+
+
+def compact_step(step: Dict[str, Any], store: ScreenshotStore) -> Dict[str, Any]:
+    """A history step with its inline screenshot moved into the store."""
+    state = step.get("state") or {}
+    screenshot = state.get("screenshot")
+    if not screenshot:
+        return step
+    state = {**state, "screenshot": None, "screenshot_ref": store.put(screenshot)}
+    return {**step, "state": state}
+
+
+class CompactHistoryWriter:
+    """Appends compacted steps to a task's gzipped JSONL history."""
+
+    def __init__(self, path: Path, store: ScreenshotStore) -> None:
+        self.path = path
+        self.store = store
+        self._file = gzip.open(path, "wt", compresslevel=6)
+
+    def append(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        compact = compact_step(step, self.store)
+        self._file.write(json.dumps(compact, default=str) + "\n")
+        return compact
+
+    def flush(self) -> None:
+        """Make the steps so far readable from the file."""
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class LazyScreenshots(Sequence[str]):
+    """Base64 screenshots of a history, read from the store when indexed."""
+
+    def __init__(self, history: "CompactHistory") -> None:
+        states = (step.get("state") or {} for step in history.steps)
+        self._states = [
+            state for state in states if state.get("screenshot") or state.get("screenshot_ref")
+        ]
+        self._store = history.store
+        self._cached = history.cached
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _load(self, state: Dict[str, Any]) -> str:
+        if state.get("screenshot"):
+            return state["screenshot"]
+        cached = self._cached.get(state["screenshot_ref"])
+        return cached if cached is not None else self._store.get_b64(state["screenshot_ref"])
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self._load(state) for state in self._states[index]]
+        return self._load(self._states[index])
+
+    def __iter__(self) -> Iterator[str]:
+        for state in self._states:
+            yield self._load(state)
+
+
+class CompactHistory:
+    """A saved agent history whose screenshots are only read when asked for.
+
+    Offers the parts of AgentHistoryList the judge uses (`is_done`,
+    `final_result`, `screenshots`), so it can be judged without parsing the
+    agent's action models. `to_agent_history` builds the full object.
+    `cached` holds screenshots already in memory, by digest.
+    """
+
+    def __init__(
+        self,
+        steps: List[Dict[str, Any]],
+        store: Optional[ScreenshotStore],
+        cached: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.steps = steps
+        self.store = store
+        self.cached = cached or {}
+
+    @classmethod
+    def load(cls, task_dir: Path, store: Optional[ScreenshotStore] = None) -> "CompactHistory":
+        """Read `history.jsonl.gz`, or a legacy `history.json` with inline screenshots."""
+        compact_path = task_dir / COMPACT_HISTORY
+        if compact_path.exists():
+            store = store or ScreenshotStore(task_dir.parent / SCREENSHOTS_DIR)
+            with gzip.open(compact_path, "rt") as f:
+                return cls([json.loads(line) for line in f if line.strip()], store)
+        with open(task_dir / HISTORY_JSON) as f:
+            return cls(json.load(f)["history"], store)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def _last_result(self) -> Dict[str, Any]:
+        if not self.steps or not self.steps[-1].get("result"):
+            return {}
+        return self.steps[-1]["result"][-1]
+
+    def is_done(self) -> bool:
+        return bool(self._last_result().get("is_done"))
+
+    def final_result(self) -> Optional[str]:
+        return self._last_result().get("extracted_content") or None
+
+    def screenshots(self) -> LazyScreenshots:
+        return LazyScreenshots(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The history as `history.json` holds it, screenshots inlined."""
+        steps = []
+        for step in self.steps:
+            state = step.get("state") or {}
+            if "screenshot_ref" in state:
+                state = {k: v for k, v in state.items() if k != "screenshot_ref"}
+                state["screenshot"] = self.cached.get(
+                    step["state"]["screenshot_ref"]
+                ) or self.store.get_b64(step["state"]["screenshot_ref"])
+                step = {**step, "state": state}
+            steps.append(step)
+        return {"history": steps}
+
+    def to_agent_history(self, output_model: Type["AgentOutput"]) -> "AgentHistoryList":
+        """Parse into an AgentHistoryList, as AgentHistoryList.load_from_file does."""
+        from browser_use import AgentHistoryList
+
+        data = copy.deepcopy(self.to_dict())
+        for step in data["history"]:
+            if isinstance(step.get("model_output"), dict):
+                step["model_output"] = output_model.model_validate(step["model_output"])
+            else:
+                step["model_output"] = None
+            step["state"].setdefault("interacted_element", None)
+        return AgentHistoryList.model_validate(data)
+
+
+def has_history(task_dir: Path) -> bool:
+    return (task_dir / COMPACT_HISTORY).exists() or (task_dir / HISTORY_JSON).exists()
+
+
+class StreamingHistory:
+    """Writes an agent's history to disk step by step while it runs.
+
+    After every agent step the new history items are appended to
+    `history.jsonl.gz` (under a temp name until `finish`) and their
+    screenshots moved to the store. The screenshot is then dropped from the
+    agent's in-memory history, and only the last `keep_screenshots` are kept
+    in memory, for the judge. A task's memory therefore stays flat instead of
+    growing by a full-page screenshot per step.
+    """
+
+    def __init__(self, task_dir: Path, store: ScreenshotStore, keep_screenshots: int = 4) -> None:
+        self.path = task_dir / COMPACT_HISTORY
+        self.store = store
+        self.keep_screenshots = keep_screenshots
+        self.steps: List[Dict[str, Any]] = []
+        self.recent: "OrderedDict[str, str]" = OrderedDict()
+        # Unique, as a hedged task has two attempts streaming at once
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        self._writer = CompactHistoryWriter(self._tmp_path, store)
+        self._flushed = 0
+
+    def attach(self, agent: Any) -> None:
+        """Flush the agent's history after each of its steps."""
+        step = agent.step
+
+        @functools.wraps(step)
+        async def streamed_step(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await step(*args, **kwargs)
+            finally:
+                self.flush(agent.history)
+
+        agent.step = streamed_step
+
+    def flush(self, history: "AgentHistoryList") -> None:
+        for item in history.history[self._flushed :]:
+            screenshot = item.state.screenshot
+            compact = self._writer.append(item.model_dump())
+            self.steps.append(compact)
+            if screenshot:
+                self.recent[compact["state"]["screenshot_ref"]] = screenshot
+                self.recent.move_to_end(compact["state"]["screenshot_ref"])
+                while len(self.recent) > self.keep_screenshots:
+                    self.recent.popitem(last=False)
+                item.state.screenshot = None
+        self._flushed = len(history.history)
+        self._writer.flush()
+
+    def finish(self, history: "AgentHistoryList") -> CompactHistory:
+        """Flush what is left, publish the file and return the history for judging."""
+        self.flush(history)
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+        return CompactHistory(self.steps, self.store, cached=dict(self.recent))
+
+    def abort(self) -> None:
+        """Close the file of a run that failed; the partial temp file stays for debugging."""
+        self._writer.close()
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.fallbacks import RunnableWithFallbacks
+
+from evaluation.retry import error_status, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _total_tokens(response: LLMResult) -> int:
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return int(usage.get("total_tokens", 0))
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    return int(token_usage.get("total_tokens", 0))
+
+
+@dataclass
+class Endpoint:
+    name: str
+    factory: Callable[..., BaseChatModel]
+    tokens_per_minute: int
+    requests_per_minute: int
+    in_flight: int = 0
+    failures: int = 0
+    cooldown_until: float = 0.0
+    window: Deque[Tuple[float, int]] = field(default_factory=deque)
+    latencies: Deque[Tuple[float, float]] = field(default_factory=deque)
+
+    def record(self, tokens: int) -> None:
+        self.window.append((time.monotonic(), tokens))
+
+    def record_latency(self, seconds: float) -> None:
+        self.latencies.append((time.monotonic(), seconds))
+
+    def _trim(self, now: float) -> None:
+        while self.window and self.window[0][0] < now - WINDOW_SECONDS:
+            self.window.popleft()
+        while self.latencies and self.latencies[0][0] < now - WINDOW_SECONDS:
+            self.latencies.popleft()
+
+    def usage(self) -> Tuple[int, int]:
+        """Tokens and requests used within the rolling window."""
+        self._trim(time.monotonic())
+        return sum(tokens for _, tokens in self.window), len(self.window)
+
+    def utilization(self) -> float:
+        tokens, requests = self.usage()
+        return max(tokens / self.tokens_per_minute, requests / self.requests_per_minute)
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+
+async def _ainvoke_first(runnables: Iterable[Runnable], *args: Any, **kwargs: Any) -> Any:
+    """Result of the first runnable that does not fail with a 429/5xx."""
+    last_error: Optional[BaseException] = None
+    for runnable in runnables:
+        try:
+            return await runnable.ainvoke(*args, **kwargs)
+        except Exception as e:
+            if error_status(e) not in RETRYABLE_STATUS:
+                raise
+            last_error = e
+    assert last_error is not None
+    raise last_error
+
+
+class _Failover(RunnableWithFallbacks):
+    """An endpoint's chat model that falls back to the others on 429/5xx.
+
+    `with_fallbacks` picks the errors to fail over on by type, but every
+    provider raises its own types for the same statuses, so the fallback
+    loop checks the status instead. Methods such as `with_structured_output`
+    are applied to every endpoint's model, as with `with_fallbacks`.
+    """
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        return await _ainvoke_first(self.runnables, input, config, **kwargs)
+
+
+class _UsageCallback(BaseCallbackHandler):
+    """Feeds token usage and rate-limit errors back into an endpoint."""
+
+    def __init__(self, endpoint: Endpoint, dispatcher: "LLMDispatcher") -> None:
+        self.endpoint = endpoint
+        self.dispatcher = dispatcher
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self, serialized: Any, messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(
+        self, serialized: Any, prompts: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self.endpoint.record(_total_tokens(response))
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.endpoint.record_latency(time.perf_counter() - started)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+        self.dispatcher.report_error(self.endpoint, error)
+
+
+class LLMDispatcher:
+    """Weighted load balancer across chat model endpoints.
+
+    Agent tasks lease the endpoint with the lowest projected load relative
+    to its token/request budget, and fail over to the others on 429/5xx.
+    Judge calls go through `ainvoke`, which picks per call and fails over
+    the same way.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        model_name: str,
+        expected_task_tokens_per_minute: int = 30_000,
+        default_cooldown_seconds: float = 20.0,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("LLMDispatcher needs at least one endpoint")
+        self.endpoints = endpoints
+        self.model_name = model_name
+        self.expected_task_tokens_per_minute = expected_task_tokens_per_minute
+        self.default_cooldown_seconds = default_cooldown_seconds
+
+    def _load(self, endpoint: Endpoint) -> float:
+        tokens, requests = endpoint.usage()
+        projected = tokens + endpoint.in_flight * self.expected_task_tokens_per_minute
+        return max(projected / endpoint.tokens_per_minute, requests / endpoint.requests_per_minute)
+
+    def _ranked(self) -> List[Endpoint]:
+        available = [e for e in self.endpoints if not e.cooling_down()] or list(
+            self.endpoints
+        )
+        # Shuffle first so ties do not always land on the same endpoint
+        random.shuffle(available)
+        return sorted(available, key=self._load)
+
+    def _build(self, endpoint: Endpoint) -> BaseChatModel:
+        return endpoint.factory(callbacks=[_UsageCallback(endpoint, self)])
+
+    def report_error(self, endpoint: Endpoint, error: BaseException) -> None:
+        status = error_status(error)
+        if status not in RETRYABLE_STATUS:
+            return
+        endpoint.failures += 1
+        cooldown = retry_after_seconds(error) or self.default_cooldown_seconds
+        endpoint.cooldown_until = max(endpoint.cooldown_until, time.monotonic() + cooldown)
+        logger.warning(f"Endpoint {endpoint.name} returned {status}, cooling down {cooldown:.0f}s")
+
+    @contextmanager
+    def lease(self) -> Iterator[Runnable]:
+        """Lease the least loaded endpoint for the duration of one agent task.
+
+        The chat model falls back to the other endpoints, in their order at
+        lease time, on each call that gets a 429/5xx. It behaves like the
+        leased endpoint's model otherwise, `with_structured_output` included.
+        """
+        ranked = self._ranked()
+        endpoint = ranked[0]
+        endpoint.in_flight += 1
+        try:
+            yield _Failover(
+                runnable=self._build(endpoint),
+                fallbacks=[self._build(other) for other in ranked[1:]],
+            )
+        finally:
+            endpoint.in_flight -= 1
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        """Invoke the least loaded endpoint, failing over on 429/5xx."""
+        return await _ainvoke_first(
+            (self._build(endpoint) for endpoint in self._ranked()), messages, **kwargs
+        )
+
+    def saturated(self) -> bool:
+        """Whether every endpoint is cooling down or at its rolling budget."""
+        return all(e.cooling_down() or e.utilization() >= 1.0 for e in self.endpoints)
+
+    async def wait_for_capacity(self, poll_seconds: float = 1.0) -> None:
+        """Hold back a call until some endpoint has budget left."""
+        while self.saturated():
+            await asyncio.sleep(poll_seconds)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Percentile of LLM call latency over the rolling window, in seconds."""
+        latencies = []
+        for endpoint in self.endpoints:
+            endpoint._trim(time.monotonic())
+            latencies.extend(seconds for _, seconds in endpoint.latencies)
+        if not latencies:
+            return None
+        latencies.sort()
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q / 100))]
+
+    def utilization(self) -> Dict[str, float]:
+        return {endpoint.name: endpoint.utilization() for endpoint in self.endpoints}
+
+    def summary(self) -> str:
+        parts = []
+        for endpoint in self.endpoints:
+            tokens, requests = endpoint.usage()
+            parts.append(
+                f"{endpoint.name}: {endpoint.utilization():.0%} "
+                f"({tokens}/{endpoint.tokens_per_minute} tok/min, "
+                f"{requests}/{endpoint.requests_per_minute} req/min, "
+                f"{endpoint.in_flight} tasks, {endpoint.failures} throttled)"
+            )
+        return "Endpoint utilization: " + "; ".join(parts)
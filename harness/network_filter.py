@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+from contextlib import suppress
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+NETWORK_FILE = "network.json"
+
+# Ad, tracking and analytics hosts that show up on the WebVoyager sites.
+# A domain also blocks its subdomains.
+DEFAULT_BLOCKED_DOMAINS: FrozenSet[str] = frozenset(
+    {
+        "2mdn.net",
+        "adnxs.com",
+        "adsrvr.org",
+        "amazon-adsystem.com",
+        "bat.bing.com",
+        "casalemedia.com",
+        "chartbeat.com",
+        "clarity.ms",
+        "criteo.com",
+        "criteo.net",
+        "demdex.net",
+        "doubleclick.net",
+        "everesttech.net",
+        "google-analytics.com",
+        "googleadservices.com",
+        "googlesyndication.com",
+        "googletagmanager.com",
+        "googletagservices.com",
+        "hotjar.com",
+        "moatads.com",
+        "mixpanel.com",
+        "nr-data.net",
+        "omtrdc.net",
+        "openx.net",
+        "outbrain.com",
+        "pubmatic.com",
+        "quantserve.com",
+        "rubiconproject.com",
+        "scorecardresearch.com",
+        "segment.io",
+        "taboola.com",
+    }
+)
+
+# Largest response kept in the asset cache
+MAX_CACHED_BYTES = 5 * 1024 * 1024
+# Headers that describe the transfer rather than the decoded body we store
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def load_domain_list(path: Path) -> FrozenSet[str]:
+    """Domains from a file with one per line; blank lines and # comments skipped."""
+    domains = set()
+    with open(path) as f:
+        for line in f:
+            domain = line.split("#", 1)[0].strip().lower().lstrip(".")
+            if domain:
+                domains.add(domain)
+    return frozenset(domains)
+
+
+@dataclass
+class NetworkFilterConfig:
+    # Playwright resource types to abort, e.g. media, font, image
+    block_resource_types: FrozenSet[str] = frozenset({"media"})
+    blocked_domains: FrozenSet[str] = DEFAULT_BLOCKED_DOMAINS
+    # Serve these resource types from a cache on disk when set
+    asset_cache_dir: Optional[Path] = None
+    cache_resource_types: FrozenSet[str] = frozenset({"font", "stylesheet"})
+
+
+@dataclass
+class NetworkStats:
+    requests: int = 0
+    # Aborted requests by reason, "type:<resource type>" or "domain"
+    blocked: Counter[str] = field(default_factory=Counter)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # Response bytes served from the asset cache instead of the network
+    cache_bytes: int = 0
+
+    def blocked_requests(self) -> int:
+        return sum(self.blocked.values())
+
+    def add(self, other: "NetworkStats") -> None:
+        self.requests += other.requests
+        self.blocked.update(other.blocked)
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.cache_bytes += other.cache_bytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "blocked": dict(self.blocked)}
+
+    def summary(self) -> str:
+        reasons = ", ".join(f"{reason} {count}" for reason, count in self.blocked.most_common())
+        return (
+            f"Network filter: {self.blocked_requests()}/{self.requests} requests blocked"
+            f"{f' ({reasons})' if reasons else ''}, {self.cache_hits} cache hits "
+            f"({self.cache_bytes / 1024**2:.1f}MB), {self.cache_misses} cache misses"
+        )
+
+
+totals = NetworkStats()
+
+
+def is_blocked_domain(host: str, domains: FrozenSet[str]) -> bool:
+    """Whether `host` or one of its parent domains is in `domains`."""
+    labels = host.lower().split(".")
+    return any(".".join(labels[i:]) in domains for i in range(len(labels)))
+
+
+class AssetCache:
+    """Static responses on disk, keyed by a hash of the URL.
+
+    The body is written before its metadata, so an entry with metadata is
+    always complete. Shared by every context and run using the directory.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.root / f"{key}.body", self.root / f"{key}.json"
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return meta["status"], meta["headers"], body
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        body_path, meta_path = self._paths(url)
+        for path, data in (
+            (body_path, body),
+            (meta_path, json.dumps({"url": url, "status": status, "headers": headers}).encode()),
+        ):
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+
+def _cacheable(status: int, headers: Dict[str, str], body: bytes) -> bool:
+    cache_control = headers.get("cache-control", "").lower()
+    return (
+        status == 200
+        and len(body) <= MAX_CACHED_BYTES
+        and "no-store" not in cache_control
+        and "private" not in cache_control
+    )
+
+
+class NetworkFilter:
+    """Request interception for browser contexts.
+
+    Aborts requests of blocked resource types or to blocked domains, and
+    optionally serves static assets from an AssetCache. Top-level page
+    navigations are never blocked, so a task can always open its site.
+    """
+
+    def __init__(self, config: NetworkFilterConfig) -> None:
+        self.config = config
+        self.cache = (
+            AssetCache(config.asset_cache_dir) if config.asset_cache_dir is not None else None
+        )
+
+    async def install(self, context: Any) -> NetworkStats:
+        """Route every request of a Playwright context; returns its live stats.
+
+        Playwright turns off the browser's HTTP cache for a context with any
+        route installed, however narrow its URL pattern, so scripts and
+        images a page would reuse across the task's navigations are fetched
+        again. Only the asset cache's resource types are spared that.
+        """
+        stats = NetworkStats()
+
+        async def handle(route: Any, request: Any) -> None:
+            try:
+                await self._handle(route, request, stats)
+            except Exception as e:
+                logger.debug(f"Network filter error for {request.url}: {e}")
+                # Fail the request rather than leave the page waiting on it;
+                # this raises too if it was already handled or the page is gone
+                with suppress(Exception):
+                    await route.abort("failed")
+
+        await context.route("**/*", handle)
+        return stats
+
+    def _block_reason(self, request: Any) -> Optional[str]:
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            return None
+        if request.resource_type in self.config.block_resource_types:
+            return f"type:{request.resource_type}"
+        host = urlsplit(request.url).hostname
+        if host and is_blocked_domain(host, self.config.blocked_domains):
+            return "domain"
+        return None
+
+    async def _handle(self, route: Any, request: Any, stats: NetworkStats) -> None:
+        stats.requests += 1
+        reason = self._block_reason(request)
+        if reason is not None:
+            stats.blocked[reason] += 1
+            await route.abort("blockedbyclient")
+            return
+        if (
+            self.cache is None
+            or request.method != "GET"
+            or request.resource_type not in self.config.cache_resource_types
+            or not request.url.startswith(("http://", "https://"))
+        ):
+            await route.continue_()
+            return
+
+        cached = await asyncio.to_thread(self.cache.get, request.url)
+        if cached is not None:
+            status, headers, body = cached
+            stats.cache_hits += 1
+            stats.cache_bytes += len(body)
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        stats.cache_misses += 1
+        response = await route.fetch()
+        body = await response.body()
+        if _cacheable(response.status, response.headers, body):
+            headers = {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in _TRANSFER_HEADERS
+            }
+            await asyncio.to_thread(self.cache.put, request.url, response.status, headers, body)
+        await route.fulfill(response=response, body=body)
+
+
+def build_network_filter(
+    block_resource_types: Iterable[str],
+    extra_domain_files: Iterable[Path] = (),
+    asset_cache_dir: Optional[Path] = None,
+) -> NetworkFilterConfig:
+    """Config with the default domain list plus the domains in `extra_domain_files`."""
+    domains = set(DEFAULT_BLOCKED_DOMAINS)
+    for path in extra_domain_files:
+        domains |= load_domain_list(path)
+    return NetworkFilterConfig(
+        block_resource_types=frozenset(block_resource_types),
+        blocked_domains=frozenset(domains),
+        asset_cache_dir=asset_cache_dir,
+    )
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from harness.adaptive_concurrency import ConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageMetrics:
+    processed: int = 0
+    dropped: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    max_queue_depth: int = 0
+    busy_seconds: float = 0.0
+
+
+@dataclass
+class Stage:
+    """One pipeline step with its own worker count and bounded inbox.
+
+    `handler` returns the item for the next stage, or None to stop the item
+    here. Handlers are expected to deal with their own task-level failures;
+    anything that escapes is logged and counted, and the item is dropped.
+    With a `limiter`, `concurrency` workers exist but only as many as the
+    limiter currently allows take items.
+    """
+
+    name: str
+    handler: Callable[[Any], Awaitable[Optional[Any]]]
+    concurrency: int
+    queue_size: int = 64
+    metrics: StageMetrics = field(default_factory=StageMetrics)
+    queue: Optional["asyncio.Queue[Any]"] = None
+    limiter: Optional["ConcurrencyLimiter"] = None
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+
+class Pipeline:
+    """Stages joined by bounded asyncio queues.
+
+    Each stage only ever waits on its own inbox, so a slow later stage (e.g.
+    the judge) does not hold resources of an earlier one (e.g. browsers)
+    until its inbox is full.
+    """
+
+    def __init__(self, stages: List[Stage]) -> None:
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        # Set once every item has been handed to the first stage
+        self.source_exhausted = False
+
+    async def _put(self, stage: Stage, item: Any) -> None:
+        await stage.queue.put(item)
+        stage.metrics.max_queue_depth = max(stage.metrics.max_queue_depth, stage.depth())
+
+    async def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            if stage.limiter is not None:
+                await stage.limiter.acquire()
+            try:
+                item = await stage.queue.get()
+            except BaseException:
+                if stage.limiter is not None:
+                    await stage.limiter.release()
+                raise
+            stage.metrics.in_flight += 1
+            start = time.perf_counter()
+            failed = False
+            result = None
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                failed = True
+                stage.metrics.errors += 1
+                logger.exception(f"Unhandled error in stage {stage.name}: {e}")
+            finally:
+                stage.metrics.busy_seconds += time.perf_counter() - start
+                stage.metrics.in_flight -= 1
+                if stage.limiter is not None:
+                    await stage.limiter.release()
+            try:
+                if failed:
+                    pass
+                elif next_stage is None:
+                    stage.metrics.processed += 1
+                elif result is None:
+                    stage.metrics.dropped += 1
+                else:
+                    stage.metrics.processed += 1
+                    await self._put(next_stage, result)
+            finally:
+                stage.queue.task_done()
+
+    async def run(self, items: Union[Iterable[Any], AsyncIterable[Any]]) -> None:
+        """Push all items through every stage and wait until they drain.
+
+        Items are pulled from `items` only as the first stage's inbox has
+        room, so an async source is consumed lazily.
+        """
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+        workers = [
+            [asyncio.create_task(self._worker(index)) for _ in range(stage.concurrency)]
+            for index, stage in enumerate(self.stages)
+        ]
+        try:
+            if isinstance(items, AsyncIterable):
+                async for item in items:
+                    await self._put(self.stages[0], item)
+            else:
+                for item in items:
+                    await self._put(self.stages[0], item)
+            self.source_exhausted = True
+            # Stages drain in order: an upstream worker has enqueued its
+            # output downstream before it marks its own item done
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for stage_workers in workers:
+                for worker in stage_workers:
+                    worker.cancel()
+            await asyncio.gather(
+                *(worker for stage_workers in workers for worker in stage_workers),
+                return_exceptions=True,
+            )
+
+    def summary(self) -> str:
+        parts = []
+        for stage in self.stages:
+            m = stage.metrics
+            limit = stage.limiter.limit if stage.limiter is not None else stage.concurrency
+            parts.append(
+                f"{stage.name}: {m.in_flight}/{limit} busy, "
+                f"queue {stage.depth()} (max {m.max_queue_depth}), "
+                f"{m.processed} done, {m.errors} errors, {m.busy_seconds:.0f}s busy"
+            )
+        return "Pipeline: " + " | ".join(parts)
@@ -0,0 +1,101 @@
+import os
+from typing import Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+
+from harness.llm_dispatcher import Endpoint, LLMDispatcher
+
+# Azure gpt-4o quotas per region, in thousands of tokens per minute
+AZURE_REGIONS = {
+    "WEST_EU": 900,
+    "EAST_US": 450,
+    "EAST_US_2": 450,
+    "WEST_US": 450,
+}
+GOOGLE_MODELS = ("gemini-1.5-flash", "gemini-1.5-flash-8b", "gemini-1.5-pro")
+
+# Model name and endpoints for a --model-provider value
+ProviderBackend = Callable[[str], Tuple[str, List[Endpoint]]]
+
+
+def _azure_factory(region: str) -> Callable[..., BaseChatModel]:
+    from langchain_openai import AzureChatOpenAI
+    from pydantic import SecretStr
+
+    def factory(**kwargs) -> BaseChatModel:
+        # Force reload environment variables so rotated keys are picked up
+        load_dotenv(override=True)
+        return AzureChatOpenAI(
+            model="gpt-4o",
+            api_version="2024-10-21",
+            azure_endpoint=os.getenv(f"AZURE_OPENAI_ENDPOINT_{region}", ""),
+            api_key=SecretStr(os.getenv(f"AZURE_OPENAI_API_KEY_{region}", "")),
+            **kwargs,
+        )
+
+    return factory
+
+
+def _azure(model_provider: str) -> Tuple[str, List[Endpoint]]:
+    endpoints = [
+        Endpoint(
+            name=region.lower(),
+            factory=_azure_factory(region),
+            tokens_per_minute=quota * 1000,
+            # Azure grants 6 requests per minute per 1000 tokens per minute
+            requests_per_minute=quota * 6,
+        )
+        for region, quota in AZURE_REGIONS.items()
+    ]
+    return "gpt-4o", endpoints
+
+
+def _anthropic(model_provider: str) -> Tuple[str, List[Endpoint]]:
+    from langchain_anthropic import ChatAnthropic
+
+    model_name = "claude-3-5-sonnet-20240620"
+    endpoint = Endpoint(
+        name="anthropic",
+        factory=lambda **kwargs: ChatAnthropic(
+            model_name=model_name,
+            timeout=25,
+            stop=None,
+            temperature=0.0,
+            **kwargs,
+        ),
+        tokens_per_minute=400_000,
+        requests_per_minute=4_000,
+    )
+    return model_name, [endpoint]
+
+
+def _google(model_provider: str) -> Tuple[str, List[Endpoint]]:
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    model_name = model_provider.split("/", 1)[1]
+    endpoint = Endpoint(
+        name=model_name,
+        factory=lambda **kwargs: ChatGoogleGenerativeAI(model=model_name, **kwargs),
+        tokens_per_minute=4_000_000,
+        requests_per_minute=2_000,
+    )
+    return model_name, [endpoint]
+
+
+# Each backend imports its langchain package only when it is selected, so a
+# run pays the import time of one provider and the other two need not be
+# installed
+PROVIDERS: Dict[str, ProviderBackend] = {
+    "azure": _azure,
+    "anthropic": _anthropic,
+    **{f"google/{model}": _google for model in GOOGLE_MODELS},
+}
+
+
+def get_llm_dispatcher(model_provider: str) -> LLMDispatcher:
+    """Build a dispatcher over all endpoints configured for the provider."""
+    if model_provider not in PROVIDERS:
+        raise ValueError(f"Invalid model provider: {model_provider}")
+    model_name, endpoints = PROVIDERS[model_provider](model_provider)
+    return LLMDispatcher(endpoints, model_name=model_name)
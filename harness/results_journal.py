@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def iter_journal(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream records from a JSONL journal one line at a time.
+
+    A torn last line left by a crash mid-append is skipped.
+    """
+    if not path.exists():
+        return
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable record at {path}:{line_number}")
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON to a temp file, fsync it and rename it over `path`."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ResultsJournal:
+    """Append-only JSONL log with one fsync'd record per completed task."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        torn = False
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(self.path, "a")
+        if torn:
+            # Terminate a record torn by a crash so the next one starts clean
+            self._file.write("\n")
+        self.appended = 0
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.appended += 1
+
+    def close(self) -> None:
+        self._file.close()
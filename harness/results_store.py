@@ -0,0 +1,225 @@
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from urllib.parse import quote, unquote
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:  # Only needed to export and query results
+    pa = pc = ds = None
+
+from harness.results_journal import iter_journal
+from harness.task_scheduler import site_of
+
+DEFAULT_STORE = Path("results/store")
+IMPOSSIBLE_TASKS = Path("data/WebVoyagerImpossibleTasks.json")
+
+# Directory levels of the store: results/store/run=<run>/site=<site>/
+PARTITIONS = ["run", "site"]
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("The results store needs pyarrow: pip install pyarrow")
+
+
+def schema() -> "pa.Schema":
+    """Typed columns of a stored TaskResult, plus its run and site."""
+    _require_pyarrow()
+    return pa.schema(
+        [
+            ("run", pa.string()),
+            ("site", pa.string()),
+            ("task_id", pa.string()),
+            ("web_name", pa.string()),
+            ("start_time", pa.timestamp("us")),
+            ("end_time", pa.timestamp("us")),
+            ("duration_seconds", pa.float64()),
+            ("num_steps", pa.int32()),
+            ("success", pa.dictionary(pa.int8(), pa.string())),
+            ("impossible", pa.bool_()),
+            ("warm_profile", pa.bool_()),
+            ("task_prompt", pa.string()),
+            ("final_answer", pa.string()),
+            ("gpt_4v_res", pa.string()),
+        ]
+    )
+
+
+def load_impossible_tasks(path: Path = IMPOSSIBLE_TASKS) -> set:
+    if not path.exists():
+        return set()
+    with open(path) as f:
+        return set(json.load(f))
+
+
+def iter_run_results(run_dir: Path) -> Iterator[Dict[str, Any]]:
+    """The latest TaskResult record of every task in a run.
+
+    Read from the run's `results.jsonl` journal in one pass; runs from
+    before the journal are read from their `task_result.json` files.
+    """
+    latest: Dict[str, Dict[str, Any]] = {}
+    for record in iter_journal(run_dir / "results.jsonl"):
+        if "task_id" in record:
+            latest[record["task_id"]] = record
+    if not latest:
+        for result_file in sorted(run_dir.glob("*/task_result.json")):
+            with open(result_file) as f:
+                record = json.load(f)
+            latest[record["task_id"]] = record
+    return iter(latest.values())
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def build_table(run: str, records: Iterable[Dict[str, Any]], impossible: set) -> "pa.Table":
+    """Columns for the records of one run, typed by `schema()`."""
+    columns: Dict[str, List[Any]] = {field.name: [] for field in schema()}
+    for record in records:
+        columns["run"].append(run)
+        columns["site"].append(site_of({"id": record["task_id"]}))
+        columns["task_id"].append(record["task_id"])
+        columns["web_name"].append(record.get("web_name"))
+        columns["start_time"].append(_timestamp(record.get("start_time")))
+        columns["end_time"].append(_timestamp(record.get("end_time")))
+        columns["duration_seconds"].append(record.get("duration_seconds"))
+        columns["num_steps"].append(record.get("num_steps"))
+        columns["success"].append(record.get("success"))
+        columns["impossible"].append(record["task_id"] in impossible)
+        columns["warm_profile"].append(bool(record.get("warm_profile", False)))
+        columns["task_prompt"].append(record.get("task_prompt"))
+        columns["final_answer"].append(record.get("final_answer"))
+        columns["gpt_4v_res"].append(record.get("gpt_4v_res"))
+    return pa.table(columns, schema=schema())
+
+
+def ingest_run(
+    run_dir: Path,
+    store: Path = DEFAULT_STORE,
+    run: Optional[str] = None,
+    impossible: Optional[set] = None,
+) -> int:
+    """Replace a run's partitions in the store with its current results.
+
+    Returns the number of tasks written.
+    """
+    _require_pyarrow()
+    run = run or run_dir.name
+    if impossible is None:
+        impossible = load_impossible_tasks()
+    table = build_table(run, iter_run_results(run_dir), impossible)
+    # Sites that have since been dropped from the run must not linger
+    shutil.rmtree(store / f"run={quote(run, safe='')}", ignore_errors=True)
+    if table.num_rows:
+        ds.write_dataset(
+            table,
+            store,
+            format="parquet",
+            partitioning=PARTITIONS,
+            partitioning_flavor="hive",
+            existing_data_behavior="overwrite_or_ignore",
+            basename_template=f"{run}-{{i}}.parquet",
+        )
+    return table.num_rows
+
+
+class ResultsStore:
+    """Query API over the Parquet results of any number of runs.
+
+    Filters on run and site only open the matching partitions, and only the
+    requested columns are read.
+    """
+
+    def __init__(self, root: Path = DEFAULT_STORE) -> None:
+        _require_pyarrow()
+        self.root = Path(root)
+        self.dataset = ds.dataset(
+            self.root,
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([("run", pa.string()), ("site", pa.string())]), flavor="hive"
+            ),
+        )
+
+    def runs(self) -> List[str]:
+        return sorted(unquote(path.name.split("=", 1)[1]) for path in self.root.glob("run=*"))
+
+    def load(
+        self,
+        runs: Optional[Sequence[str]] = None,
+        sites: Optional[Sequence[str]] = None,
+        columns: Optional[Sequence[str]] = None,
+        include_impossible: bool = False,
+    ) -> "pa.Table":
+        """Task results, optionally limited to some runs, sites and columns.
+
+        `.to_pandas()` on the result gives the frame the notebook works on.
+        """
+        condition = None
+        for name, values in (("run", runs), ("site", sites)):
+            if values:
+                clause = ds.field(name).isin(list(values))
+                condition = clause if condition is None else condition & clause
+        if not include_impossible:
+            clause = ~ds.field("impossible")
+            condition = clause if condition is None else condition & clause
+        return self.dataset.to_table(
+            columns=list(columns) if columns is not None else None, filter=condition
+        )
+
+    def per_site(
+        self,
+        runs: Optional[Sequence[str]] = None,
+        sites: Optional[Sequence[str]] = None,
+        include_impossible: bool = False,
+    ) -> "pa.Table":
+        """Tasks, success rate, mean duration and mean steps per run and site."""
+        table = self.load(
+            runs,
+            sites,
+            columns=["run", "site", "success", "duration_seconds", "num_steps"],
+            include_impossible=include_impossible,
+        )
+        table = table.append_column(
+            "succeeded",
+            pc.cast(pc.equal(pc.cast(table["success"], pa.string()), "success"), pa.float64()),
+        )
+        grouped = table.group_by(["run", "site"]).aggregate(
+            [
+                ("succeeded", "count"),
+                ("succeeded", "mean"),
+                ("duration_seconds", "mean"),
+                ("num_steps", "mean"),
+            ]
+        )
+        names = {
+            "run": "run",
+            "site": "site",
+            "succeeded_count": "tasks",
+            "succeeded_mean": "success_rate",
+            "duration_seconds_mean": "mean_duration_seconds",
+            "num_steps_mean": "mean_steps",
+        }
+        grouped = grouped.select(list(names)).rename_columns(list(names.values()))
+        return grouped.sort_by([("site", "ascending"), ("run", "ascending")])
+
+
+def format_per_site(table: "pa.Table") -> str:
+    """Per-site rows of several runs side by side, one line per run and site."""
+    lines = [f"{'site':<22}{'run':<30}{'tasks':>6}{'success':>9}{'seconds':>9}{'steps':>7}"]
+    for row in table.to_pylist():
+        lines.append(
+            f"{row['site']:<22}{row['run']:<30}{row['tasks']:>6}"
+            f"{row['success_rate']:>9.1%}{row['mean_duration_seconds'] or 0:>9.0f}"
+            f"{row['mean_steps'] or 0:>7.1f}"
+        )
+    return "\n".join(lines)
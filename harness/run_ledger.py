@@ -0,0 +1,155 @@
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+LEDGER_FILE = "ledger.sqlite"
+
+# Errors from the browser, the network or an API rather than from the task
+# itself; --retry-errored reruns only these. Matched on the exception's
+# class name and on the top-level package it comes from.
+INFRASTRUCTURE_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "BrowserError",
+    "ConnectionError",
+    "ConnectionResetError",
+    "InternalServerError",
+    "RateLimitError",
+    "ServiceUnavailableError",
+    "TargetClosedError",
+    "TimeoutError",
+}
+INFRASTRUCTURE_PACKAGES = {"playwright", "httpx", "httpcore", "aiohttp"}
+
+
+def error_class(error: BaseException) -> str:
+    """`package.ClassName` of an exception, as stored in the ledger."""
+    return f"{type(error).__module__.split('.')[0]}.{type(error).__qualname__}"
+
+
+def is_infrastructure_error(class_name: str) -> bool:
+    package, _, name = class_name.rpartition(".")
+    return name in INFRASTRUCTURE_ERRORS or package in INFRASTRUCTURE_PACKAGES
+
+
+@dataclass
+class LedgerEntry:
+    task_id: str
+    state: str
+    attempts: int
+    error_class: Optional[str]
+    error: Optional[str]
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @property
+    def retryable(self) -> bool:
+        """Errored by infrastructure, or interrupted while running."""
+        if self.state == "running":
+            return True
+        return (
+            self.state == "errored"
+            and self.error_class is not None
+            and is_infrastructure_error(self.error_class)
+        )
+
+
+class RunLedger:
+    """Durable per-task state of a run: queued, running, done or errored.
+
+    Every start, result and error is committed as it happens, so after a
+    crash the ledger says which tasks finished, which raised and why, and
+    which were cut off mid-run (still `running`).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                outcome TEXT,
+                error_class TEXT,
+                error TEXT,
+                queued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            """
+        )
+
+    def register(self, task_ids: Iterable[str]) -> None:
+        """Add tasks as queued; tasks already in the ledger are kept as is."""
+        now = time.time()
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO tasks (id, queued_at) VALUES (?, ?)",
+            [(task_id, now) for task_id in task_ids],
+        )
+        self._conn.execute("COMMIT")
+
+    def mark_done(self, task_ids: Iterable[str]) -> None:
+        """Close tasks finished before the ledger existed (e.g. from the journal)."""
+        self._conn.execute("BEGIN")
+        self._conn.executemany(
+            "UPDATE tasks SET state = 'done' WHERE id = ? AND state != 'done'",
+            [(task_id,) for task_id in task_ids],
+        )
+        self._conn.execute("COMMIT")
+
+    def entries(self) -> Dict[str, LedgerEntry]:
+        """Every task's entry, in one query."""
+        rows = self._conn.execute(
+            "SELECT id, state, attempts, error_class, error, started_at, finished_at FROM tasks"
+        ).fetchall()
+        return {row[0]: LedgerEntry(*row) for row in rows}
+
+    def start(self, task_id: str) -> None:
+        self._conn.execute(
+            "UPDATE tasks SET state = 'running', attempts = attempts + 1, "
+            "started_at = ?, finished_at = NULL WHERE id = ?",
+            (time.time(), task_id),
+        )
+
+    def finish(self, task_id: str, outcome: str) -> None:
+        self._conn.execute(
+            "UPDATE tasks SET state = 'done', outcome = ?, error_class = NULL, error = NULL, "
+            "finished_at = ? WHERE id = ?",
+            (outcome, time.time(), task_id),
+        )
+
+    def fail(self, task_id: str, error: BaseException) -> None:
+        self._conn.execute(
+            "UPDATE tasks SET state = 'errored', error_class = ?, error = ?, finished_at = ? "
+            "WHERE id = ?",
+            (error_class(error), str(error)[:2000], time.time(), task_id),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state"))
+
+    def error_classes(self) -> Dict[str, int]:
+        return dict(
+            self._conn.execute(
+                "SELECT error_class, COUNT(*) FROM tasks WHERE state = 'errored' "
+                "GROUP BY error_class ORDER BY COUNT(*) DESC"
+            )
+        )
+
+    def summary(self) -> str:
+        errors = ", ".join(
+            f"{name} {count}{'' if is_infrastructure_error(name) else ' (task)'}"
+            for name, count in self.error_classes().items()
+        )
+        return f"Ledger: {self.counts()}" + (f"; errors: {errors}" if errors else "")
+
+    def close(self) -> None:
+        self._conn.close()
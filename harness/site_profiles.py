@@ -0,0 +1,146 @@
+import logging
+import os
+import re
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from run_browser_use import TaskResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProfileLease:
+    site: str
+    # State the task starts from, None for a cold start
+    storage_state: Optional[Path]
+    # Where the task's own state is captured if the site has no profile yet
+    capture_to: Optional[Path]
+
+    @property
+    def warm(self) -> bool:
+        return self.storage_state is not None
+
+
+@dataclass
+class _ProfileUsage:
+    uses: int = 0
+    failures_in_a_row: int = 0
+
+
+class SiteProfiles:
+    """Warm per-site browser state (cookies and localStorage) on disk.
+
+    The first task on a site that finishes captures its state; later tasks
+    on the site start from that snapshot. Reset rules keep tasks independent
+    of each other:
+
+    - every warm task starts from the same frozen snapshot; nothing a warm
+      task does is carried over to the next one
+    - a snapshot is dropped after `max_uses` tasks or `max_age_hours`, so
+      consent cookies are refreshed before they go stale
+    - a snapshot is dropped after `max_failures` warm tasks in a row do not
+      finish, in case it carries a bad state (a bot challenge, a broken login)
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_uses: int = 50,
+        max_age_hours: float = 12.0,
+        max_failures: int = 2,
+    ) -> None:
+        self.root = root
+        self.max_uses = max_uses
+        self.max_age_hours = max_age_hours
+        self.max_failures = max_failures
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._usage: Dict[str, _ProfileUsage] = defaultdict(_ProfileUsage)
+
+    def _path(self, site: str) -> Path:
+        return self.root / f"{re.sub(r'[^A-Za-z0-9_-]+', '_', site)}.json"
+
+    def _is_fresh(self, path: Path) -> bool:
+        try:
+            age_hours = (time.time() - path.stat().st_mtime) / 3600
+        except FileNotFoundError:
+            return False
+        return age_hours < self.max_age_hours
+
+    def reset(self, site: str, reason: str) -> None:
+        logger.info(f"Resetting {site} profile: {reason}")
+        self._path(site).unlink(missing_ok=True)
+        self._usage[site] = _ProfileUsage()
+
+    def lease(self, site: str, task_id: str) -> ProfileLease:
+        path = self._path(site)
+        usage = self._usage[site]
+        if path.exists() and usage.uses >= self.max_uses:
+            self.reset(site, f"used by {usage.uses} tasks")
+        elif path.exists() and not self._is_fresh(path):
+            self.reset(site, f"older than {self.max_age_hours:.0f}h")
+        if path.exists():
+            usage.uses += 1
+            return ProfileLease(site, storage_state=path, capture_to=None)
+        # Unique, as a hedged task has two attempts capturing at once
+        capture_to = self.root / f".{task_id}.{uuid.uuid4().hex[:8]}.capture.json"
+        return ProfileLease(site, storage_state=None, capture_to=capture_to)
+
+    def release(self, lease: ProfileLease, finished: bool) -> None:
+        """Apply the reset rules after a task, keeping a cold task's capture."""
+        usage = self._usage[lease.site]
+        if lease.warm:
+            usage.failures_in_a_row = 0 if finished else usage.failures_in_a_row + 1
+            if usage.failures_in_a_row >= self.max_failures:
+                self.reset(
+                    lease.site, f"{usage.failures_in_a_row} warm tasks in a row did not finish"
+                )
+            return
+        if lease.capture_to is None or not lease.capture_to.exists():
+            return
+        path = self._path(lease.site)
+        if finished and not path.exists():
+            os.replace(lease.capture_to, path)
+            logger.info(f"Captured a warm profile for {lease.site}")
+        else:
+            lease.capture_to.unlink(missing_ok=True)
+
+
+def site_savings_report(task_results: Iterable["TaskResult"]) -> str:
+    """Steps and seconds per task on warm versus cold starts, per site."""
+    groups: Dict[str, Dict[bool, List["TaskResult"]]] = defaultdict(lambda: defaultdict(list))
+    for result in task_results:
+        groups[result.task_id.split("--")[0]][result.warm_profile].append(result)
+
+    lines = [
+        f"{'site':<22}{'cold':>6}{'warm':>6}{'steps cold':>12}{'steps warm':>12}"
+        f"{'sec cold':>10}{'sec warm':>10}{'steps saved':>13}{'sec saved':>11}"
+    ]
+    total_steps = total_seconds = 0.0
+    for site, by_warm in sorted(groups.items()):
+        cold, warm = by_warm[False], by_warm[True]
+        if not cold or not warm:
+            continue
+        steps_cold = statistics.mean(r.num_steps for r in cold)
+        steps_warm = statistics.mean(r.num_steps for r in warm)
+        seconds_cold = statistics.mean(r.duration_seconds for r in cold)
+        seconds_warm = statistics.mean(r.duration_seconds for r in warm)
+        steps_saved = (steps_cold - steps_warm) * len(warm)
+        seconds_saved = (seconds_cold - seconds_warm) * len(warm)
+        total_steps += steps_saved
+        total_seconds += seconds_saved
+        lines.append(
+            f"{site:<22}{len(cold):>6}{len(warm):>6}{steps_cold:>12.1f}{steps_warm:>12.1f}"
+            f"{seconds_cold:>10.0f}{seconds_warm:>10.0f}{steps_saved:>13.0f}{seconds_saved:>11.0f}"
+        )
+    lines.append(
+        f"Warm profiles saved ~{total_steps:.0f} steps and ~{total_seconds:.0f}s "
+        f"versus cold starts"
+    )
+    return "\n".join(lines)
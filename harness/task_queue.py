@@ -0,0 +1,167 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class TaskQueue:
+    """Durable SQLite work queue with expiring leases.
+
+    A task is leased to one worker at a time; the lease must be renewed with
+    `heartbeat` or it expires and the task can be leased again. Completion is
+    accepted once per task, from any worker that ever held a lease on it, so
+    a slow worker whose lease was stolen still counts if it finishes first.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_token TEXT,
+                worker TEXT,
+                lease_expires REAL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, position);
+            CREATE TABLE IF NOT EXISTS leases (
+                token TEXT PRIMARY KEY,
+                task_id TEXT NOT NULL,
+                worker TEXT NOT NULL,
+                leased_at REAL NOT NULL
+            );
+            """
+        )
+
+    def enqueue(self, tasks: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Add (id, payload) pairs in order; ids already present are kept as is."""
+        with self._lock:
+            (offset,) = self._conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM tasks"
+            ).fetchone()
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tasks (id, position, payload) VALUES (?, ?, ?)",
+                [
+                    (task_id, offset + i, json.dumps(payload))
+                    for i, (task_id, payload) in enumerate(tasks)
+                ],
+            )
+            self._conn.execute("COMMIT")
+
+    def mark_done(self, task_ids: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE tasks SET state = 'done', lease_token = NULL WHERE id = ?",
+                [(task_id,) for task_id in task_ids],
+            )
+
+    def lease(
+        self, worker: str, lease_seconds: float
+    ) -> Optional[Tuple[str, Dict[str, Any], str]]:
+        """Lease the next queued or expired task as (id, payload, token)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT id, payload FROM tasks WHERE state = 'queued' "
+                "OR (state = 'leased' AND lease_expires < ?) ORDER BY position LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            task_id, payload = row
+            token = uuid.uuid4().hex
+            self._conn.execute(
+                "UPDATE tasks SET state = 'leased', attempts = attempts + 1, "
+                "lease_token = ?, worker = ?, lease_expires = ? WHERE id = ?",
+                (token, worker, now + lease_seconds, task_id),
+            )
+            self._conn.execute(
+                "INSERT INTO leases (token, task_id, worker, leased_at) VALUES (?, ?, ?, ?)",
+                (token, task_id, worker, now),
+            )
+            self._conn.execute("COMMIT")
+        return task_id, json.loads(payload), token
+
+    def heartbeat(self, task_id: str, token: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if it has expired and moved to another worker."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE id = ? AND lease_token = ? AND state = 'leased'",
+                (time.time() + lease_seconds, task_id, token),
+            )
+            return cursor.rowcount == 1
+
+    def can_complete(self, task_id: str, token: str) -> bool:
+        """Whether a completion with this token would be the first one."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tasks JOIN leases ON leases.task_id = tasks.id "
+                "WHERE tasks.id = ? AND leases.token = ? "
+                "AND tasks.state IN ('queued', 'leased')",
+                (task_id, token),
+            ).fetchone()
+            return row is not None
+
+    def fail(self, task_id: str, token: str, error: str, max_attempts: int) -> str:
+        """Requeue a failed lease, or give up on the task after `max_attempts`.
+
+        Returns the task's new state, or "ignored" for stale tokens.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND lease_token = ? "
+                "AND state = 'leased'",
+                (task_id, token),
+            ).fetchone()
+            if row is None:
+                return "ignored"
+            state = "errored" if row[0] >= max_attempts else "queued"
+            self._conn.execute(
+                "UPDATE tasks SET state = ?, lease_token = NULL, error = ? WHERE id = ?",
+                (state, error, task_id),
+            )
+            return state
+
+    def payload(self, task_id: str) -> Dict[str, Any]:
+        with self._lock:
+            (payload,) = self._conn.execute(
+                "SELECT payload FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        return json.loads(payload)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM tasks GROUP BY state"
+            ).fetchall()
+        return dict(rows)
+
+    def remaining(self) -> int:
+        counts = self.counts()
+        return counts.get("queued", 0) + counts.get("leased", 0)
+
+    def workers(self) -> List[Tuple[str, int]]:
+        """Workers with the number of leases each has taken."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT worker, COUNT(*) FROM leases GROUP BY worker ORDER BY worker"
+            ).fetchall()
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,114 @@
+import json
+import random
+import statistics
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Set
+
+from harness.results_journal import iter_journal
+
+TaskOrder = Literal["shuffle", "file", "longest-first", "site"]
+
+
+def site_of(task: Dict[str, Any]) -> str:
+    return task.get("web_name") or task["id"].split("--")[0]
+
+
+def iter_task_file(path: Path) -> Iterator[Dict[str, Any]]:
+    """Read tasks from a JSONL file one line at a time."""
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_durations(sources: Iterable[Path]) -> Dict[str, float]:
+    """Past `duration_seconds` per task id from run journals.
+
+    Each source is a `results.jsonl` journal or a run directory holding one;
+    later sources win for tasks that appear more than once.
+    """
+    durations: Dict[str, float] = {}
+    for source in sources:
+        journal = source / "results.jsonl" if source.is_dir() else source
+        for record in iter_journal(journal):
+            if "duration_seconds" in record:
+                durations[record["task_id"]] = float(record["duration_seconds"])
+    return durations
+
+
+class ExpectedDuration:
+    """Expected task duration: its own past duration, else its site's mean,
+    else the overall mean."""
+
+    def __init__(self, durations: Dict[str, float]) -> None:
+        self.durations = durations
+        by_site: Dict[str, List[float]] = defaultdict(list)
+        for task_id, seconds in durations.items():
+            by_site[task_id.split("--")[0]].append(seconds)
+        self.site_means = {site: statistics.mean(values) for site, values in by_site.items()}
+        self.overall_mean = statistics.mean(durations.values()) if durations else 0.0
+
+    def __call__(self, task: Dict[str, Any]) -> float:
+        if task["id"] in self.durations:
+            return self.durations[task["id"]]
+        return self.site_means.get(task["id"].split("--")[0], self.overall_mean)
+
+
+class TaskSource:
+    """Lazily read, filtered and ordered view of a task file.
+
+    Iterating re-reads the file, so no task dicts are held between passes.
+    `file` order streams line by line; the other orders must see the whole
+    selection to order it and hold only the selected dicts. `site` groups
+    the shuffled tasks by site so consecutive tasks share warm site state.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        exclude_ids: Optional[Set[str]] = None,
+        sites: Optional[Set[str]] = None,
+        ids: Optional[Set[str]] = None,
+        limit: Optional[int] = None,
+        order: TaskOrder = "shuffle",
+        seed: int = 42,
+        durations: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.path = path
+        self.exclude_ids = exclude_ids or set()
+        self.sites = {site.lower() for site in sites} if sites else None
+        self.ids = ids
+        self.limit = limit
+        self.order = order
+        self.seed = seed
+        self.expected_duration = ExpectedDuration(durations or {})
+
+    def _selected(self) -> Iterator[Dict[str, Any]]:
+        for task in iter_task_file(self.path):
+            if task["id"] in self.exclude_ids:
+                continue
+            if self.ids is not None and task["id"] not in self.ids:
+                continue
+            if self.sites is not None and site_of(task).lower() not in self.sites:
+                continue
+            yield task
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        tasks: Iterable[Dict[str, Any]] = self._selected()
+        if self.order in ("shuffle", "site"):
+            tasks = list(tasks)
+            random.Random(self.seed).shuffle(tasks)
+        if self.order == "site":
+            first_seen: Dict[str, int] = {}
+            for task in tasks:
+                first_seen.setdefault(site_of(task), len(first_seen))
+            tasks = sorted(tasks, key=lambda task: first_seen[site_of(task)])
+        elif self.order == "longest-first":
+            # Longest processing time first keeps stragglers off the tail
+            tasks = sorted(tasks, key=self.expected_duration, reverse=True)
+        return islice(tasks, self.limit)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
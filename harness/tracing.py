@@ -0,0 +1,146 @@
+import functools
+import json
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+TRACE_FILE = "trace.json"
+
+# Span names, in the order reports list them
+AGENT = "agent"
+STEP = "step"
+LLM = "llm"
+ACTION = "action"
+PAGE_LOAD = "page_load"
+SCREENSHOT = "screenshot"
+JUDGE = "judge"
+SPAN_NAMES = [AGENT, STEP, LLM, ACTION, PAGE_LOAD, SCREENSHOT, JUDGE]
+
+
+class Tracer:
+    """Timed spans of one task, as (name, step, start_ms, duration_ms).
+
+    Tracing is opt-in: when it is off no Tracer exists and nothing is
+    wrapped, so the agent runs exactly as without it.
+    """
+
+    def __init__(self, task_id: str) -> None:
+        self.task_id = task_id
+        self.origin = time.perf_counter()
+        self.step = 0
+        self.spans: List[Tuple[str, int, float, float]] = []
+
+    def record(self, name: str, started: float, ended: float) -> None:
+        self.spans.append(
+            (
+                name,
+                self.step,
+                round((started - self.origin) * 1000, 1),
+                round((ended - started) * 1000, 1),
+            )
+        )
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def wrap(self, owner: Any, method: str, name: str) -> None:
+        """Time every call of an async method on this one instance."""
+        original = getattr(owner, method, None)
+        if original is None:
+            return
+
+        @functools.wraps(original)
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.record(name, started, time.perf_counter())
+
+        setattr(owner, method, traced)
+
+    def instrument_agent(self, agent: Any, browser_context: Any) -> None:
+        """Trace browser_use agent steps and what they spend their time on."""
+        step = agent.step
+
+        @functools.wraps(step)
+        async def traced_step(*args: Any, **kwargs: Any) -> Any:
+            self.step += 1
+            started = time.perf_counter()
+            try:
+                return await step(*args, **kwargs)
+            finally:
+                self.record(STEP, started, time.perf_counter())
+
+        agent.step = traced_step
+        self.wrap(agent, "get_next_action", LLM)
+        # Newer agents run actions themselves, older ones via their controller
+        if hasattr(agent, "multi_act"):
+            self.wrap(agent, "multi_act", ACTION)
+        else:
+            self.wrap(agent.controller, "multi_act", ACTION)
+        self.wrap(browser_context, "_wait_for_page_and_frames_load", PAGE_LOAD)
+        self.wrap(browser_context, "take_screenshot", SCREENSHOT)
+
+    def save(self, task_dir: Path) -> None:
+        trace = {"task_id": self.task_id, "spans": self.spans}
+        with open(task_dir / TRACE_FILE, "w") as f:
+            json.dump(trace, f, separators=(",", ":"))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of `values` for `q` in [0, 100]."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def load_traces(run_dir: Path) -> Iterator[Dict[str, Any]]:
+    for trace_file in sorted(run_dir.glob(f"*/{TRACE_FILE}")):
+        with open(trace_file) as f:
+            yield json.load(f)
+
+
+def rollup(traces: Iterator[Dict[str, Any]]) -> Dict[str, Dict[str, List[float]]]:
+    """Per-site, per-span-name samples.
+
+    `agent` and `judge` are sampled once per task; the others are summed
+    per step, so `llm` is the LLM time of one step.
+    """
+    samples: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    for trace in traces:
+        site = trace["task_id"].split("--")[0]
+        per_step: Dict[Tuple[str, int], float] = defaultdict(float)
+        for name, step, _, duration_ms in trace["spans"]:
+            if name in (AGENT, JUDGE):
+                samples[site][name].append(duration_ms)
+            else:
+                per_step[(name, step)] += duration_ms
+        for (name, _), duration_ms in per_step.items():
+            samples[site][name].append(duration_ms)
+    return samples
+
+
+def format_rollup(samples: Dict[str, Dict[str, List[float]]]) -> str:
+    lines = [
+        f"{'site':<22} {'span':<11} {'n':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'mean ms':>9}"
+    ]
+    for site, by_name in sorted(samples.items()):
+        for name in SPAN_NAMES:
+            values = by_name.get(name)
+            if not values:
+                continue
+            lines.append(
+                f"{site:<22} {name:<11} {len(values):>6} {percentile(values, 50):>9.0f}"
+                f" {percentile(values, 90):>9.0f} {percentile(values, 99):>9.0f}"
+                f" {statistics.mean(values):>9.0f}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,230 @@
+"""Re-judge saved agent runs without launching a browser.
+
+Streams over the task directories of a run, loads each saved history
+(`history.jsonl.gz` or `history.json`) and calls the judge again at high
+concurrency. Answers are scored as the runner scores them for `--dataset`,
+so GAIA runs are matched against their expected answers instead. The new
+verdict is written next to the old `task_result.json` as
+`rejudge_<judge>.json`; tasks that already have one are skipped unless
+`--force` is given.
+
+    python rejudge.py results/examples-browser-use --judge-provider anthropic
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from evaluation.auto_eval_browser_use import evaluate_run
+from evaluation.image_preprocess import ImagePreprocessConfig
+from evaluation.reference_match import PreJudge
+from evaluation.verdict_cache import DEFAULT_CACHE_PATH, VerdictCache
+from harness.datasets import DATASETS, Dataset, resolve_dataset
+from harness.history_store import SCREENSHOTS_DIR, CompactHistory, ScreenshotStore, has_history
+from harness.pipeline import Pipeline, Stage
+from harness.providers import PROVIDERS, get_llm_dispatcher
+from harness.results_journal import write_json_atomic
+from harness.task_scheduler import iter_task_file
+
+
+@dataclass
+class SavedRun:
+    task_id: str
+    task_dir: Path
+    task: Dict[str, Any]
+    previous: Optional[str]
+
+
+@dataclass
+class LoadedRun:
+    saved: SavedRun
+    history: CompactHistory
+
+
+def iter_saved_runs(
+    results_dir: Path, output_name: str, force: bool, dataset: Dataset = DATASETS["webvoyager"]
+) -> Iterator[SavedRun]:
+    """Task directories of `dataset` with a saved history, in name order, except timed-out tasks."""
+    tasks = {task["id"]: task for task in iter_task_file(dataset.path)}
+    names = sorted(entry.name for entry in os.scandir(results_dir) if entry.is_dir())
+    for name in names:
+        task_dir = results_dir / name
+        if not has_history(task_dir):
+            continue
+        if not force and (task_dir / output_name).exists():
+            continue
+        if name not in tasks:
+            logging.warning(f"Skipping {name}: not a task of {dataset.name}")
+            continue
+        # Without a task_result.json the run died before judging the task
+        previous = None
+        result_file = task_dir / "task_result.json"
+        if result_file.exists():
+            with open(result_file) as f:
+                previous = json.load(f)["success"]
+            if previous == "timeout":
+                # Stopped by a deadline: its history is partial and is never judged
+                continue
+        yield SavedRun(name, task_dir, tasks[name], previous)
+
+
+async def rejudge(args: argparse.Namespace) -> None:
+    dispatcher = get_llm_dispatcher(args.judge_provider)
+    output_name = f"rejudge_{args.judge_provider.replace('/', '_')}.json"
+    judge_cache = None if args.no_judge_cache else VerdictCache(args.judge_cache)
+    image_config = ImagePreprocessConfig(
+        enabled=args.judge_image_preprocess, max_edge=args.judge_image_max_edge
+    )
+    # Screenshots are read lazily, so only the ones the judge sees are loaded
+    store = ScreenshotStore(args.results_dir / SCREENSHOTS_DIR)
+    prejudge = PreJudge.load() if args.prejudge else None
+    verdicts: Counter = Counter()
+    transitions: Counter = Counter()
+    errors = 0
+
+    async def load_stage(saved: SavedRun) -> Optional[LoadedRun]:
+        try:
+            history = await asyncio.to_thread(CompactHistory.load, saved.task_dir, store)
+        except Exception as e:
+            logging.error(f"Could not load history of {saved.task_id}: {e}")
+            return None
+        return LoadedRun(saved, history)
+
+    async def judge_stage(run: LoadedRun) -> Optional[dict]:
+        nonlocal errors
+        success, gpt_4v_res = await evaluate_run(
+            run.saved.task,
+            run.history,
+            args.dataset,
+            dispatcher,
+            cache=judge_cache,
+            image_config=image_config,
+            prejudge=prejudge,
+            wait_for_capacity=True,
+        )
+        if gpt_4v_res.startswith("JUDGE ERROR"):
+            # Leave no verdict so the next rejudge run retries this task
+            errors += 1
+            logging.error(f"{run.saved.task_id}: {gpt_4v_res}")
+            return None
+        return {
+            "task_id": run.saved.task_id,
+            "judge_model": dispatcher.model_name,
+            "success": success,
+            "gpt_4v_res": gpt_4v_res,
+            "previous_success": run.saved.previous,
+            "judged_at": datetime.now().isoformat(),
+        }
+
+    async def write_stage(verdict: dict) -> None:
+        task_dir = args.results_dir / verdict["task_id"]
+        write_json_atomic(task_dir / output_name, verdict)
+        verdicts[verdict["success"]] += 1
+        transitions[(verdict["previous_success"], verdict["success"])] += 1
+        done = sum(verdicts.values())
+        if done % 25 == 0:
+            print(f"{done} re-judged, {errors} errors. {dispatcher.summary()}")
+
+    pipeline = Pipeline(
+        [
+            Stage("load", load_stage, concurrency=args.load_concurrent),
+            Stage("judge", judge_stage, concurrency=args.concurrent),
+            Stage("write", write_stage, concurrency=1),
+        ]
+    )
+    saved_runs = islice(
+        iter_saved_runs(args.results_dir, output_name, args.force, args.dataset), args.limit
+    )
+
+    start = time.perf_counter()
+    try:
+        await pipeline.run(saved_runs)
+    finally:
+        elapsed = time.perf_counter() - start
+        done = sum(verdicts.values())
+        print(
+            f"\nRe-judged {done} tasks in {elapsed:.0f}s "
+            f"({done / max(elapsed, 1e-9) * 60:.0f} tasks/min), {errors} judge errors"
+        )
+        print(f"Verdicts: {dict(verdicts)}")
+        changed = {k: v for k, v in transitions.items() if k[0] != k[1]}
+        print(f"Agreement with previous verdicts: {done - sum(changed.values())}/{done}")
+        for (previous, new), count in sorted(changed.items(), key=str):
+            print(f"  {previous} -> {new}: {count}")
+        print(pipeline.summary())
+        print(dispatcher.summary())
+        if judge_cache is not None:
+            print(judge_cache.summary())
+            judge_cache.close()
+        if prejudge is not None:
+            print(prejudge.summary())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-judge saved agent runs without a browser")
+    parser.add_argument("results_dir", type=Path)
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="webvoyager",
+        help="Tasks the run is from: webvoyager, gaia (scored by exact match, without "
+        "the judge) or a JSONL task file (default: webvoyager)",
+    )
+    parser.add_argument(
+        "--judge-provider",
+        type=str,
+        default="azure",
+        choices=list(PROVIDERS),
+        help="Judge model provider (default: azure)",
+    )
+    parser.add_argument(
+        "--concurrent", type=int, default=32, help="Concurrent judge calls (default: 32)"
+    )
+    parser.add_argument(
+        "--load-concurrent",
+        type=int,
+        default=4,
+        help="Histories parsed in parallel threads (default: 4)",
+    )
+    parser.add_argument("--limit", type=int, help="Re-judge at most this many tasks")
+    parser.add_argument(
+        "--force", action="store_true", help="Re-judge tasks that already have a verdict"
+    )
+    parser.add_argument(
+        "--judge-cache",
+        type=Path,
+        default=DEFAULT_CACHE_PATH,
+        help=f"Judge verdict cache file (default: {DEFAULT_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--no-judge-cache", action="store_true", help="Always call the judge"
+    )
+    parser.add_argument(
+        "--judge-image-max-edge",
+        type=int,
+        default=1024,
+        help="Downscale judge screenshots to this longest edge (default: 1024)",
+    )
+    parser.add_argument(
+        "--judge-image-preprocess",
+        action="store_true",
+        help="Downscale and re-encode judge screenshots instead of sending the "
+        "original full-size PNGs",
+    )
+    parser.add_argument(
+        "--prejudge",
+        action="store_true",
+        help="Decide clear-cut answers against data/reference_answer.json without the judge",
+    )
+    args = parser.parse_args()
+    args.dataset = resolve_dataset(args.dataset)
+    asyncio.run(rejudge(args))
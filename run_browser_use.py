@@ -3,23 +3,70 @@ import asyncio
 import json
 import logging
 import os
-import random
 import shutil
-from asyncio import Semaphore
+import socket
+from contextlib import nullcontext
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Generator, List, Literal, Set, TypedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Set,
+    TypedDict,
+)
 
-from browser_use import Agent, Browser, BrowserConfig
-from browser_use.browser.context import BrowserContextConfig
 from dotenv import load_dotenv
-from langchain_anthropic import ChatAnthropic
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import AzureChatOpenAI
-from pydantic import BaseModel, Field, SecretStr
+from pydantic import BaseModel, Field
 
-from evaluation.auto_eval_browser_use import auto_eval_by_gpt4o
+from evaluation import image_preprocess
+from evaluation.auto_eval_browser_use import evaluate_run
+from evaluation.image_preprocess import ImagePreprocessConfig
+from evaluation.reference_match import PreJudge
+from evaluation.verdict_cache import DEFAULT_CACHE_PATH, VerdictCache
+from harness.adaptive_concurrency import AIMDController, ConcurrencyLimiter
+from harness.coordinator import CoordinatorClient, CoordinatorServer
+from harness.datasets import DATASETS, Dataset, resolve_dataset
+from harness.deadlines import TaskTimeout, limit_step_time, with_deadline
+from harness.hedging import Hedger
+from harness import network_filter
+from harness.history_store import (
+    HISTORY_JSON,
+    SCREENSHOTS_DIR,
+    CompactHistory,
+    HistoryFormat,
+    ScreenshotStore,
+    StreamingHistory,
+)
+from harness.llm_dispatcher import LLMDispatcher
+from harness.network_filter import (
+    NETWORK_FILE,
+    NetworkFilter,
+    NetworkFilterConfig,
+    build_network_filter,
+)
+from harness.pipeline import Pipeline, Stage
+from harness.providers import PROVIDERS, get_llm_dispatcher
+from harness.results_journal import ResultsJournal, iter_journal, write_json_atomic
+from harness.run_ledger import LEDGER_FILE, RunLedger
+from harness.site_profiles import SiteProfiles, site_savings_report
+from harness.task_queue import TaskQueue
+from harness.task_scheduler import TaskOrder, TaskSource, load_durations, site_of
+from harness.tracing import AGENT, JUDGE, Tracer, format_rollup, load_traces, rollup
+
+if TYPE_CHECKING:
+    # The browser stack is imported when a task runs, so the coordinator
+    # and tools that only import from here start without it
+    from harness.browser_pool import BrowserPool
 
 load_dotenv()
 
@@ -30,7 +77,8 @@ class TaskData(TypedDict):
     ques: str
 
 
-EvalResult = Literal["success", "failed", "unknown"]
+# "timeout" marks tasks stopped by --task-timeout or --step-timeout
+EvalResult = Literal["success", "failed", "unknown", "timeout"]
 
 
 @dataclass
@@ -40,12 +88,15 @@ class RunStats:
     successful_tasks: Set[str] = field(default_factory=set)
     failed_tasks: Set[str] = field(default_factory=set)
     unknown_tasks: Set[str] = field(default_factory=set)
+    timeout_tasks: Set[str] = field(default_factory=set)
 
     def update(self, task_id: str, success: "EvalResult") -> None:
         if success == "success":
             self.successful_tasks.add(task_id)
         elif success == "failed":
             self.failed_tasks.add(task_id)
+        elif success == "timeout":
+            self.timeout_tasks.add(task_id)
         else:
             self.unknown_tasks.add(task_id)
 
@@ -62,6 +113,10 @@ class RunStats:
         print(
             f"Failed tasks ({len(self.failed_tasks)}): {sorted(list(self.failed_tasks))}"
         )
+        if self.timeout_tasks:
+            print(
+                f"Timed out tasks ({len(self.timeout_tasks)}): {sorted(self.timeout_tasks)}"
+            )
         print(f"Current success rate: {self.get_success_rate()}")
         print("==================\n")
 
@@ -77,6 +132,8 @@ class TaskResult(BaseModel):
     task_prompt: str
     final_answer: str
     gpt_4v_res: str
+    # Whether the task started from a warm site profile
+    warm_profile: bool = False
 
 
 class ExperimentResults(BaseModel):
@@ -84,6 +141,7 @@ class ExperimentResults(BaseModel):
     total_success: int = 0
     total_failed: int = 0
     total_unknown: int = 0
+    total_timeout: int = 0
     all_tasks: List[TaskResult] = Field(default_factory=list)
 
 
@@ -107,6 +165,7 @@ def create_task_result(
     num_steps: int,
     final_answer: str,
     gpt_4v_res: str,
+    warm_profile: bool = False,
 ) -> TaskResult:
     """Create task result object."""
     end_time = datetime.now()
@@ -121,6 +180,7 @@ def create_task_result(
         task_prompt=f"{task['ques']} on {task['web']}",
         final_answer=final_answer,
         gpt_4v_res=gpt_4v_res,
+        warm_profile=warm_profile,
     )
 
 
@@ -146,261 +206,752 @@ def print_task_progress(
     )
 
 
-def save_experiment_results(experiment_results: ExperimentResults) -> None:
-    """Save experiment results to file."""
-    with open("results/examples-browser-use/experiment_results.json", "w") as f:
-        json.dump(experiment_results.model_dump(), f, indent=2, default=str)
+def save_experiment_results(
+    experiment_results: ExperimentResults, results_dir: Path
+) -> None:
+    """Atomically snapshot experiment results to file."""
+    write_json_atomic(
+        results_dir / "experiment_results.json", experiment_results.model_dump()
+    )
+
+
+def restore_from_journal(
+    journal_path: Path,
+    task_ids: Set[str],
+    stats: RunStats,
+    experiment_results: ExperimentResults,
+) -> Set[str]:
+    """Rebuild run statistics from the results journal in one pass.
+
+    Returns the ids of tasks that already have a result.
+    """
+    latest: Dict[str, dict] = {}
+    for record in iter_journal(journal_path):
+        if record.get("task_id") in task_ids:
+            latest[record["task_id"]] = record
+    for record in latest.values():
+        add_task_result(TaskResult(**record), stats, experiment_results)
+    return set(latest)
 
 
 @dataclass
-class LLMModel:
-    model: AzureChatOpenAI
-    token_limit: int
-
-
-def get_llm_model_generator(
-    model_provider: str,
-) -> Generator[AzureChatOpenAI | ChatAnthropic, None, None]:
-    """Generator that creates fresh model instances each time"""
-    while True:
-        # Force reload environment variables
-        load_dotenv(override=True)
-
-        if model_provider == "anthropic":
-            # Create fresh instances each time, reading current env vars
-            yield ChatAnthropic(
-                model_name="claude-3-5-sonnet-20240620",
-                timeout=25,
-                stop=None,
-                temperature=0.0,
-            )
+class AgentRun:
+    task: TaskData
+    start_time: datetime
+    # Saved history; screenshots the judge needs are still in memory
+    history: CompactHistory
+    task_dir: Path
+    tracer: Optional[Tracer] = None
+    warm_profile: bool = False
+    # Stopped by a deadline; not judged
+    timed_out: bool = False
 
-        elif model_provider == "azure":
-            # Create fresh instances each time, reading current env vars
-            west_eu = LLMModel(
-                model=AzureChatOpenAI(
-                    model="gpt-4o",
-                    api_version="2024-10-21",
-                    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT_WEST_EU", ""),
-                    api_key=SecretStr(os.getenv("AZURE_OPENAI_API_KEY_WEST_EU", "")),
-                ),
-                token_limit=900,
-            )
-            east_us = LLMModel(
-                model=AzureChatOpenAI(
-                    model="gpt-4o",
-                    api_version="2024-10-21",
-                    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT_EAST_US", ""),
-                    api_key=SecretStr(os.getenv("AZURE_OPENAI_API_KEY_EAST_US", "")),
-                ),
-                token_limit=450,
-            )
-            east_us_2 = LLMModel(
-                model=AzureChatOpenAI(
-                    model="gpt-4o",
-                    api_version="2024-10-21",
-                    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT_EAST_US_2", ""),
-                    api_key=SecretStr(os.getenv("AZURE_OPENAI_API_KEY_EAST_US_2", "")),
-                ),
-                token_limit=450,
-            )
-            west_us = LLMModel(
-                model=AzureChatOpenAI(
-                    model="gpt-4o",
-                    api_version="2024-10-21",
-                    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT_WEST_US", ""),
-                    api_key=SecretStr(os.getenv("AZURE_OPENAI_API_KEY_WEST_US", "")),
-                ),
-                token_limit=450,
-            )
 
-            # Yield fresh instances in the same pattern
-            yield west_eu.model  # First 900
-            yield west_eu.model  # Second 900
-            yield east_us.model  # 450
-            yield east_us_2.model  # 450
-            yield west_us.model  # 450
-        elif model_provider == "google/gemini-1.5-flash":
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-1.5-flash",
-            )
-            yield llm
-        elif model_provider == "google/gemini-1.5-pro":
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-1.5-pro",
+async def run_agent(
+    task: TaskData,
+    dispatcher: LLMDispatcher,
+    results_dir: Path,
+    browser_pool: "BrowserPool",
+    trace: bool = False,
+    profiles: Optional[SiteProfiles] = None,
+    history_format: HistoryFormat = "compact",
+    task_timeout: Optional[float] = None,
+    step_timeout: Optional[float] = None,
+    dataset: Dataset = DATASETS["webvoyager"],
+) -> AgentRun | TaskResult:
+    """Run the browser agent for a task, or load its result if already done.
+
+    A task that runs past `task_timeout`, or has a step that runs past
+    `step_timeout`, is cancelled and comes back with `timed_out` set and the
+    history up to that point.
+    """
+    from browser_use import Agent
+
+    task_dir = results_dir / f"{task['id']}"
+    task_dir.mkdir(exist_ok=True)
+    if (task_dir / "task_result.json").exists():
+        return TaskResult(**json.load(open(task_dir / "task_result.json")))
+
+    task_str = dataset.prompt(task)
+    start_time = datetime.now()
+    logging.getLogger("browser_use").setLevel(logging.INFO)
+    tracer = Tracer(task["id"]) if trace else None
+    profile = profiles.lease(site_of(task), task["id"]) if profiles is not None else None
+
+    history = None
+    stream = None
+    network_stats = None
+    timed_out = False
+    try:
+        with dispatcher.lease() as llm:
+            async with browser_pool.context(
+                storage_state=profile.storage_state if profile is not None else None,
+                capture_state_to=profile.capture_to if profile is not None else None,
+            ) as browser_context:
+                agent = Agent(
+                    task=task_str,
+                    llm=llm,
+                    browser_context=browser_context,
+                    validate_output=True,
+                    generate_gif=False,
+                )
+                if history_format == "compact":
+                    stream = StreamingHistory(
+                        task_dir, ScreenshotStore(results_dir / SCREENSHOTS_DIR)
+                    )
+                    stream.attach(agent)
+                limit_step_time(agent, step_timeout)
+                if tracer is not None:
+                    tracer.instrument_agent(agent, browser_context)
+
+                with tracer.span(AGENT) if tracer is not None else nullcontext():
+                    try:
+                        history = await with_deadline(
+                            agent.run(max_steps=30), task_timeout, "task"
+                        )
+                    except TaskTimeout as e:
+                        logging.warning(f"Task {task['id']} timed out: {e}")
+                        timed_out = True
+                        history = agent.history
+            network_stats = browser_context.network_stats
+    finally:
+        if profile is not None:
+            profiles.release(profile, finished=history is not None and history.is_done())
+        if stream is not None and history is None:
+            stream.abort()
+    if stream is not None:
+        saved_history = stream.finish(history)
+    else:
+        history.save_to_file(task_dir / HISTORY_JSON)
+        saved_history = CompactHistory(history.model_dump()["history"], None)
+    if network_stats is not None:
+        network_filter.totals.add(network_stats)
+        write_json_atomic(task_dir / NETWORK_FILE, network_stats.to_dict())
+    return AgentRun(
+        task=task,
+        start_time=start_time,
+        history=saved_history,
+        task_dir=task_dir,
+        tracer=tracer,
+        warm_profile=profile is not None and profile.warm,
+        timed_out=timed_out,
+    )
+
+
+async def judge_agent_run(
+    run: AgentRun,
+    dispatcher: LLMDispatcher,
+    judge_cache: Optional[VerdictCache] = None,
+    image_config: Optional[ImagePreprocessConfig] = None,
+    prejudge: Optional[PreJudge] = None,
+    dataset: Dataset = DATASETS["webvoyager"],
+) -> TaskResult:
+    """Evaluate a finished agent run, with the judge model unless the answer is clear-cut.
+
+    Datasets with exact-match scoring compare the final answer with the
+    expected one and never call the judge.
+    """
+    task = run.task
+    tracer = run.tracer
+    if run.timed_out:
+        eval_result, gpt_4v_res = "timeout", ""
+    else:
+        with tracer.span(JUDGE) if tracer is not None else nullcontext():
+            eval_result, gpt_4v_res = await evaluate_run(
+                task,
+                run.history,
+                dataset,
+                dispatcher,
+                cache=judge_cache,
+                image_config=image_config,
+                prejudge=prejudge,
             )
-            yield llm
-        elif model_provider == "google/gemini-1.5-flash-8b":
-            llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-8b")
-            yield llm
-        else:
-            raise ValueError(f"Invalid model provider: {model_provider}")
+    if tracer is not None:
+        tracer.save(run.task_dir)
+    return create_task_result(
+        task,
+        run.start_time,
+        eval_result,
+        len(run.history),
+        run.history.final_result() or "<NO FINAL ANSWER>",
+        gpt_4v_res,
+        warm_profile=run.warm_profile,
+    )
+
+
+def persist_task_result(task_result: TaskResult, results_dir: Path) -> None:
+    """Write the task result unless it was loaded from an earlier run."""
+    task_dir = results_dir / task_result.task_id
+    if not (task_dir / "task_result.json").exists():
+        save_results(task_result, task_dir)
+
+
+def add_task_result(
+    task_result: TaskResult,
+    stats: RunStats,
+    experiment_results: ExperimentResults,
+) -> None:
+    """Fold a completed task into the run statistics."""
+    eval_result = task_result.success
+    stats.current_task += 1
+    stats.update(task_result.task_id, eval_result)
+
+    # Update experiment results
+    experiment_results.all_tasks.append(task_result)
+    experiment_results.total_tasks += 1
+    experiment_results.total_success += int(eval_result == "success")
+    experiment_results.total_failed += int(eval_result == "failed")
+    experiment_results.total_unknown += int(eval_result == "unknown")
+    experiment_results.total_timeout += int(eval_result == "timeout")
+
+
+def record_task_result(
+    task_result: TaskResult,
+    stats: RunStats,
+    experiment_results: ExperimentResults,
+) -> None:
+    """Update run statistics with a completed task and print progress."""
+    add_task_result(task_result, stats, experiment_results)
+    print_task_progress(
+        task_result.task_id, task_result.num_steps, task_result.success, stats
+    )
+
+    print(f"Current task: {stats.current_task}")
+    print(f"Total tasks: {stats.total_tasks}")
+    print(f"Success rate: {stats.get_success_rate()}")
+    stats.print_periodic_summary()
+
+
+def record_task_error(task: TaskData, error: Exception, stats: RunStats) -> None:
+    logging.error(f"Error processing task {task['id']}: {str(error)}")
+    stats.current_task += 1
+    stats.update(task["id"], "failed")  # Mark as failed instead of crashing
 
 
 async def process_single_task(
     task: TaskData,
-    client: AzureChatOpenAI | ChatAnthropic,
+    dispatcher: LLMDispatcher,
     stats: RunStats,
     results_dir: Path,
     experiment_results: ExperimentResults,
-    browser: Browser,
+    browser_pool: "BrowserPool",
+    judge_cache: Optional[VerdictCache] = None,
+    image_config: Optional[ImagePreprocessConfig] = None,
+    trace: bool = False,
+    history_format: HistoryFormat = "compact",
+    task_timeout: Optional[float] = None,
+    step_timeout: Optional[float] = None,
+    prejudge: Optional[PreJudge] = None,
+    dataset: Dataset = DATASETS["webvoyager"],
 ) -> None:
-    """Process a single task asynchronously."""
-    task_str = f"{task['ques']} on {task['web']}"
-    start_time = datetime.now()
-    task_dir = results_dir / f"{task['id']}"
-    task_dir.mkdir(exist_ok=True)
-
+    """Process a single task end to end without pipelining."""
     try:
-        if not (task_dir / "task_result.json").exists():
-            logging.getLogger("browser_use").setLevel(logging.INFO)
-
-            agent = Agent(
-                task=task_str,
-                llm=client,
-                browser=browser,
-                validate_output=True,
-                generate_gif=False,
+        outcome = await run_agent(
+            task,
+            dispatcher,
+            results_dir,
+            browser_pool,
+            trace,
+            history_format=history_format,
+            task_timeout=task_timeout,
+            step_timeout=step_timeout,
+            dataset=dataset,
+        )
+        if isinstance(outcome, AgentRun):
+            task_result = await judge_agent_run(
+                outcome, dispatcher, judge_cache, image_config, prejudge, dataset
             )
+        else:
+            task_result = outcome
+        persist_task_result(task_result, results_dir)
+        record_task_result(task_result, stats, experiment_results)
+    except Exception as e:
+        record_task_error(task, e, stats)
+
+
+@dataclass
+class RunConfig:
+    max_concurrent_tasks: int = 3
+    model_provider: str = "azure"
+    browser_recycle_tasks: int = 50
+    browser_max_rss_mb: int = 2048
+    judge_cache_path: Optional[Path] = DEFAULT_CACHE_PATH
+    judge_concurrency: int = 8
+    judge_queue_size: int = 64
+    judge_image_config: ImagePreprocessConfig = field(
+        default_factory=ImagePreprocessConfig
+    )
+    prejudge: bool = False
+    snapshot_every: int = 25
+    dataset: Dataset = DATASETS["webvoyager"]
+    results_dir: Path = Path("results/examples-browser-use")
+    task_sites: Optional[Set[str]] = None
+    task_ids: Optional[Set[str]] = None
+    task_limit: Optional[int] = None
+    task_order: TaskOrder = "shuffle"
+    durations_from: List[Path] = field(default_factory=list)
+    lookahead: int = 2
+    trace: bool = False
+    adaptive_concurrency: bool = False
+    site_profiles_dir: Optional[Path] = None
+    site_profile_max_uses: int = 50
+    network_filter: Optional[NetworkFilterConfig] = None
+    history_format: HistoryFormat = "compact"
+    retry_errored: bool = False
+    max_attempts: int = 3
+    task_timeout: Optional[float] = None
+    step_timeout: Optional[float] = None
+    hedge: bool = False
+    hedge_quantile: float = 95.0
+    min_concurrent_tasks: int = 1
+    # Upper bound of the adaptive controller, which starts at the floor
+    max_concurrent_ceiling: int = 12
+    concurrency_interval: float = 30.0
+
+
+def load_tasks(config: RunConfig) -> TaskSource:
+    """Selected tasks of the dataset without its excluded ones, in run order."""
+    durations = None
+    if config.task_order == "longest-first":
+        # This run's own journal last, so its timings win over older runs
+        durations = load_durations([*config.durations_from, config.results_dir])
+        print(f"Ordering by past duration of {len(durations)} tasks")
+
+    return TaskSource(
+        config.dataset.path,
+        exclude_ids=config.dataset.exclude_ids(),
+        sites=config.task_sites,
+        ids=config.task_ids,
+        limit=config.task_limit,
+        order=config.task_order,
+        seed=42,
+        durations=durations,
+    )
+
+
+def concurrency_ceiling(config: RunConfig) -> int:
+    """Most agent tasks that may ever run at once, and so the browser slots."""
+    if config.adaptive_concurrency:
+        return max(config.max_concurrent_ceiling, config.min_concurrent_tasks)
+    return config.max_concurrent_tasks
+
+
+def build_browser_pool(config: RunConfig) -> "BrowserPool":
+    """One long-lived browser per concurrency slot, fresh context per task.
 
-            history = await agent.run(max_steps=30)
-            history.save_to_file(task_dir / "history.json")
+    With adaptive concurrency there is a slot per task up to the ceiling;
+    browsers are only launched once that many tasks actually run.
+    """
+    from browser_use import BrowserConfig
+    from browser_use.browser.context import BrowserContextConfig
 
-            eval_result, gpt_4v_res = await auto_eval_by_gpt4o(
-                task=task_str,
-                openai_client=client,
-                history=history,
+    from harness.browser_pool import BrowserPool
+
+    return BrowserPool(
+        size=concurrency_ceiling(config),
+        browser_config=BrowserConfig(
+            headless=True,
+            disable_security=True,
+        ),
+        context_config=BrowserContextConfig(
+            disable_security=True,
+            wait_for_network_idle_page_load_time=5,
+            maximum_wait_page_load_time=20,
+            # no_viewport=True,
+            browser_window_size={
+                "width": 1280,
+                "height": 1100,
+            },
+            # trace_path=str(results_dir / f"{task['id']}"),
+        ),
+        max_tasks_per_browser=config.browser_recycle_tasks,
+        max_rss_mb=config.browser_max_rss_mb or None,
+        network_filter=(
+            NetworkFilter(config.network_filter) if config.network_filter is not None else None
+        ),
+    )
+
+
+async def run_tasks(
+    config: RunConfig,
+    tasks: Iterable[TaskData] | AsyncIterable[TaskData],
+    on_result: Callable[[TaskResult], Awaitable[None]],
+    on_error: Callable[[TaskData, Exception], Awaitable[None]],
+    agent_queue_size: int = 64,
+    on_start: Optional[Callable[[TaskData], None]] = None,
+    persist: bool = True,
+) -> None:
+    """Run tasks through the agent -> judge -> persist pipeline.
+
+    With `persist` False, `task_result.json` is left to `on_result`.
+    """
+    browser_pool = None
+    judge_cache = None
+    prejudge = None
+    controller = None
+    controller_task = None
+    hedger = None
+    hedger_task = None
+    results_dir = config.results_dir
+    results_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        dispatcher = get_llm_dispatcher(config.model_provider)
+        if config.judge_cache_path is not None:
+            judge_cache = VerdictCache(config.judge_cache_path)
+        if config.prejudge:
+            prejudge = PreJudge.load()
+        browser_pool = build_browser_pool(config)
+        profiles = None
+        if config.site_profiles_dir is not None:
+            profiles = SiteProfiles(
+                config.site_profiles_dir, max_uses=config.site_profile_max_uses
             )
 
-            task_result = create_task_result(
-                task,
-                start_time,
-                eval_result,
-                len(history.history),
-                history.final_result() or "<NO FINAL ANSWER>",
-                gpt_4v_res,
+        # The agent stage has a worker per slot up to the ceiling
+        # (--max-concurrent, or --max-concurrent-ceiling when adaptive); the
+        # limiter decides how many of them may run
+        ceiling = concurrency_ceiling(config)
+        if config.adaptive_concurrency:
+            floor = min(config.min_concurrent_tasks, ceiling)
+            # Start low and let the controller find out how far it can go
+            limiter = ConcurrencyLimiter(floor)
+            controller = AIMDController(
+                limiter,
+                floor=floor,
+                ceiling=ceiling,
+                dispatcher=dispatcher,
+                log_path=results_dir / "concurrency.jsonl",
+                interval=config.concurrency_interval,
+                # Free the memory of browsers the lower limit no longer needs
+                on_decrease=browser_pool.close_idle,
             )
-            save_results(task_result, task_dir)
+            controller_task = asyncio.create_task(controller.run())
         else:
-            task_result = TaskResult(**json.load(open(task_dir / "task_result.json")))
-            eval_result = task_result.success
-
-        stats.update(task["id"], eval_result)
-        print_task_progress(task["id"], task_result.num_steps, eval_result, stats)
-
-        # Update experiment results
-        experiment_results.all_tasks.append(task_result)
-        experiment_results.total_tasks += 1
-        experiment_results.total_success += int(eval_result == "success")
-        experiment_results.total_failed += int(eval_result == "failed")
-        experiment_results.total_unknown += int(eval_result == "unknown")
-        # save curent stats to file
-        print(f"Saving stats to file {stats.current_task} {stats.get_success_rate()}")
-        # with open(file="results/examples-browser-use/aaa_stats.txt", mode="a") as f:
-        #     # in one line
-        #     f.write(f"{stats.current_task}\n")
-        #     f.write(f"{stats.get_success_rate()}\n")
+            limiter = ConcurrencyLimiter(ceiling)
 
-    except Exception as e:
-        logging.error(f"Error processing task {task['id']}: {str(e)}")
-        stats.update(task["id"], "failed")  # Mark as failed instead of crashing
-        return
+        if config.hedge:
+            # The tail: nothing left to start, so spare slots can go to
+            # duplicates of the slowest tasks
+            hedger = Hedger(
+                capacity=lambda: limiter.limit,
+                is_tail=lambda: pipeline.source_exhausted and pipeline.stages[0].depth() == 0,
+                is_final=lambda outcome: not (isinstance(outcome, AgentRun) and outcome.timed_out),
+                quantile=config.hedge_quantile,
+            )
+            hedger_task = asyncio.create_task(hedger.monitor())
+
+        def attempt(task: TaskData) -> Callable[[int], Awaitable[AgentRun | TaskResult]]:
+            async def run_attempt(index: int) -> AgentRun | TaskResult:
+                return await run_agent(
+                    task,
+                    dispatcher,
+                    results_dir,
+                    browser_pool,
+                    config.trace,
+                    profiles,
+                    config.history_format,
+                    config.task_timeout,
+                    config.step_timeout,
+                    config.dataset,
+                )
+
+            return run_attempt
+
+        # Browsers are only held by the agent stage; judging and saving
+        # happen downstream so a slow judge never idles a browser
+        async def agent_stage(task: TaskData) -> Optional[AgentRun | TaskResult]:
+            print(f"\n=== Now at task {task['id']} ===")
+            if on_start is not None:
+                on_start(task)
+            try:
+                if hedger is not None:
+                    outcome = await hedger.run(task["id"], attempt(task))
+                else:
+                    outcome = await attempt(task)(0)
+            except Exception as e:
+                if controller is not None:
+                    controller.record_outcome(ok=False)
+                await on_error(task, e)
+                return None
+            if controller is not None:
+                controller.record_outcome(ok=True)
+            return outcome
 
+        async def judge_stage(outcome: AgentRun | TaskResult) -> Optional[TaskResult]:
+            if isinstance(outcome, TaskResult):
+                return outcome
+            try:
+                return await judge_agent_run(
+                    outcome,
+                    dispatcher,
+                    judge_cache,
+                    config.judge_image_config,
+                    prejudge,
+                    config.dataset,
+                )
+            except Exception as e:
+                await on_error(outcome.task, e)
+                return None
+
+        persisted = 0
+
+        async def persist_stage(task_result: TaskResult) -> None:
+            nonlocal persisted
+            if persist:
+                persist_task_result(task_result, results_dir)
+            await on_result(task_result)
+            persisted += 1
+            if persisted % 25 == 0:
+                print(f"{persisted} tasks done. {dispatcher.summary()}")
+                print(pipeline.summary())
+
+        pipeline = Pipeline(
+            [
+                Stage(
+                    "agent",
+                    agent_stage,
+                    concurrency=ceiling,
+                    queue_size=agent_queue_size,
+                    limiter=limiter,
+                ),
+                Stage(
+                    "judge",
+                    judge_stage,
+                    concurrency=config.judge_concurrency,
+                    queue_size=config.judge_queue_size,
+                ),
+                Stage("persist", persist_stage, concurrency=1),
+            ]
+        )
+        await pipeline.run(tasks)
+        print(dispatcher.summary())
+        print(pipeline.summary())
     finally:
-        await browser.close()
+        if controller_task is not None:
+            controller_task.cancel()
+            await asyncio.gather(controller_task, return_exceptions=True)
+            print(controller.summary())
+        if hedger_task is not None:
+            hedger_task.cancel()
+            await asyncio.gather(hedger_task, return_exceptions=True)
+            print(hedger.summary())
+        if browser_pool is not None:
+            print(browser_pool.stats.summary())
+            await browser_pool.close()
+        if judge_cache is not None:
+            print(judge_cache.summary())
+            judge_cache.close()
+        if prejudge is not None:
+            print(prejudge.summary())
+        print(image_preprocess.totals.summary())
+        if config.network_filter is not None:
+            print(network_filter.totals.summary())
+        if config.trace:
+            print(format_rollup(rollup(load_traces(results_dir))))
+
+
+def open_run(
+    config: RunConfig, tasks: Iterable[TaskData]
+) -> tuple[RunStats, ExperimentResults, ResultsJournal, Set[str]]:
+    """Restore run statistics from the journal and open it for appending."""
+    task_ids = {task["id"] for task in tasks}
+    experiment_results = ExperimentResults()
+    stats = RunStats(total_tasks=len(task_ids))
+    config.results_dir.mkdir(parents=True, exist_ok=True)
+
+    # Resume from the journal instead of re-reading every task directory
+    journal_path = config.results_dir / "results.jsonl"
+    done_ids = restore_from_journal(journal_path, task_ids, stats, experiment_results)
+    if done_ids:
+        print(f"Restored {len(done_ids)} results from {journal_path}")
+    return stats, experiment_results, ResultsJournal(journal_path), done_ids
+
+
+def finish_task(
+    task_result: TaskResult,
+    config: RunConfig,
+    stats: RunStats,
+    experiment_results: ExperimentResults,
+    journal: ResultsJournal,
+) -> None:
+    journal.append(task_result.model_dump(mode="json"))
+    record_task_result(task_result, stats, experiment_results)
+    if journal.appended % config.snapshot_every == 0:
+        save_experiment_results(experiment_results, config.results_dir)
 
 
-async def main(max_concurrent_tasks: int, model_provider: str) -> None:
+def select_pending(
+    config: RunConfig, tasks: TaskSource, ledger: RunLedger, done_ids: Set[str]
+) -> Iterable[TaskData]:
+    """Tasks this run should start, judged from one read of the ledger.
+
+    Normally these are tasks never started or cut off mid-run; tasks that
+    raised are left alone. With --retry-errored only tasks that hit an
+    infrastructure error (or were cut off) and have attempts left are rerun.
+    """
+    ledger.register(task["id"] for task in tasks)
+    ledger.mark_done(done_ids)
+    entries = ledger.entries()
+    print(ledger.summary())
+    if config.retry_errored:
+        retry_ids = {
+            task_id
+            for task_id, entry in entries.items()
+            if entry.retryable and entry.attempts < config.max_attempts
+        }
+        print(f"Retrying {len(retry_ids)} tasks with infrastructure errors")
+        return (task for task in tasks if task["id"] in retry_ids)
+    errored = sum(1 for entry in entries.values() if entry.state == "errored")
+    if errored:
+        print(f"Skipping {errored} errored tasks; rerun them with --retry-errored")
+    return (
+        task for task in tasks if entries[task["id"]].state in ("queued", "running")
+    )
+
+
+async def main(config: RunConfig) -> None:
+    journal = None
+    ledger = None
     try:
         # Setup
         cleanup_webdriver_cache()
-        semaphore = Semaphore(max_concurrent_tasks)
-
-        # Load tasks
-        tasks: List[TaskData] = []
-        with open("data/WebVoyager_data.jsonl", "r") as f:
-            for line in f:
-                tasks.append(json.loads(line))
-
-        # remove impossible tasks
-        with open("data/WebVoyagerImpossibleTasks.json", "r") as f:
-            impossible_tasks = set(json.load(f))
-        tasks = [task for task in tasks if task["id"] not in impossible_tasks]
-
-        # randomize the order of tasks
-        random.seed(42)
-        random.shuffle(tasks)
-
-        # Initialize
-
-        experiment_results = ExperimentResults()
-        stats = RunStats(total_tasks=len(tasks))
-        results_dir = Path("results/examples-browser-use")
-        results_dir.mkdir(parents=True, exist_ok=True)
-
-        # Process tasks concurrently with semaphore
-        async def process_with_semaphore(
-            task: TaskData, client: AzureChatOpenAI | ChatAnthropic
-        ) -> None:
-            async with semaphore:
-                print(f"\n=== Now at task {task['id']} ===")
-
-                # Create browser instance inside the semaphore block
-                browser = Browser(
-                    config=BrowserConfig(
-                        headless=True,
-                        disable_security=True,
-                        new_context_config=BrowserContextConfig(
-                            disable_security=True,
-                            wait_for_network_idle_page_load_time=5,
-                            maximum_wait_page_load_time=20,
-                            # no_viewport=True,
-                            browser_window_size={
-                                "width": 1280,
-                                "height": 1100,
-                            },
-                            # trace_path=str(results_dir / f"{task['id']}"),
-                        ),
-                    )
-                )
+        tasks = load_tasks(config)
+        stats, experiment_results, journal, done_ids = open_run(config, tasks)
+        ledger = RunLedger(config.results_dir / LEDGER_FILE)
+        # Tasks are pulled one at a time as agent slots free up
+        pending = select_pending(config, tasks, ledger, done_ids)
 
-                await process_single_task(
-                    task,
-                    client,
-                    stats,
-                    results_dir,
-                    experiment_results,
-                    browser,  # Pass browser instance
-                )
-                stats.current_task += 1
-
-                # Add this to ensure browser is always closed
-                try:
-                    await browser.close()
-                except Exception as e:
-                    logging.error(f"Error closing browser: {e}")
-
-                print(f"Current task: {stats.current_task}")
-                print(f"Total tasks: {stats.total_tasks}")
-                print(f"Success rate: {stats.get_success_rate()}")
-                # if stats.current_task % max_concurrent_tasks == 0:
-                stats.print_periodic_summary()
-                save_experiment_results(experiment_results)
-
-        # Create and run all tasks
-        all_tasks = []
-        for i, task in enumerate(tasks):
-            model = next(get_llm_model_generator(model_provider))
-            all_tasks.append(process_with_semaphore(task, model))
-
-        # Add timeout and better error handling
-        await asyncio.gather(*all_tasks, return_exceptions=True)
+        def on_start(task: TaskData) -> None:
+            ledger.start(task["id"])
+
+        async def on_result(task_result: TaskResult) -> None:
+            finish_task(task_result, config, stats, experiment_results, journal)
+            ledger.finish(task_result.task_id, task_result.success)
+
+        async def on_error(task: TaskData, error: Exception) -> None:
+            record_task_error(task, error, stats)
+            ledger.fail(task["id"], error)
+
+        await run_tasks(
+            config,
+            pending,
+            on_result,
+            on_error,
+            agent_queue_size=config.lookahead,
+            on_start=on_start,
+        )
     except Exception as e:
         logging.error(f"Main loop error: {e}")
     finally:
         # Cleanup code here
         logging.info("Shutting down...")
         stats.print_periodic_summary()
+        if journal is not None:
+            journal.close()
+            save_experiment_results(experiment_results, config.results_dir)
+            if config.site_profiles_dir is not None:
+                print(site_savings_report(experiment_results.all_tasks))
+        if ledger is not None:
+            print(ledger.summary())
+            ledger.close()
+
+
+def run_coordinator(
+    config: RunConfig, listen: str, lease_seconds: float, max_attempts: int
+) -> None:
+    """Serve the task queue to workers and merge their results into one run."""
+    tasks = load_tasks(config)
+    stats, experiment_results, journal, done_ids = open_run(config, tasks)
+    queue = TaskQueue(config.results_dir / "queue.sqlite")
+    queue.enqueue((task["id"], task) for task in tasks)
+    # The journal is the record of truth; close tasks it already has
+    queue.mark_done(done_ids)
+
+    def on_result(task_id: str, result: Dict[str, Any]) -> None:
+        task_result = TaskResult(**result)
+        # Only accepted results get here, and workers do not write their own,
+        # so the file always matches the journal
+        task_dir = config.results_dir / task_id
+        task_dir.mkdir(parents=True, exist_ok=True)
+        save_results(task_result, task_dir)
+        finish_task(task_result, config, stats, experiment_results, journal)
+        print(f"Queue: {queue.counts()}")
+
+    def on_error(task_id: str, error: str) -> None:
+        record_task_error(queue.payload(task_id), RuntimeError(error), stats)
+
+    host, port = listen.rsplit(":", 1)
+    server = CoordinatorServer(
+        (host, int(port)),
+        queue,
+        on_result,
+        on_error,
+        lease_seconds=lease_seconds,
+        max_attempts=max_attempts,
+    )
+    print(f"Coordinator serving {queue.remaining()} tasks on {listen}")
+    try:
+        server.serve_until_finished()
+    finally:
+        stats.print_periodic_summary()
+        print(f"Leases per worker: {queue.workers()}")
+        journal.close()
+        save_experiment_results(experiment_results, config.results_dir)
+        queue.close()
+
+
+async def run_worker(
+    config: RunConfig,
+    coordinator_url: str,
+    worker_id: str,
+    heartbeat_seconds: float,
+    poll_seconds: float = 10,
+    max_unreachable_polls: int = 6,
+) -> None:
+    """Pull tasks from a coordinator until it has none left."""
+    client = CoordinatorClient(coordinator_url, worker_id)
+    heartbeat = asyncio.create_task(client.heartbeat_forever(heartbeat_seconds))
+
+    async def leased_tasks() -> AsyncIterator[TaskData]:
+        unreachable = 0
+        while True:
+            try:
+                lease = await client.lease()
+                unreachable = 0
+            except Exception as e:
+                unreachable += 1
+                logging.warning(f"Could not reach coordinator: {e}")
+                if unreachable >= max_unreachable_polls:
+                    return
+                lease = None
+            if lease is not None:
+                yield lease.task
+            elif client.finished:
+                return
+            else:
+                # Everything left is leased elsewhere; wait for expiries
+                await asyncio.sleep(poll_seconds)
+
+    async def on_result(task_result: TaskResult) -> None:
+        accepted = await client.complete(
+            task_result.task_id, task_result.model_dump(mode="json")
+        )
+        print(f"Task {task_result.task_id}: {task_result.success} (accepted: {accepted})")
+
+    async def on_error(task: TaskData, error: Exception) -> None:
+        logging.error(f"Error processing task {task['id']}: {str(error)}")
+        await client.fail(task["id"], f"{type(error).__name__}: {error}")
+
+    try:
+        cleanup_webdriver_cache()
+        # Lease only as fast as browsers free up so idle workers can steal.
+        # The coordinator writes task_result.json once it accepts a result;
+        # a rejected duplicate written here could win on a shared results dir
+        await run_tasks(
+            config, leased_tasks(), on_result, on_error, agent_queue_size=1, persist=False
+        )
+    finally:
+        heartbeat.cancel()
 
 
 if __name__ == "__main__":
@@ -412,26 +963,337 @@ if __name__ == "__main__":
             "--max-concurrent",
             type=int,
             default=3,
-            help="Maximum number of concurrent tasks (default: 3)",
+            help="Maximum number of concurrent browser tasks (default: 3)",
         )
         parser.add_argument(
             "--model-provider",
             type=str,
             default="azure",
             help="Model provider (default: azure)",
-            choices=[
-                "azure",
-                "anthropic",
-                "google/gemini-1.5-flash",
-                "google/gemini-1.5-flash-8b",
-                "google/gemini-1.5-pro",
-            ],
+            choices=list(PROVIDERS),
+        )
+        parser.add_argument(
+            "--browser-recycle-tasks",
+            type=int,
+            default=50,
+            help="Relaunch a pooled browser after this many tasks (default: 50)",
+        )
+        parser.add_argument(
+            "--browser-max-rss-mb",
+            type=int,
+            default=2048,
+            help="Relaunch a pooled browser above this RSS in MB, 0 to disable (default: 2048)",
+        )
+        parser.add_argument(
+            "--judge-concurrent",
+            type=int,
+            default=8,
+            help="Maximum number of concurrent judge calls (default: 8)",
+        )
+        parser.add_argument(
+            "--judge-queue-size",
+            type=int,
+            default=64,
+            help="Finished agent runs allowed to wait for the judge (default: 64)",
+        )
+        parser.add_argument(
+            "--judge-cache",
+            type=Path,
+            default=DEFAULT_CACHE_PATH,
+            help=f"Judge verdict cache file (default: {DEFAULT_CACHE_PATH})",
+        )
+        parser.add_argument(
+            "--no-judge-cache",
+            action="store_true",
+            help="Always call the judge, bypassing the verdict cache",
+        )
+        parser.add_argument(
+            "--prejudge",
+            action="store_true",
+            help="Decide clear-cut answers against the golden answers in "
+            "data/reference_answer.json without calling the judge",
+        )
+        parser.add_argument(
+            "--snapshot-every",
+            type=int,
+            default=25,
+            help="Rewrite experiment_results.json every N tasks (default: 25)",
+        )
+        parser.add_argument(
+            "--judge-image-max-edge",
+            type=int,
+            default=1024,
+            help="Downscale judge screenshots to this longest edge (default: 1024)",
+        )
+        parser.add_argument(
+            "--judge-image-format",
+            type=str,
+            default="jpeg",
+            choices=["jpeg", "webp", "png"],
+            help="Re-encode judge screenshots as this format (default: jpeg)",
+        )
+        parser.add_argument(
+            "--judge-image-quality",
+            type=int,
+            default=75,
+            help="JPEG/WebP quality for judge screenshots (default: 75)",
+        )
+        parser.add_argument(
+            "--no-judge-image-crop",
+            action="store_true",
+            help="Keep top/bottom bands that are identical across screenshots",
+        )
+        parser.add_argument(
+            "--judge-image-preprocess",
+            action="store_true",
+            help="Downscale and re-encode judge screenshots instead of sending the "
+            "original full-size PNGs",
+        )
+        parser.add_argument(
+            "--coordinator",
+            metavar="HOST:PORT",
+            help="Serve the task queue to workers instead of running tasks",
+        )
+        parser.add_argument(
+            "--worker",
+            metavar="URL",
+            help="Run tasks leased from the coordinator at URL",
+        )
+        parser.add_argument(
+            "--worker-id",
+            type=str,
+            default=f"{socket.gethostname()}-{os.getpid()}",
+            help="Worker name reported to the coordinator (default: host-pid)",
+        )
+        parser.add_argument(
+            "--lease-seconds",
+            type=float,
+            default=300,
+            help="Coordinator lease length; renewed by worker heartbeats (default: 300)",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=3,
+            help="Attempts per task before it counts as failed, for the coordinator "
+            "and --retry-errored (default: 3)",
+        )
+        parser.add_argument(
+            "--retry-errored",
+            action="store_true",
+            help="Only rerun tasks that hit browser, network or API errors in earlier runs",
+        )
+        parser.add_argument(
+            "--filter-site",
+            nargs="+",
+            metavar="SITE",
+            help="Only run tasks on these sites, e.g. Allrecipes 'Google Map'",
+        )
+        parser.add_argument(
+            "--ids",
+            nargs="+",
+            metavar="TASK_ID",
+            help="Only run these task ids",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Run at most this many of the selected tasks",
+        )
+        parser.add_argument(
+            "--order",
+            type=str,
+            default="shuffle",
+            choices=["shuffle", "file", "longest-first", "site"],
+            help="Task order; longest-first uses past durations (default: shuffle)",
+        )
+        parser.add_argument(
+            "--durations-from",
+            nargs="+",
+            type=Path,
+            default=[],
+            metavar="RUN",
+            help="Run directories or journals to take past durations from",
+        )
+        parser.add_argument(
+            "--lookahead",
+            type=int,
+            default=2,
+            help="Tasks read ahead of the busy agent slots (default: 2)",
+        )
+        parser.add_argument(
+            "--trace",
+            action="store_true",
+            help="Time LLM calls, actions, page loads, screenshots and the judge per step",
+        )
+        parser.add_argument(
+            "--adaptive-concurrency",
+            action="store_true",
+            help="Tune the number of running tasks between --min-concurrent and "
+            "--max-concurrent-ceiling, starting at --min-concurrent",
+        )
+        parser.add_argument(
+            "--max-concurrent-ceiling",
+            type=int,
+            default=12,
+            help="Highest concurrency the adaptive controller raises to; --max-concurrent "
+            "is ignored with --adaptive-concurrency (default: 12)",
+        )
+        parser.add_argument(
+            "--min-concurrent",
+            type=int,
+            default=1,
+            help="Lowest concurrency the adaptive controller backs off to (default: 1)",
+        )
+        parser.add_argument(
+            "--concurrency-interval",
+            type=float,
+            default=30,
+            help="Seconds between adaptive concurrency decisions (default: 30)",
+        )
+        parser.add_argument(
+            "--site-affinity",
+            action="store_true",
+            help="Group tasks by site and start them from warm per-site browser profiles",
+        )
+        parser.add_argument(
+            "--site-profile-max-uses",
+            type=int,
+            default=50,
+            help="Recapture a site profile after this many warm tasks (default: 50)",
+        )
+        parser.add_argument(
+            "--network-filter",
+            action="store_true",
+            help="Block ad/analytics domains and --block-resource-types requests",
+        )
+        parser.add_argument(
+            "--block-resource-types",
+            nargs="+",
+            default=["media"],
+            metavar="TYPE",
+            help="Playwright resource types the network filter aborts (default: media)",
+        )
+        parser.add_argument(
+            "--block-domains-file",
+            nargs="+",
+            type=Path,
+            default=[],
+            metavar="FILE",
+            help="Files of extra domains to block, one per line",
+        )
+        parser.add_argument(
+            "--asset-cache",
+            type=Path,
+            metavar="DIR",
+            help="Serve fonts and stylesheets from this cache when filtering the network",
+        )
+        parser.add_argument(
+            "--history-format",
+            type=str,
+            default="compact",
+            choices=["compact", "json"],
+            help="Save agent histories as history.jsonl.gz plus a shared screenshot "
+            "store, or as one history.json (default: compact)",
+        )
+        parser.add_argument(
+            "--task-timeout",
+            type=float,
+            default=0,
+            help="Stop a task after this many seconds and record it as timeout, 0 for no "
+            "limit (default: 0)",
+        )
+        parser.add_argument(
+            "--step-timeout",
+            type=float,
+            default=0,
+            help="Stop a task whose agent step runs this many seconds, 0 for no limit "
+            "(default: 0)",
+        )
+        parser.add_argument(
+            "--hedge",
+            action="store_true",
+            help="At the end of a run, start a duplicate of stragglers on free slots",
+        )
+        parser.add_argument(
+            "--hedge-quantile",
+            type=float,
+            default=95,
+            help="Hedge tasks running longer than this percentile of task durations "
+            "(default: 95)",
+        )
+        parser.add_argument(
+            "--dataset",
+            type=str,
+            default="webvoyager",
+            help="Tasks to run: webvoyager, gaia (scored by exact match against its final "
+            "answers, without the judge) or a JSONL task file (default: webvoyager)",
         )
         args = parser.parse_args()
+        dataset = resolve_dataset(args.dataset)
 
-        logging.info(f"Running with {args.max_concurrent} concurrent tasks")
+        config = RunConfig(
+            max_concurrent_tasks=args.max_concurrent,
+            model_provider=args.model_provider,
+            browser_recycle_tasks=args.browser_recycle_tasks,
+            browser_max_rss_mb=args.browser_max_rss_mb,
+            judge_cache_path=None if args.no_judge_cache else args.judge_cache,
+            judge_concurrency=args.judge_concurrent,
+            judge_queue_size=args.judge_queue_size,
+            prejudge=args.prejudge,
+            judge_image_config=ImagePreprocessConfig(
+                enabled=args.judge_image_preprocess,
+                max_edge=args.judge_image_max_edge,
+                format=args.judge_image_format,
+                quality=args.judge_image_quality,
+                crop_static_bands=not args.no_judge_image_crop,
+            ),
+            snapshot_every=args.snapshot_every,
+            dataset=dataset,
+            results_dir=dataset.results_dir,
+            task_sites=set(args.filter_site) if args.filter_site else None,
+            task_ids=set(args.ids) if args.ids else None,
+            task_limit=args.limit,
+            task_order="site" if args.site_affinity else args.order,
+            durations_from=args.durations_from,
+            lookahead=args.lookahead,
+            trace=args.trace,
+            adaptive_concurrency=args.adaptive_concurrency,
+            min_concurrent_tasks=args.min_concurrent,
+            max_concurrent_ceiling=args.max_concurrent_ceiling,
+            concurrency_interval=args.concurrency_interval,
+            site_profiles_dir=Path("results/site_profiles") if args.site_affinity else None,
+            site_profile_max_uses=args.site_profile_max_uses,
+            history_format=args.history_format,
+            retry_errored=args.retry_errored,
+            task_timeout=args.task_timeout or None,
+            step_timeout=args.step_timeout or None,
+            hedge=args.hedge,
+            hedge_quantile=args.hedge_quantile,
+            max_attempts=args.max_attempts,
+            network_filter=(
+                build_network_filter(
+                    args.block_resource_types, args.block_domains_file, args.asset_cache
+                )
+                if args.network_filter
+                else None
+            ),
+        )
 
-        asyncio.run(main(args.max_concurrent, args.model_provider))
+        if args.coordinator:
+            run_coordinator(
+                config, args.coordinator, args.lease_seconds, args.max_attempts
+            )
+        elif args.worker:
+            logging.info(f"Worker {args.worker_id} running {args.max_concurrent} tasks")
+            asyncio.run(
+                run_worker(
+                    config, args.worker, args.worker_id, args.lease_seconds / 3
+                )
+            )
+        else:
+            logging.info(f"Running with {args.max_concurrent} concurrent tasks")
+            asyncio.run(main(config))
     except KeyboardInterrupt:
         print("\nReceived keyboard interrupt, shutting down...")
     except Exception as e:
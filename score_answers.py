@@ -0,0 +1,61 @@
+import argparse
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+from evaluation.exact_match import score_answers
+from harness.datasets import resolve_dataset
+from harness.results_journal import iter_journal
+from harness.task_scheduler import iter_task_file
+
+NO_ANSWER = "<NO FINAL ANSWER>"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Score every final answer of a run by exact match, without the judge"
+    )
+    parser.add_argument("run_dir", nargs="?", type=Path)
+    parser.add_argument(
+        "--dataset",
+        default="gaia",
+        help="Dataset with expected answers: gaia or a JSONL task file (default: gaia)",
+    )
+    args = parser.parse_args()
+    dataset = resolve_dataset(args.dataset)
+    if dataset.answer_field is None:
+        parser.error(f"{dataset.name} has no expected answers to match")
+    run_dir = args.run_dir or dataset.results_dir
+
+    start = time.perf_counter()
+    tasks = {task["id"]: task for task in iter_task_file(dataset.path)}
+    answers: Dict[str, Optional[str]] = {}
+    for record in iter_journal(run_dir / "results.jsonl"):
+        if record.get("task_id") in tasks:
+            answer = record.get("final_answer")
+            answers[record["task_id"]] = None if answer == NO_ANSWER else answer
+    task_ids = sorted(answers)
+    matched = score_answers(
+        [answers[task_id] for task_id in task_ids],
+        [dataset.expected_answer(tasks[task_id]) or "" for task_id in task_ids],
+    )
+    elapsed = time.perf_counter() - start
+
+    by_level: Counter = Counter()
+    totals: Counter = Counter()
+    for task_id, ok in zip(task_ids, matched):
+        level = tasks[task_id].get("Level", "-")
+        by_level[(level, ok)] += 1
+        totals[level] += 1
+    print(
+        f"{sum(matched)}/{len(task_ids)} correct "
+        f"({sum(matched) / max(len(task_ids), 1):.1%}) of {len(tasks)} tasks, "
+        f"scored in {elapsed * 1000:.0f}ms"
+    )
+    for level in sorted(totals, key=str):
+        print(f"  Level {level}: {by_level[(level, True)]}/{totals[level]}")
+
+
+if __name__ == "__main__":
+    main()
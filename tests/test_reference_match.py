@@ -0,0 +1,50 @@
+from evaluation.reference_match import (
+    PreJudge,
+    ReferenceAnswer,
+    content_tokens,
+    numbers,
+)
+
+
+def reference(task_id: str, text: str) -> ReferenceAnswer:
+    return ReferenceAnswer(
+        task_id=task_id,
+        type="golden",
+        text=text,
+        tokens=content_tokens(text),
+        numbers=tuple(numbers(text)),
+    )
+
+
+def prejudge(*references: ReferenceAnswer) -> PreJudge:
+    return PreJudge({ref.task_id: ref for ref in references})
+
+
+def test_numbers_by_value():
+    assert numbers("1/4 of 1,200") == [0.25, 1200.0]
+    assert numbers("about 5.37e-18") == [5.37e-18]
+    # Dates are not fractions
+    assert numbers("10/12/2023") == [10.0, 12.0, 2023.0]
+
+
+def test_spelled_out_number_goes_to_the_judge():
+    judge = prejudge(reference("ArXiv--12", "3"))
+    assert judge.judge("ArXiv--12", "There are three such papers.") is None
+    assert judge.judge("ArXiv--12", "There are 3 papers.")[0] == "success"
+    assert judge.judge("ArXiv--12", "I found 5 papers.")[0] == "failed"
+
+
+def test_one_number_reference_needs_the_only_number():
+    judge = prejudge(reference("ArXiv--12", "3"))
+    assert judge.judge("ArXiv--12", "3 papers were published in 2023") is None
+
+
+def test_fraction_matches_scientific_notation():
+    judge = prejudge(reference("Wolfram Alpha--35", "1/186313420339200000"))
+    assert judge.judge("Wolfram Alpha--35", "about 5.37e-18")[0] == "success"
+    assert judge.judge("Wolfram Alpha--35", "about 2.1e-10")[0] == "failed"
+
+
+def test_answer_without_numbers_goes_to_the_judge():
+    judge = prejudge(reference("Amazon--1", "Price is $42.99"))
+    assert judge.judge("Amazon--1", "I could not find the price") is None
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from evaluation.retry import CircuitBreaker, CircuitOpenError, call_with_retry
+from harness.fake_llm import FakeRateLimitError, FakeStatusError, ScriptedChatModel
+
+
+class FakeClock:
+    """A monotonic clock that only moves when the code under test sleeps."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def call(model, clock, **kwargs):
+    return asyncio.run(
+        call_with_retry(
+            lambda: model.ainvoke([]), sleep=clock.sleep, clock=clock, **kwargs
+        )
+    )
+
+
+def test_rate_limit_waits_for_retry_after():
+    clock = FakeClock()
+    model = ScriptedChatModel([FakeRateLimitError(30), FakeRateLimitError(45), "SUCCESS"])
+    assert call(model, clock).content == "SUCCESS"
+    assert model.calls == 3
+    # The backoff of the first attempts is shorter than the hints
+    assert clock.sleeps == [30, 45]
+
+
+def test_attempts_are_limited_by_the_policy():
+    clock = FakeClock()
+    model = ScriptedChatModel([FakeRateLimitError(1)])
+    with pytest.raises(FakeRateLimitError):
+        call(model, clock)
+    assert model.calls == 8
+
+
+def test_deadline_stops_retrying():
+    clock = FakeClock()
+    model = ScriptedChatModel([FakeRateLimitError(40)])
+    with pytest.raises(FakeRateLimitError):
+        call(model, clock, deadline_seconds=100)
+    assert model.calls == 3
+    assert clock.now <= 100
+
+
+def test_bad_request_is_not_retried():
+    clock = FakeClock()
+    model = ScriptedChatModel([FakeStatusError(400), "SUCCESS"])
+    with pytest.raises(FakeStatusError):
+        call(model, clock)
+    assert model.calls == 1
+    assert clock.sleeps == []
+
+
+def test_breaker_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=clock)
+    model = ScriptedChatModel([FakeStatusError(503, retry_after=1)] * 2 + ["SUCCESS"])
+    assert call(model, clock, breaker=breaker).content == "SUCCESS"
+    assert breaker.times_opened == 1
+    # The third call waited for the breaker to half-open, then closed it
+    assert clock.now >= 60
+    assert breaker.state == "closed"
+
+
+def test_breaker_open_past_the_deadline():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+    breaker.on_failure()
+    model = ScriptedChatModel(["SUCCESS"])
+    with pytest.raises(CircuitOpenError):
+        call(model, clock, breaker=breaker, deadline_seconds=10)
+    assert model.calls == 0
+
+
+def test_bad_request_leaves_the_breaker_alone():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+    breaker.on_failure()
+    breaker.on_failure()
+    model = ScriptedChatModel([FakeStatusError(400)])
+    with pytest.raises(FakeStatusError):
+        call(model, clock, breaker=breaker)
+    assert breaker.consecutive_failures == 2
+
+    # A 400 from the half-open probe keeps the breaker open for the next probe
+    breaker.on_failure()
+    clock.now += 60
+    assert breaker.state == "half-open"
+    with pytest.raises(FakeStatusError):
+        call(model, clock, breaker=breaker)
+    assert breaker.state == "half-open"
+    assert breaker.wait_time() == 0
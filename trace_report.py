@@ -0,0 +1,30 @@
+import argparse
+from pathlib import Path
+
+from harness.tracing import format_rollup, load_traces, rollup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-site latency percentiles from the trace.json files of a run"
+    )
+    parser.add_argument(
+        "run_dir",
+        nargs="?",
+        default="results/examples-browser-use",
+        type=Path,
+    )
+    parser.add_argument("--site", help="Only show this site")
+    args = parser.parse_args()
+
+    samples = rollup(load_traces(args.run_dir))
+    if args.site:
+        samples = {site: v for site, v in samples.items() if site == args.site}
+    if not samples:
+        print(f"No traces in {args.run_dir}; run with --trace first")
+        return
+    print(format_rollup(samples))
+
+
+if __name__ == "__main__":
+    main()